@@ -0,0 +1 @@
+"""Benchmarks for nodepingpy, run against a local stand-in API server."""
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the main API entry points against the local stand-in server.
+
+Each scenario is timed over several rounds for throughput and latency
+percentiles, then run once more under tracemalloc for its peak memory.
+Results can be saved and compared with a previous run, failing when a
+scenario got slower than the tolerance allows.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_api --checks 20000 --save baseline.json
+    python -m benchmarks.bench_api --checks 20000 --baseline baseline.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from nodepingpy import _utils
+
+from .fakeserver import FakeNodePing
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest rank percentile of the samples."""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(q * len(ordered))) - 1))
+
+    return ordered[rank]
+
+
+def measure(func, rounds: int) -> dict:
+    """Time `rounds` calls of func, then measure the peak memory of one call."""
+    func()
+    samples = []
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(samples)
+    return {
+        "rounds": rounds,
+        "ops": rounds / total if total else 0.0,
+        "p50": percentile(samples, 0.5),
+        "p90": percentile(samples, 0.9),
+        "p99": percentile(samples, 0.99),
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def scenarios(server: FakeNodePing, opts) -> dict:
+    from nodepingpy import checkplan, checks, contacts, maintenance
+    from nodepingpy import notifications, results
+    from nodepingpy.nptypes import checktypes, maintenancetypes, resulttypes
+
+    token = "token"
+    checkids = list(server.checks)[: opts.bulk]
+    checkid = checkids[0]
+
+    def bulk_create():
+        desired = [
+            checktypes.PingCheck("10.0.{}.{}".format(i // 256, i % 256), label="bench {}".format(i))
+            for i in range(opts.bulk)
+        ]
+        plan = checkplan.plan(desired, {})
+        created = checkplan.apply(token, plan, workers=opts.workers)
+        ids = [r["_id"] for r in created["create"].values() if "_id" in r]
+        checkplan.apply(
+            token, checkplan.CheckPlan(delete=[(i, i) for i in ids]), workers=opts.workers
+        )
+
+    def bulk_maintenance():
+        args = maintenancetypes.AdHocCreate(30, checkids, True, "bench")
+        bulk = maintenance.create_bulk(token, args, chunksize=50, workers=opts.workers)
+        maintenance.delete_bulk(token, bulk, workers=opts.workers)
+
+    return {
+        "checks.get_all": lambda: checks.get_all(token),
+        "checks.get_by_id": lambda: checks.get_by_id(token, checkid),
+        "contacts.get_all": lambda: contacts.get_all(token),
+        "results.get": lambda: results.get(token, checkid, resulttypes.Results(limit=300)),
+        "results.get_current": lambda: results.get_current(token),
+        "notifications.get": lambda: notifications.get(
+            token, notifications.Notification(limit=1000)
+        ),
+        "bulk create+delete checks": bulk_create,
+        "bulk ad-hoc maintenance": bulk_maintenance,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Scenarios whose median latency regressed beyond the tolerance."""
+    regressions = []
+
+    for name, stats in current.items():
+        before = baseline.get(name)
+        if before and stats["p50"] > before["p50"] * (1 + tolerance):
+            regressions.append(
+                "{}: p50 {:.2f}ms -> {:.2f}ms".format(
+                    name, before["p50"] * 1000, stats["p50"] * 1000
+                )
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=5000)
+    parser.add_argument("--contacts", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--bulk", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--only", help="run scenarios containing this text")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved by --save")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    opts = parser.parse_args()
+
+    server = FakeNodePing(
+        latency=opts.latency, checks=opts.checks, contacts=opts.contacts
+    ).start()
+    previous = _utils.set_transport(server.transport)
+
+    report = {}
+    print(
+        "{:<28} {:>7} {:>10} {:>10} {:>10} {:>9}".format(
+            "scenario", "ops/s", "p50 ms", "p90 ms", "p99 ms", "peak MB"
+        )
+    )
+
+    for name, func in scenarios(server, opts).items():
+        if opts.only and opts.only not in name:
+            continue
+        rounds = opts.rounds if not name.startswith("bulk") else max(1, opts.rounds // 5)
+        stats = measure(func, rounds)
+        report[name] = stats
+        print(
+            "{:<28} {:>7.1f} {:>10.2f} {:>10.2f} {:>10.2f} {:>9.1f}".format(
+                name,
+                stats["ops"],
+                stats["p50"] * 1000,
+                stats["p90"] * 1000,
+                stats["p99"] * 1000,
+                stats["peak_mb"],
+            )
+        )
+
+    _utils.set_transport(previous)
+    server.stop()
+
+    if opts.save:
+        with open(opts.save, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    if opts.baseline:
+        with open(opts.baseline, encoding="utf-8") as fh:
+            regressions = compare(report, json.load(fh), opts.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""Compare serializing check dataclasses with asdict and checktypes.to_api.
+
+Every check type is built once with its required fields filled in, then
+each is turned into a create request body the old way, with `asdict`
+and `strip_none_values`, and with the precompiled `to_api`. Converting
+a `checks.get_all` response from the stand-in server back into
+dataclasses with `checktypes.from_api_all` is timed as well.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_checktypes --checks 50000
+"""
+
+import argparse
+import time
+from dataclasses import MISSING, asdict, fields, is_dataclass
+
+from nodepingpy import _utils, codec
+from nodepingpy.nptypes import checktypes
+
+from .fakeserver import FakeNodePing
+
+_REQUIRED = {"data": {"A1": "active", "A2": "active"}, "port": 443}
+
+
+def examples(count: int) -> list:
+    """`count` checks cycling through every checktypes dataclass."""
+    classes = [
+        cls
+        for cls in vars(checktypes).values()
+        if isinstance(cls, type) and is_dataclass(cls)
+    ]
+    checks = []
+
+    for i in range(count):
+        cls = classes[i % len(classes)]
+        required = {
+            item.name: _REQUIRED.get(item.name, "host{}.example.com".format(i))
+            for item in fields(cls)
+            if item.default is MISSING and item.default_factory is MISSING
+        }
+        check = cls(**required)
+        check.label = "check {}".format(i)
+        check.notifications.append({"K{}".format(i % 100): {"delay": 0, "schedule": "All"}})
+        check.tags.append("env:prod")
+        checks.append(check)
+
+    return checks
+
+
+def asdict_body(check) -> bytes:
+    data = asdict(check)
+    data.update({"token": "token", "customerid": None})
+
+    return codec.dumps(_utils.strip_none_values(data))
+
+
+def to_api_body(check) -> bytes:
+    data = checktypes.to_api(check)
+    data.update({"token": "token", "customerid": None})
+
+    return codec.dumps(_utils.strip_none_values(data))
+
+
+def timed(func, checks: list, rounds: int) -> float:
+    """Fastest of `rounds` passes over all the checks."""
+    times = []
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for check in checks:
+            func(check)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5)
+    opts = parser.parse_args()
+
+    checks = examples(opts.checks)
+
+    for check in checks:
+        if asdict_body(check) != to_api_body(check):
+            raise SystemExit("to_api differs for {!r}".format(check))
+
+    before = timed(asdict_body, checks, opts.rounds)
+    after = timed(to_api_body, checks, opts.rounds)
+
+    print("checks: {}  json backend: {}".format(opts.checks, codec.name()))
+    print("{:<22} {:>10} {:>12}".format("path", "total ms", "us/check"))
+    for name, elapsed in (("asdict + strip", before), ("checktypes.to_api", after)):
+        print(
+            "{:<22} {:>10.1f} {:>12.2f}".format(
+                name, elapsed * 1000, elapsed / opts.checks * 1e6
+            )
+        )
+    print("speedup: {:.1f}x".format(before / after))
+
+    with FakeNodePing(checks=opts.checks, contacts=max(10, opts.checks // 100)) as server:
+        response = server.handle("GET", ["checks"], {})[1]
+
+    times = []
+    for _ in range(opts.rounds):
+        start = time.perf_counter()
+        checktypes.from_api_all(response)
+        times.append(time.perf_counter() - start)
+
+    print(
+        "from_api_all: {} checks in {:.1f}ms ({:.2f} us/check)".format(
+            len(response), min(times) * 1000, min(times) / len(response) * 1e6
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
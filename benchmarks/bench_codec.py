@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""Compare the installed JSON backends on NodePing shaped payloads.
+
+Payloads come from the stand-in server: all checks, current events, raw
+results, and a check creation body. Each backend decodes from bytes and
+encodes to bytes, as the library does. "decode ms" is the backend alone
+and "loads ms" is `codec.loads` with garbage collection paused for
+bodies of 1 MB or more, see `codec.GC_PAUSE_BYTES`.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_codec --checks 50000
+"""
+
+import argparse
+import time
+
+from nodepingpy import codec
+
+from .fakeserver import FakeNodePing
+
+
+def payloads(checks: int, results: int) -> dict[str, bytes]:
+    stdlib = codec.get("json")
+
+    with FakeNodePing(checks=checks, contacts=max(10, checks // 100), failing=0.1) as server:
+        checkid = next(iter(server.checks))
+        bodies = {
+            "checks.get_all": server.handle("GET", ["checks"], {})[1],
+            "results.get_current": server.handle("GET", ["results", "current"], {})[1],
+            "results.get": server.handle("GET", ["results", checkid], {"limit": results})[1],
+            "checks.create_check": {
+                "type": "HTTP",
+                "target": "https://example.com/",
+                "label": "example",
+                "interval": 5,
+                "enabled": True,
+                "runlocations": ["nam"],
+                "notifications": [{"A000001": {"delay": 0, "schedule": "All"}}],
+                "tags": ["env:prod"],
+            },
+        }
+
+    return {name: stdlib.dumps(body) for name, body in bodies.items()}
+
+
+def best(func, arg, rounds: int) -> float:
+    """Fastest of `rounds` timed calls."""
+    times = []
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--results", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    opts = parser.parse_args()
+
+    bodies = payloads(opts.checks, opts.results)
+    codec.GC_PAUSE_BYTES = 1024 * 1024
+    backends = [codec.get(name) for name in codec.available()]
+
+    print("default backend:", codec.name())
+    print(
+        "{:<22} {:>9} {:<8} {:>11} {:>11} {:>11} {:>9}".format(
+            "payload", "MB", "backend", "decode ms", "loads ms", "encode ms", "MB/s"
+        )
+    )
+
+    for payload, body in bodies.items():
+        value = codec.get("json").loads(body)
+        rounds = opts.rounds if len(body) > 100000 else opts.rounds * 1000
+
+        for backend in backends:
+            decode = best(backend.loads, body, rounds)
+            previous = codec.use(backend.name)
+            loads = best(codec.loads, body, rounds)
+            codec.use(previous.name)
+            encode = best(backend.dumps, value, rounds)
+            print(
+                "{:<22} {:>9.2f} {:<8} {:>11.3f} {:>11.3f} {:>11.3f} {:>9.0f}".format(
+                    payload,
+                    len(body) / 1024 / 1024,
+                    backend.name,
+                    decode * 1000,
+                    loads * 1000,
+                    encode * 1000,
+                    len(body) / 1024 / 1024 / loads if loads else 0,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
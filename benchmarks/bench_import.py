@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""Measure and guard the import time of the library.
+
+Each import runs in a fresh interpreter with `-X importtime`, keeping the
+fastest of several runs, and the slowest nodepingpy modules are listed.
+The run fails when a module that should load lazily was imported, when
+an import is slower than `--max-ms`, or when it regressed against a
+baseline saved with `--save`.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --save imports.json
+    python -m benchmarks.bench_import --baseline imports.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports measured, and the modules each must not load eagerly
+IMPORTS = {
+    "import nodepingpy": (
+        "nodepingpy.checks",
+        "nodepingpy.nptypes",
+    ),
+    "from nodepingpy import checks": (
+        "nodepingpy.nptypes.checktypes",
+        "urllib.request",
+        "orjson",
+    ),
+    "from nodepingpy import contacts": (
+        "nodepingpy.nptypes.checktypes",
+        "urllib.request",
+    ),
+    "from nodepingpy import checkplan": ("nodepingpy.nptypes.checktypes",),
+    "from nodepingpy import records": ("nodepingpy.nptypes.checktypes",),
+    "from nodepingpy.nptypes import checktypes": (),
+}
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, ",".join(m for m in {lazy!r} if m in sys.modules))
+"""
+
+
+def run(statement: str, lazy: tuple) -> tuple[float, list[str], dict[str, int]]:
+    """Import once in a new interpreter.
+
+    Returns:
+        tuple: seconds taken, lazy modules that were loaded anyway, and
+            the self time in microseconds of each nodepingpy module
+    """
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            _PROBE.format(statement=statement, lazy=lazy),
+        ],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=ROOT),
+        check=True,
+    )
+    elapsed, loaded = proc.stdout.split(" ", 1)
+    modules = {}
+
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and "nodepingpy" in parts[2]:
+            modules[parts[2].strip()] = int(parts[0].split()[-1])
+
+    return float(elapsed), [m for m in loaded.strip().split(",") if m], modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--max-ms", type=float, help="fail when any import is slower")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved by --save")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--slack-ms",
+        type=float,
+        default=10.0,
+        help="ignore baseline differences smaller than this, imports are noisy",
+    )
+    opts = parser.parse_args()
+
+    report = {}
+    failures = []
+    print("{:<44} {:>9}  {}".format("import", "ms", "slowest nodepingpy modules (self ms)"))
+
+    for statement, lazy in IMPORTS.items():
+        results = [run(statement, lazy) for _ in range(opts.runs)]
+        elapsed, loaded, modules = min(results, key=lambda result: result[0])
+        report[statement] = {"p50": elapsed}
+        slowest = sorted(modules.items(), key=lambda item: -item[1])[:3]
+        print(
+            "{:<44} {:>9.2f}  {}".format(
+                statement,
+                elapsed * 1000,
+                ", ".join("{} {:.1f}".format(name, us / 1000) for name, us in slowest),
+            )
+        )
+
+        for module in loaded:
+            failures.append("{}: loaded {} eagerly".format(statement, module))
+        if opts.max_ms and elapsed * 1000 > opts.max_ms:
+            failures.append(
+                "{}: {:.2f}ms > {}ms".format(statement, elapsed * 1000, opts.max_ms)
+            )
+
+    if opts.save:
+        with open(opts.save, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    if opts.baseline:
+        with open(opts.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        for statement, stats in report.items():
+            before = baseline.get(statement, {}).get("p50")
+            if (
+                before
+                and stats["p50"] > before * (1 + opts.tolerance)
+                and (stats["p50"] - before) * 1000 > opts.slack_ms
+            ):
+                failures.append(
+                    "{}: {:.2f}ms -> {:.2f}ms".format(
+                        statement, before * 1000, stats["p50"] * 1000
+                    )
+                )
+
+    for line in failures:
+        print("REGRESSION", line)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark bulk ad-hoc maintenance against the local stand-in server.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_maintenance --checks 5000 --latency 0.05
+"""
+
+import argparse
+import time
+
+from nodepingpy import _utils, maintenance
+from nodepingpy.nptypes.maintenancetypes import AdHocCreate
+
+from .fakeserver import FakeNodePing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=5000)
+    parser.add_argument("--chunksize", type=int, default=250)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    opts = parser.parse_args()
+
+    server = FakeNodePing(latency=opts.latency).start()
+    _utils.set_transport(server.transport)
+
+    checklist = ["201205050153W2Q4C-{:08d}".format(i) for i in range(opts.checks)]
+    args = AdHocCreate(30, checklist, True, "rolling deploy")
+
+    for workers in (1, opts.workers):
+        start = time.perf_counter()
+        bulk = maintenance.create_bulk(
+            "token", args, chunksize=opts.chunksize, workers=workers
+        )
+        created = time.perf_counter() - start
+
+        start = time.perf_counter()
+        maintenance.delete_bulk("token", bulk, workers=workers)
+        deleted = time.perf_counter() - start
+
+        print(
+            "workers={:<3} maintenances={:<4} create={:.3f}s delete={:.3f}s errors={}".format(
+                workers, len(bulk.ids), created, deleted, len(bulk.errors)
+            )
+        )
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
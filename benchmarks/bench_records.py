@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""Compare resident memory and access speed of dict and record responses.
+
+A `checks.get_all` response from the stand-in server is decoded once as
+dicts and once as `records.CheckRecord` objects, and the memory each
+keeps alive is measured with tracemalloc.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_records --checks 50000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from nodepingpy import codec, records
+
+from .fakeserver import FakeNodePing
+
+
+def retained(build) -> tuple[float, object]:
+    """Megabytes still allocated after `build()` returns, and its result."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return size / 1024 / 1024, result
+
+
+def timed(func, rounds: int) -> float:
+    """Fastest of `rounds` timed calls."""
+    times = []
+
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=5)
+    opts = parser.parse_args()
+
+    with FakeNodePing(checks=opts.checks, contacts=max(10, opts.checks // 100)) as server:
+        body = codec.dumps(server.handle("GET", ["checks"], {})[1])
+
+    dict_mb, as_dicts = retained(lambda: codec.loads(body))
+    record_mb, as_records = retained(
+        lambda: records.decode_all(codec.loads(body), records.CheckRecord)
+    )
+
+    decode_dicts = timed(lambda: codec.loads(body), opts.rounds)
+    decode_records = timed(
+        lambda: records.decode_all(codec.loads(body), records.CheckRecord), opts.rounds
+    )
+
+    dict_values = list(as_dicts.values())
+    record_values = list(as_records.values())
+    read_dicts = timed(
+        lambda: [(c["type"], c["label"], c["interval"]) for c in dict_values], opts.rounds
+    )
+    read_records = timed(
+        lambda: [(c.type, c.label, c.interval) for c in record_values], opts.rounds
+    )
+
+    print("checks: {}  response: {:.1f} MB".format(opts.checks, len(body) / 1024 / 1024))
+    print("{:<10} {:>12} {:>12} {:>12}".format("", "resident MB", "decode ms", "read ms"))
+    print(
+        "{:<10} {:>12.1f} {:>12.1f} {:>12.2f}".format(
+            "dicts", dict_mb, decode_dicts * 1000, read_dicts * 1000
+        )
+    )
+    print(
+        "{:<10} {:>12.1f} {:>12.1f} {:>12.2f}".format(
+            "records", record_mb, decode_records * 1000, read_records * 1000
+        )
+    )
+    print("memory saved: {:.0%}".format(1 - record_mb / dict_mb))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""Load test the webhook receiver on localhost.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_webhooks --events 20000 --clients 16
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.client import HTTPConnection
+
+from nodepingpy import webhooks
+
+
+def _client(host, port, bodies, statuses):
+    conn = HTTPConnection(host, port)
+    headers = {"Content-Type": "application/json"}
+
+    for body in bodies:
+        conn.request("POST", "/hook?secret=bench", body, headers)
+        response = conn.getresponse()
+        response.read()
+        statuses[response.status] = statuses.get(response.status, 0) + 1
+
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    opts = parser.parse_args()
+
+    receiver = webhooks.WebhookReceiver(
+        port=0, path="/hook", workers=opts.workers, secret="bench"
+    )
+    handled = []
+    receiver.on(handled.append)
+    receiver.start()
+    host, port = receiver._server.server_address[:2]
+
+    unique = int(opts.events * (1 - opts.duplicates))
+    bodies = [
+        json.dumps(
+            {
+                "event": "down" if i % 2 else "up",
+                "id": "201205050153W2Q4C-{:08d}".format(i % 5000),
+                "label": "check {}".format(i % 5000),
+                "runtime": str(i % 900),
+                "target": "https://example.com/{}".format(i % 5000),
+                "checktime": str(1700000000000 + i),
+            }
+        ).encode()
+        for i in range(unique)
+    ]
+    # retried deliveries repeat an earlier body
+    bodies += bodies[: opts.events - unique]
+
+    shares = [bodies[i :: opts.clients] for i in range(opts.clients)]
+    statuses = [{} for _ in shares]
+    threads = [
+        threading.Thread(target=_client, args=(host, port, share, status))
+        for share, status in zip(shares, statuses)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    receiver.stop()
+
+    print(
+        "events={} clients={} time={:.3f}s rate={:.0f}/s".format(
+            len(bodies), opts.clients, elapsed, len(bodies) / elapsed
+        )
+    )
+    print("handled={} stats={}".format(len(handled), receiver.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+
+"""A local stand-in for the NodePing API used by the benchmarks.
+
+The server keeps everything in memory and can add a fixed latency to
+every response to approximate a round trip to the real API. It can be
+filled with synthetic checks, contacts, contact groups, schedules,
+notification profiles, results, and notifications at any scale. Point
+the library at it by installing its transport, which sends requests for
+the NodePing API to the server instead:
+
+    server = FakeNodePing(latency=0.05, checks=20000, contacts=500).start()
+    _utils.set_transport(server.transport)
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+
+from nodepingpy import _utils
+
+
+CUSTOMERID = "201205050153W2Q4C"
+CHECK_TYPES = ("HTTP", "PING", "DNS", "SSL", "HTTPCONTENT", "PORT")
+ROUTES = (
+    "checks",
+    "contactgroups",
+    "contacts",
+    "maintenance",
+    "notificationprofiles",
+    "notifications",
+    "results",
+    "schedules",
+)
+_READ_ONLY_BODY = ("token", "customerid")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class FakeNodePing:
+    """In-memory NodePing API server.
+
+    Args:
+        latency (float): seconds to wait before answering each request
+        host (str): address to listen on
+        port (int): port to listen on, 0 picks a free port
+        checks (int): number of synthetic checks
+        contacts (int): number of synthetic contacts, each with two addresses
+        failing (float): share of the checks that are failing
+        seed (int): seed for the synthetic data
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        checks: int = 0,
+        contacts: int = 0,
+        failing: float = 0.02,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.maintenance = {}
+        self.checks = {}
+        self.contacts = {}
+        self.contactgroups = {}
+        self.schedules = {}
+        self.notificationprofiles = {}
+        self.requests = 0
+        self._ids = count(1)
+        self._lock = threading.RLock()
+        self._encoded = {}
+        self._random = random.Random(seed)
+        self._populate(checks, contacts, failing)
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/api/1".format(host, port)
+
+    def transport(self, method: str, url: str, body: bytes) -> tuple[int, bytes]:
+        """Transport for `_utils.set_transport` that sends API requests here."""
+        if url.startswith(_utils.API_URL):
+            url = self.url + url[len(_utils.API_URL) :]
+
+        return _utils.urlopen_transport(method, url, body)
+
+    def start(self) -> "FakeNodePing":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def new_id(self, prefix: str = "") -> str:
+        with self._lock:
+            return "{}{:06d}".format(prefix, next(self._ids))
+
+    def _populate(self, checks: int, contacts: int, failing: float) -> None:
+        rand = self._random
+        now = int(time.time() * 1000)
+        addresses = []
+
+        self.schedules = {
+            "Days": {
+                day: {"time1": "6:00", "time2": "18:00", "exclude": False}
+                for day in ("monday", "tuesday", "wednesday", "thursday", "friday")
+            },
+            "All": {"monday": {"allday": True}},
+        }
+
+        for _ in range(contacts):
+            contactid = "{}-{}".format(CUSTOMERID, self.new_id("K"))
+            contact = {
+                "_id": contactid,
+                "customer_id": CUSTOMERID,
+                "name": "Contact {}".format(contactid[-6:]),
+                "custrole": "view",
+                "addresses": {},
+            }
+            for kind in ("email", "sms"):
+                addressid = self.new_id("A")
+                contact["addresses"][addressid] = {
+                    "address": "{}@example.com".format(addressid)
+                    if kind == "email"
+                    else "+1555{}".format(addressid[-6:]),
+                    "type": kind,
+                    "suppressup": False,
+                    "suppressdown": False,
+                    "mute": False,
+                }
+                addresses.append(addressid)
+            self.contacts[contactid] = contact
+
+        for i in range(min(len(addresses) // 5, 50)):
+            groupid = "{}-{}".format(CUSTOMERID, self.new_id("G"))
+            self.contactgroups[groupid] = {
+                "name": "Group {}".format(i),
+                "members": rand.sample(addresses, 5),
+            }
+
+        for _ in range(checks):
+            checkid = "{}-{}".format(CUSTOMERID, self.new_id("C"))
+            checktype = rand.choice(CHECK_TYPES)
+            notifications = [
+                {address: {"delay": rand.choice((0, 5)), "schedule": "All"}}
+                for address in rand.sample(addresses, min(2, len(addresses)))
+            ]
+            self.checks[checkid] = {
+                "_id": checkid,
+                "customer_id": CUSTOMERID,
+                "label": "{} check {}".format(checktype, checkid[-6:]),
+                "type": checktype,
+                "interval": rand.choice((1, 5, 15)),
+                "enable": "active",
+                "public": False,
+                "state": 0 if rand.random() < failing else 1,
+                "firstdown": 0,
+                "created": now - rand.randrange(10**10),
+                "modified": now,
+                "queue": "bINL2yNqyV",
+                "uuid": checkid.lower(),
+                "status": "assigned",
+                "runlocations": ["nam"],
+                "homeloc": False,
+                "autodiag": False,
+                "dep": False,
+                "mute": False,
+                "notifications": notifications,
+                "tags": ["env:prod"],
+                "parameters": {
+                    "target": "https://{}.example.com/".format(checkid[-6:].lower()),
+                    "threshold": 5,
+                    "sens": 2,
+                },
+            }
+
+    def _changed(self) -> None:
+        self._encoded.clear()
+
+    def encode(self, method: str, path: list[str], body: dict) -> tuple[int, bytes]:
+        """Answer a request with an encoded body, reusing encodings of unchanged data."""
+        # requests are answered one at a time so data never changes mid-encode
+        with self._lock:
+            if method != "GET":
+                status, payload = self.handle(method, path, body)
+                self._changed()
+                return status, json.dumps(payload).encode("utf-8")
+
+            key = (tuple(path), json.dumps(body, sort_keys=True))
+            cached = self._encoded.get(key)
+
+            if cached is None:
+                status, payload = self.handle(method, path, body)
+                cached = (status, json.dumps(payload).encode("utf-8"))
+                self._encoded[key] = cached
+
+            return cached
+
+    def handle(self, method: str, path: list[str], body: dict):
+        """Route a request to the in-memory data. Returns (status, payload)."""
+        route = path[0] if path else ""
+
+        if route not in ROUTES:
+            return 404, {"error": "Unknown route"}
+
+        return getattr(self, "_{}".format(route))(method, path[1:], body)
+
+    def _crud(self, store: dict, prefix: str, method, path, body):
+        """Create, read, update, and delete for a dict of records."""
+        if method == "POST" and not path:
+            recordid = "{}-{}".format(CUSTOMERID, self.new_id(prefix))
+            entry = {k: v for k, v in body.items() if k not in _READ_ONLY_BODY}
+            entry["_id"] = recordid
+            store[recordid] = entry
+            return 200, entry
+        if method == "GET":
+            if path:
+                entry = store.get(path[0])
+                return (200, entry) if entry else (404, {"error": "Not found"})
+            return 200, store
+        if method == "PUT" and path:
+            entry = store.get(path[0])
+            if entry is None:
+                return 404, {"error": "Not found"}
+            entry.update({k: v for k, v in body.items() if k not in _READ_ONLY_BODY})
+            return 200, entry
+        if method == "DELETE" and path:
+            if store.pop(path[0], None) is None:
+                return 404, {"error": "Not found"}
+            return 200, {"ok": True, "id": path[0]}
+
+        return 400, {"error": "Unsupported request"}
+
+    def _maintenance(self, method, path, body):
+        if method == "POST":
+            maintenanceid = self.new_id("M")
+            entry = {k: v for k, v in body.items() if k not in _READ_ONLY_BODY}
+            entry["_id"] = maintenanceid
+            self.maintenance[maintenanceid] = entry
+            return 200, entry
+        if method == "GET":
+            if path:
+                entry = self.maintenance.get(path[0])
+                return (200, entry) if entry else (404, {"error": "Not found"})
+            return 200, self.maintenance
+        if method == "DELETE" and path:
+            if self.maintenance.pop(path[0], None) is None:
+                return 404, {"error": "Not found"}
+            return 200, {"ok": True, "id": path[0]}
+
+        return 400, {"error": "Unsupported request"}
+
+    def _checks(self, method, path, body):
+        if method == "POST" and not path:
+            checkid = "{}-{}".format(CUSTOMERID, self.new_id("C"))
+            parameters = {}
+            entry = {"_id": checkid, "customer_id": CUSTOMERID, "parameters": parameters}
+            for key, value in body.items():
+                if key in _READ_ONLY_BODY:
+                    continue
+                if key in ("target", "threshold", "sens", "fields", "data"):
+                    parameters[key] = value
+                elif key == "enabled":
+                    entry["enable"] = "active" if value else "inactive"
+                else:
+                    entry[key] = value
+            entry.setdefault("enable", "active")
+            entry["state"] = 1
+            self.checks[checkid] = entry
+            return 200, entry
+
+        return self._crud(self.checks, "C", method, path, body)
+
+    def _contacts(self, method, path, body):
+        if method == "POST" and (not path or path[0] == CUSTOMERID):
+            contactid = "{}-{}".format(CUSTOMERID, self.new_id("K"))
+            entry = {
+                "_id": contactid,
+                "customer_id": CUSTOMERID,
+                "name": body.get("name", ""),
+                "custrole": body.get("custrole", "view"),
+                "addresses": {
+                    self.new_id("A"): dict(address)
+                    for address in body.get("newaddresses") or ()
+                },
+            }
+            self.contacts[contactid] = entry
+            return 200, entry
+
+        return self._crud(self.contacts, "K", method, path, body)
+
+    def _contactgroups(self, method, path, body):
+        return self._crud(self.contactgroups, "G", method, path, body)
+
+    def _notificationprofiles(self, method, path, body):
+        return self._crud(self.notificationprofiles, "P", method, path, body)
+
+    def _schedules(self, method, path, body):
+        if method in ("POST", "PUT") and path:
+            self.schedules[path[0]] = body.get("data", {})
+            return 200, {"ok": True, "id": path[0]}
+
+        return self._crud(self.schedules, "S", method, path, body)
+
+    def _results(self, method, path, body):
+        if method != "GET" or not path:
+            return 400, {"error": "Unsupported request"}
+
+        rand = random.Random(path[-1])
+        now = int(time.time() * 1000)
+
+        if path[0] == "current":
+            return 200, {
+                "{}-{}".format(checkid, now): {
+                    "_id": "{}-{}".format(checkid, now),
+                    "checkid": checkid,
+                    "type": "down",
+                    "start": now - 60000,
+                    "message": "Connection timed out",
+                }
+                for checkid, check in self.checks.items()
+                if check.get("state") == 0
+            }
+        if path[0] == "uptime":
+            return 200, {
+                "2026-{:02d}".format(month): {
+                    "enabled": 2592000000,
+                    "down": rand.randrange(600000),
+                    "uptime": round(100 - rand.random() / 10, 3),
+                }
+                for month in range(1, 13)
+            }
+        if path[0] == "events":
+            return 200, [
+                {
+                    "_id": "{}-{}".format(path[-1], i),
+                    "type": "down",
+                    "start": now - i * 3600000,
+                    "end": now - i * 3600000 + 120000,
+                    "message": "Connection timed out",
+                }
+                for i in range(int(body.get("limit") or 20))
+            ]
+
+        limit = int(body.get("limit") or 300)
+        return 200, [
+            {
+                "_id": "{}-{}".format(path[-1], now - i * 60000),
+                "ci": CUSTOMERID,
+                "t": "HTTP",
+                "tg": "https://example.com/",
+                "th": 5,
+                "i": 1,
+                "ra": now - i * 60000,
+                "q": "bINL2yNqyV",
+                "s": now - i * 60000,
+                "sc": "200",
+                "m": "OK",
+                "su": True,
+                "rt": rand.randrange(50, 900),
+                "e": now - i * 60000 + 400,
+                "l": {str(now - i * 60000): "wa"},
+            }
+            for i in range(limit)
+        ]
+
+    def _notifications(self, method, path, body):
+        if method != "GET":
+            return 400, {"error": "Unsupported request"}
+
+        now = int(time.time() * 1000)
+        checkids = list(self.checks)[:100] or ["{}-C000000".format(CUSTOMERID)]
+        return 200, {
+            checkid: [
+                {
+                    "contact": "{}-K000001".format(CUSTOMERID),
+                    "addressid": "A000002",
+                    "message": "Check down",
+                    "time": now - i * 3600000,
+                    "type": "email",
+                }
+                for i in range(int(body.get("limit") or 300) // len(checkids) + 1)
+            ]
+            for checkid in checkids
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    body = {}
+
+                path = self.path.split("?", 1)[0].strip("/").split("/")
+                # drop the "api/1" prefix
+                path = path[2:] if path[:2] == ["api", "1"] else path
+
+                with server._lock:
+                    server.requests += 1
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                status, data = server.encode(self.command, path, body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+        return Handler
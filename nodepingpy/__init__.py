@@ -1,14 +1,53 @@
+"""NodePing API client.
+
+Modules are imported the first time they are used, so `import nodepingpy`
+followed by `nodepingpy.checks.get_all(token)` only loads what it needs.
+"""
+
+import sys
+
 __all__ = [
     "accounts",
+    "cassette",
+    "checkplan",
     "checks",
+    "clusters",
+    "codec",
     "contactgroups",
     "contacts",
+    "depgraph",
     "diagnostics",
+    "exporter",
+    "fanout",
+    "fields",
     "information",
     "maintenance",
+    "maintenancecalendar",
+    "metrics",
     "notificationprofiles",
     "notifications",
+    "push",
+    "records",
+    "reconcile",
     "results",
     "schedules",
+    "simulator",
+    "snapshot",
+    "tracing",
+    "watch",
+    "webhooks",
     "nptypes"
 ]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        # __import__ rather than importlib, so -X importtime shows the module
+        __import__("{}.{}".format(__name__, name))
+        return sys.modules["{}.{}".format(__name__, name)]
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
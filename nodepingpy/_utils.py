@@ -3,15 +3,17 @@
 """ Helper functions to reduce code reuse and misc other uses
 """
 
-from typing import Any
+from typing import Any, Callable
 
-from time import time
-from urllib.parse import urlencode
-from urllib.error import HTTPError as httperror
-from urllib.request import Request, urlopen
+from hashlib import blake2b
+from os import environ
+from time import perf_counter, sleep, time
+from urllib.parse import urlencode, urlsplit
 
 import json
 
+from . import codec
+
 
 API_URL = "https://api.nodeping.com/api/1"
 
@@ -53,6 +55,258 @@ def create_timestamp(duration):
     return int(time() * 1000) + (duration * 1000)
 
 
+class RequestInfo:
+    """Details of one API request, passed to the transport hooks.
+
+    Attributes:
+        method (str): HTTP method
+        url (str): full URL of the request
+        route (str): URL path below the API root, with IDs replaced by "{id}"
+        attempt (int): 1 for the first attempt, higher for retries
+        request_bytes (int): size of the encoded request body
+        response_bytes (int): size of the response body
+        status (int): HTTP status, None until a response is received
+        encode_time (float): seconds spent encoding the request body
+        decode_time (float): seconds spent decoding the response body
+        elapsed (float): seconds from sending the request to reading the response
+        error (Exception): network error for the attempt, or None
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "route",
+        "attempt",
+        "request_bytes",
+        "response_bytes",
+        "status",
+        "encode_time",
+        "decode_time",
+        "elapsed",
+        "error",
+    )
+
+    def __init__(self, method: str, url: str):
+        self.method = method
+        self.url = url
+        self.route = route_of(url)
+        self.attempt = 1
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.status = None
+        self.encode_time = 0.0
+        self.decode_time = 0.0
+        self.elapsed = 0.0
+        self.error = None
+
+
+HOOKS = {"pre_request": [], "post_response": [], "error": []}
+
+# How many times a request is repeated after a network error, a 429, or a
+# 502/503/504. NODEPING_RETRIES sets the initial value, see `set_retries`.
+RETRIES = int(environ.get("NODEPING_RETRIES", "0"))
+_RETRY_STATUS = frozenset((429, 502, 503, 504))
+# POST creates things, so it is only repeated when the request was not handled
+_POST_RETRY_STATUS = frozenset((429, 503))
+
+# Fixed path segments that follow a route, anything else is an ID or a name
+_SUBROUTES = {
+    "info": frozenset(("probe", "location")),
+    "maintenance": frozenset(("ad-hoc",)),
+    "results": frozenset(("current", "events", "summary", "uptime")),
+}
+
+
+def route_of(url: str) -> str:
+    """Route of an API URL with IDs and names replaced, such as "checks/{id}".
+
+    Only the route and the fixed segments in _SUBROUTES are kept, so
+    schedule names and other values from your account never become part
+    of the route.
+    """
+    path = urlsplit(url).path
+    root = urlsplit(API_URL).path.rstrip("/")
+
+    if root and path.startswith(root):
+        path = path[len(root) :]
+
+    parts = [p for p in path.split("/") if p]
+    if not parts:
+        return ""
+
+    subroutes = _SUBROUTES.get(parts[0], ())
+    return "/".join(
+        [parts[0]]
+        + [
+            part if i == 1 and part in subroutes else "{id}"
+            for i, part in enumerate(parts[1:], 1)
+        ]
+    )
+
+
+def add_hook(event: str, func: Callable[[RequestInfo], None]) -> None:
+    """Call `func` with a RequestInfo for every API request.
+
+    Args:
+        event (str): "pre_request" before each attempt is sent,
+            "post_response" after the response is decoded, or "error"
+            when an attempt fails with a network error
+        func (callable): called with the RequestInfo. Exceptions raised
+            by hooks are ignored so they cannot break requests.
+    """
+    if func not in HOOKS[event]:
+        HOOKS[event].append(func)
+
+
+def remove_hook(event: str, func: Callable[[RequestInfo], None]) -> None:
+    """Stop calling a hook added with `add_hook`."""
+    if func in HOOKS[event]:
+        HOOKS[event].remove(func)
+
+
+def _run_hooks(hooks: list, info: RequestInfo) -> None:
+    for hook in hooks:
+        try:
+            hook(info)
+        except Exception:
+            pass
+
+
+def urlopen_transport(method: str, url: str, body: bytes) -> tuple[int, bytes]:
+    """Send a request with urllib. Returns the HTTP status and response body."""
+    # urllib.request pulls in http.client, ssl, and email, so it is only
+    # imported once a request is sent
+    from urllib.error import HTTPError as httperror
+    from urllib.request import Request, urlopen
+
+    req = Request(url, body, method=method)
+    req.add_header("Content-Type", "application/json; charset=utf-8")
+    req.add_header("Content-Length", str(len(body)))
+
+    try:
+        data = urlopen(req)
+    except httperror as err:
+        data = err
+
+    return data.getcode(), data.read()
+
+
+_transport = urlopen_transport
+
+
+def set_transport(
+    transport: Callable[[str, str, bytes], tuple[int, bytes]] | None = None
+) -> Callable[[str, str, bytes], tuple[int, bytes]]:
+    """Replace the function that sends requests, such as with a cassette.
+
+    Args:
+        transport (callable): called with the method, URL, and encoded JSON
+            body, returns (HTTP status, response body bytes). Raises OSError
+            for network errors. None restores `urlopen_transport`.
+
+    Returns:
+        callable: the transport that was replaced
+    """
+    global _transport
+
+    previous = _transport
+    _transport = transport or urlopen_transport
+
+    return previous
+
+
+def set_retries(retries: int) -> int:
+    """Set how many times requests are repeated after failing.
+
+    GET, PUT, and DELETE requests are repeated after network errors and
+    429/502/503/504 responses. POST requests are only repeated after a
+    429 or 503 response, or when the connection was refused, so a check
+    or contact that the server already created is not created twice.
+
+    Args:
+        retries (int): number of retries, 0 to never repeat a request
+
+    Returns:
+        int: the previous number of retries
+    """
+    global RETRIES
+
+    previous = RETRIES
+    RETRIES = max(0, int(retries))
+
+    return previous
+
+
+def _not_sent(err: OSError) -> bool:
+    """Whether a network error happened before the request reached the server."""
+    # urllib wraps socket errors in URLError.reason
+    reason = getattr(err, "reason", err)
+
+    return isinstance(err, ConnectionRefusedError) or isinstance(
+        reason, ConnectionRefusedError
+    )
+
+
+def _request(method: str, url: str, data_dict: dict) -> dict:
+    """Send a JSON request to the API and decode the JSON response.
+
+    HTTP errors are not raised, since the API explains them in the body.
+    Network errors are raised after the configured retries, see
+    `set_retries`.
+    """
+    info = RequestInfo(method, url)
+    retries = RETRIES
+    idempotent = method != "POST"
+    retry_status = _RETRY_STATUS if idempotent else _POST_RETRY_STATUS
+    started = perf_counter()
+    json_data = codec.dumps(strip_none_values(data_dict))
+    info.encode_time = perf_counter() - started
+    info.request_bytes = len(json_data)
+
+    for attempt in range(1, retries + 2):
+        info.attempt = attempt
+        info.error = None
+        info.status = None
+
+        if HOOKS["pre_request"]:
+            _run_hooks(HOOKS["pre_request"], info)
+
+        sent = perf_counter()
+
+        try:
+            status, json_bytes = _transport(method, url, json_data)
+        except OSError as err:
+            info.elapsed = perf_counter() - sent
+            info.error = err
+            if HOOKS["error"]:
+                _run_hooks(HOOKS["error"], info)
+            if attempt > retries or not (idempotent or _not_sent(err)):
+                raise
+            sleep(min(0.5 * 2 ** (attempt - 1), 8.0))
+            continue
+
+        info.elapsed = perf_counter() - sent
+        info.status = status
+        info.response_bytes = len(json_bytes)
+
+        if info.status in retry_status and attempt <= retries:
+            if HOOKS["post_response"]:
+                _run_hooks(HOOKS["post_response"], info)
+            sleep(min(0.5 * 2 ** (attempt - 1), 8.0))
+            continue
+
+        break
+
+    started = perf_counter()
+    result = codec.loads(json_bytes)
+    info.decode_time = perf_counter() - started
+
+    if HOOKS["post_response"]:
+        _run_hooks(HOOKS["post_response"], info)
+
+    return result
+
+
 def get(url: str, data_dict: dict[str, str | int | bool | None]) -> dict:
     """Queries the URL with a GET request with JSON body.
 
@@ -67,21 +321,7 @@ def get(url: str, data_dict: dict[str, str | int | bool | None]) -> dict:
         dict: Data that was returned from NodePing from GET request
     """
 
-    json_data = json.dumps(strip_none_values(data_dict)).encode("utf-8")
-
-    req = Request(url)
-    req.get_method = lambda: "GET"
-    req.add_header("Content-Type", "application/json; charset=utf-8")
-    req.add_header("Content-Length", str(len(json_data)))
-
-    try:
-        data = urlopen(req, json_data)
-    except httperror as err:
-        data = err
-
-    json_bytes = data.read()
-
-    return json.loads(json_bytes.decode("utf-8"))
+    return _request("GET", url, data_dict)
 
 
 def post(url: str, data_dict: dict[str, str | int | bool | None]) -> dict:
@@ -99,20 +339,7 @@ def post(url: str, data_dict: dict[str, str | int | bool | None]) -> dict:
         dict: Response from API
     """
 
-    json_data = json.dumps(strip_none_values(data_dict)).encode("utf-8")
-
-    req = Request(url)
-    req.add_header("Content-Type", "application/json; charset=utf-8")
-    req.add_header("Content-Length", str(len(json_data)))
-
-    try:
-        data = urlopen(req, json_data)
-    except httperror as err:
-        data = err
-
-    json_bytes = data.read()
-
-    return json.loads(json_bytes.decode("utf-8"))
+    return _request("POST", url, data_dict)
 
 
 def put(url: str, data_dict: dict[str, str | int | bool | None]) -> dict:
@@ -130,21 +357,7 @@ def put(url: str, data_dict: dict[str, str | int | bool | None]) -> dict:
         dict: Response from API
     """
 
-    json_data = json.dumps(strip_none_values(data_dict)).encode("utf-8")
-
-    req = Request(url)
-    req.get_method = lambda: "PUT"
-    req.add_header("Content-Type", "application/json; charset=utf-8")
-    req.add_header("Content-Length", str(len(json_data)))
-
-    try:
-        data = urlopen(req, json_data)
-    except httperror as err:
-        data = err
-
-    json_bytes = data.read()
-
-    return json.loads(json_bytes.decode("utf-8"))
+    return _request("PUT", url, data_dict)
 
 
 def delete(url: str, data_dict: dict[str, str | int | bool]) -> dict[str, Any]:
@@ -162,23 +375,23 @@ def delete(url: str, data_dict: dict[str, str | int | bool]) -> dict[str, Any]:
         dict: Response from API
     """
 
-    json_data = json.dumps(strip_none_values(data_dict)).encode("utf-8")
+    return _request("DELETE", url, data_dict)
 
-    req = Request(url)
-    req.get_method = lambda: "DELETE"
-    req.add_header("Content-Type", "application/json; charset=utf-8")
-    req.add_header("Content-Length", str(len(json_data)))
 
-    try:
-        data = urlopen(req, json_data)
-    except httperror as err:
-        data = err
+def strip_none_values(data: dict) -> dict:
+    """Remove any keys with a value of None."""
+    return {k: v for k, v in data.items() if bool(v) or isinstance(v, bool)}
 
-    json_bytes = data.read()
 
-    return json.loads(json_bytes.decode("utf-8"))
+_HASH_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), default=str)
 
 
-def strip_none_values(data: dict) -> dict:
-    """Remove any keys with a value of None."""
-    return {k: v for k, v in data.items() if bool(v) or isinstance(v, bool)}
+def record_hash(data: Any) -> str:
+    """Hash JSON serializable data, independent of dict key order.
+
+    The hash is stable across processes, so it can be stored and compared
+    later.
+    """
+    encoded = _HASH_ENCODER.encode(data).encode("utf-8")
+
+    return blake2b(encoded, digest_size=16).hexdigest()
@@ -14,6 +14,16 @@ from ._utils import API_URL
 
 ROUTE = "accounts"
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = (
+    "info",
+    "is_valid",
+    "create_subaccount",
+    "update_account",
+    "delete_subaccount",
+    "disable_notifications",
+)
+
 
 @dataclass
 class Account:
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""Record API responses and replay them without the network.
+
+A cassette replaces the transport in `_utils`, so every module goes
+through it. Requests are matched on a hash of the method, URL, and the
+JSON body with its keys sorted and the API token removed, so tokens are
+never written to the file and a recording can be replayed with any
+token. Identical responses are stored once, and repeated identical
+requests replay their responses in the order they were recorded.
+
+Modes:
+
+    "auto"    replay recorded requests, send and record anything new,
+              including repeats beyond the recorded count
+    "record"  send every request and record it, replacing older recordings
+    "replay"  only replay, raising CassetteMiss for unrecorded requests
+
+Example:
+
+    from nodepingpy import cassette, checks
+
+    with cassette.Cassette("fixtures/checks.json.gz"):
+        checks.get_all(token)
+"""
+
+import gzip
+import json
+import os
+import threading
+from hashlib import blake2b
+
+from . import _utils, codec
+
+
+FORMAT = "nodepingpy-cassette"
+VERSION = 1
+MODES = ("auto", "record", "replay")
+_SECRET_KEYS = ("token",)
+
+
+class CassetteMiss(LookupError):
+    """A request was made in replay mode that is not in the cassette."""
+
+
+def request_key(method: str, url: str, body: bytes) -> str:
+    """Hash identifying a request, ignoring key order and the API token."""
+    try:
+        data = json.loads(body) if body else {}
+    except ValueError:
+        data = body.decode("utf-8", "replace")
+
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in _SECRET_KEYS}
+
+    normalized = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    raw = "\n".join((method.upper(), url, normalized)).encode("utf-8")
+
+    return blake2b(raw, digest_size=16).hexdigest()
+
+
+class Cassette:
+    """Recorded API responses.
+
+    Args:
+        path (str): gzip compressed file the recordings are kept in
+        mode (str): "auto", "record", or "replay"
+
+    Attributes:
+        hits (int): requests answered from the cassette
+        recorded (int): requests sent and recorded
+    """
+
+    def __init__(self, path: str, mode: str = "auto"):
+        if mode not in MODES:
+            raise ValueError("Unknown cassette mode: {}".format(mode))
+
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.recorded = 0
+        self._bodies = []
+        self._body_index = {}
+        self._index = {}
+        self._cursors = {}
+        self._loaded = {}
+        self._changed = False
+        self._lock = threading.Lock()
+        self._previous = None
+
+        if mode != "record" and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._index.values())
+
+    def load(self) -> None:
+        """Read the recordings from `path`."""
+        with gzip.open(self.path, "rb") as fh:
+            data = codec.loads(fh.read())
+
+        if data.get("format") != FORMAT or data.get("version", 0) > VERSION:
+            raise ValueError("Not a supported nodepingpy cassette: {}".format(self.path))
+
+        self._bodies = [body.encode("utf-8") for body in data["bodies"]]
+        self._body_index = {body: i for i, body in enumerate(self._bodies)}
+        self._index = {
+            key: [tuple(entry) for entry in entries]
+            for key, entries in data["index"].items()
+        }
+
+    def save(self) -> None:
+        """Write the recordings to `path`."""
+        with self._lock:
+            data = {
+                "format": FORMAT,
+                "version": VERSION,
+                "bodies": [body.decode("utf-8") for body in self._bodies],
+                "index": self._index,
+            }
+            self._changed = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with gzip.open(self.path, "wb") as fh:
+            fh.write(codec.dumps(data))
+
+    def _replay(self, key: str) -> tuple[int, bytes] | None:
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                return None
+
+            position = self._cursors.get(key, 0)
+            if self.mode == "auto" and position >= self._loaded.get(key, 0):
+                # responses recorded in this session are not replayed
+                return None
+            # once every recorded response was used, the last one repeats
+            self._cursors[key] = position + 1
+            status, body = entries[min(position, len(entries) - 1)]
+            self.hits += 1
+
+        return status, self._bodies[body]
+
+    def _record(self, key: str, status: int, body: bytes) -> None:
+        with self._lock:
+            position = self._body_index.get(body)
+            if position is None:
+                position = len(self._bodies)
+                self._bodies.append(body)
+                self._body_index[body] = position
+
+            if self.mode == "record" and key not in self._cursors:
+                self._index[key] = []
+            self._index.setdefault(key, []).append((status, position))
+            self._cursors[key] = len(self._index[key])
+            self.recorded += 1
+            self._changed = True
+
+    def transport(self, method: str, url: str, body: bytes) -> tuple[int, bytes]:
+        """Answer a request from the cassette, or send and record it."""
+        key = request_key(method, url, body)
+
+        if self.mode != "record":
+            replayed = self._replay(key)
+            if replayed is not None:
+                return replayed
+            if self.mode == "replay":
+                raise CassetteMiss("{} {} is not in {}".format(method, url, self.path))
+
+        status, response = self._previous(method, url, body)
+        self._record(key, status, response)
+
+        return status, response
+
+    def start(self) -> "Cassette":
+        """Send all API requests through the cassette."""
+        self._cursors = {}
+        self._loaded = {key: len(entries) for key, entries in self._index.items()}
+        self._previous = _utils.set_transport(self.transport)
+
+        return self
+
+    def stop(self) -> None:
+        """Restore the previous transport and save any new recordings."""
+        if self._previous is not None:
+            _utils.set_transport(self._previous)
+            self._previous = None
+
+        if self._changed:
+            self.save()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def use_cassette(path: str, mode: str = "auto") -> Cassette:
+    """Cassette for use in a `with` block."""
+    return Cassette(path, mode)
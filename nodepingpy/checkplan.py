@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+
+"""Plan and apply the changes needed to make checks match a desired state.
+
+The desired checks are `checktypes` dataclasses, matched to existing
+checks from `checks.get_all` by a stable key such as the label or a tag.
+Each side is normalized to the fields that would be sent to the API, and
+fields are compared by fingerprint, hashing nested values such as
+`notifications`, in a single pass over the existing checks.
+
+Example:
+
+    from nodepingpy import checkplan, checks
+    from nodepingpy.nptypes import checktypes
+
+    desired = [
+        checktypes.PingCheck("example.com", label="ping example.com", interval=1),
+        checktypes.HttpCheck("https://example.com", label="http example.com"),
+    ]
+    plan = checkplan.plan(desired, checks.get_all(token), prune=True)
+    print(plan.summary())
+    checkplan.apply(token, plan)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
+from typing import Any, Callable
+
+from . import _utils
+from . import checks
+
+
+# Keys that are returned for existing checks but never sent when creating one
+_READ_ONLY = frozenset(
+    (
+        "_id",
+        "customer_id",
+        "created",
+        "modified",
+        "queue",
+        "uuid",
+        "state",
+        "firstdown",
+        "status",
+        "suspacct",
+        "change",
+        "uptime",
+        "enable",
+        "parameters",
+    )
+)
+
+
+@dataclass
+class CheckPlan:
+    """Changes needed to make the existing checks match the desired checks.
+
+    Args:
+        create (list): (key, dataclass) for checks that need to be created
+        update (list): (key, checkid, check type, changed fields) for checks to update
+        delete (list): (key, checkid) for checks that need to be deleted
+        unchanged (list): (key, checkid) for checks that already match
+    """
+
+    create: list = field(default_factory=list)
+    update: list = field(default_factory=list)
+    delete: list = field(default_factory=list)
+    unchanged: list = field(default_factory=list)
+
+    def summary(self) -> dict[str, int]:
+        """Number of checks in each part of the plan."""
+        return {
+            "create": len(self.create),
+            "update": len(self.update),
+            "delete": len(self.delete),
+            "unchanged": len(self.unchanged),
+        }
+
+    def is_empty(self) -> bool:
+        """Whether there is nothing to change."""
+        return not (self.create or self.update or self.delete)
+
+
+def _normalize_value(value: Any) -> Any:
+    """Normalize values that the API may return in a different shape."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: _normalize_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+
+    return value
+
+
+def _fingerprint(value: Any) -> Any:
+    """Comparable fingerprint of a field value.
+
+    Scalars are their own fingerprint, containers are hashed.
+    """
+    if value is None or value.__class__ in (str, int, bool, float):
+        return value
+
+    return ("hash", _utils.record_hash(_normalize_value(value)))
+
+
+def _class_info(cls) -> tuple[tuple[str, ...], dict[str, Any]]:
+    """Field names and default fingerprints for a checktypes dataclass."""
+    info = _class_cache.get(cls)
+
+    if info is None:
+        names = []
+        defaults = {}
+
+        for item in fields(cls):
+            names.append(item.name)
+            if item.default is not MISSING:
+                defaults[item.name] = _fingerprint(item.default)
+            elif item.default_factory is not MISSING:
+                defaults[item.name] = _fingerprint(item.default_factory())
+
+        info = (tuple(names), defaults)
+        _class_cache[cls] = info
+
+    return info
+
+
+_class_cache = {}
+
+
+def normalize_existing(check: dict) -> dict:
+    """Flatten an existing check from `checks.get_all` into the creation layout.
+
+    The `parameters` are merged into the top level and `enable` is
+    converted into the `enabled` bool used when creating checks.
+
+    Args:
+        check (dict): a check from `checks.get_all`
+
+    Returns:
+        dict: the check in the same layout as a `checktypes` dataclass
+    """
+    flat = {k: v for k, v in check.items() if k not in _READ_ONLY}
+    flat.update(check.get("parameters") or {})
+
+    if "enable" in check:
+        flat["enabled"] = check["enable"] == "active"
+
+    if isinstance(flat.get("runlocations"), str):
+        flat["runlocations"] = [flat["runlocations"]]
+
+    return flat
+
+
+def normalize_desired(check: Any) -> dict:
+    """Convert a `checktypes` dataclass into the fields that would be sent.
+
+    Args:
+        check: a dataclass such as PingCheck, HttpCheck, etc.
+
+    Returns:
+        dict: the fields sent when creating the check
+    """
+    if is_dataclass(check):
+        from .nptypes import checktypes
+
+        data = checktypes.to_api(check)
+    else:
+        data = _utils.strip_none_values(dict(check))
+
+    if isinstance(data.get("runlocations"), str):
+        data["runlocations"] = [data["runlocations"]]
+
+    return data
+
+
+def by_label(check: dict) -> str | None:
+    """Key checks by their label."""
+    return check.get("label") or None
+
+
+def by_tag(prefix: str) -> Callable[[dict], str | None]:
+    """Key checks by the first tag starting with `prefix`.
+
+    For example, with the prefix "id:" a check tagged "id:web-1" gets the
+    key "web-1". Checks without a matching tag are not managed.
+    """
+
+    def key(check: dict) -> str | None:
+        for tag in check.get("tags") or ():
+            if isinstance(tag, str) and tag.startswith(prefix):
+                return tag[len(prefix) :]
+        return None
+
+    return key
+
+
+def plan(
+    desired: list | dict,
+    current: dict[str, dict],
+    key: Callable[[dict], str | None] = by_label,
+    prune: bool = False,
+    compare_defaults: bool = False,
+) -> CheckPlan:
+    """Compute the minimal changes to go from the current to the desired checks.
+
+    Only the fields set in the desired dataclass are compared. Fields that
+    are left empty or at their dataclass default, such as `enabled=False`,
+    keep their current value, unless `compare_defaults` is set. Every key
+    of a desired check given as a dict is compared. A check whose type has
+    changed is deleted and created again, since the type cannot be updated.
+
+    Args:
+        desired (list|dict): checktypes dataclasses, or a dict of key to dataclass
+        current (dict): existing checks from `checks.get_all`
+        key (callable): gets the stable key from a normalized check,
+            such as `by_label` or `by_tag("id:")`
+        prune (bool): delete existing checks with a key that is not desired
+        compare_defaults (bool): also update fields of existing checks to
+            the dataclass defaults, such as to disable checks
+
+    Returns:
+        CheckPlan: creates, updates, and deletes
+    """
+    if isinstance(desired, dict):
+        items = desired.items()
+    else:
+        items = ((None, check) for check in desired)
+
+    wanted = {}
+
+    for checkkey, check in items:
+        normalized = normalize_desired(check)
+        if checkkey is None:
+            checkkey = key(normalized)
+        if checkkey is not None:
+            defaults = _class_info(check.__class__)[1] if is_dataclass(check) else {}
+            fingerprints = {k: _fingerprint(v) for k, v in normalized.items()}
+            if not compare_defaults:
+                # the type is compared on its own below
+                fingerprints = {
+                    k: fingerprint
+                    for k, fingerprint in fingerprints.items()
+                    if k == "type" or defaults.get(k, MISSING) != fingerprint
+                }
+            wanted[checkkey] = (check, normalized, fingerprints, defaults)
+
+    result = CheckPlan()
+    matched = {}
+
+    for checkid, check in current.items():
+        if not isinstance(check, dict):
+            continue
+
+        existing = normalize_existing(check)
+        checkkey = key(existing)
+
+        if checkkey is None:
+            continue
+        if checkkey not in wanted or checkkey in matched:
+            if prune:
+                result.delete.append((checkkey, checkid))
+            continue
+
+        matched[checkkey] = checkid
+        dataclass_check, normalized, fingerprints, defaults = wanted[checkkey]
+
+        if existing.get("type") != normalized.get("type"):
+            result.delete.append((checkkey, checkid))
+            result.create.append((checkkey, dataclass_check))
+            continue
+
+        changed = {}
+
+        for k, fingerprint in fingerprints.items():
+            if k in existing:
+                if _fingerprint(existing[k]) != fingerprint:
+                    changed[k] = normalized[k]
+            # fields the API leaves out match when they are at their default
+            elif defaults.get(k, MISSING) != fingerprint:
+                changed[k] = normalized[k]
+
+        if changed:
+            result.update.append((checkkey, checkid, normalized["type"], changed))
+        else:
+            result.unchanged.append((checkkey, checkid))
+
+    for checkkey, (dataclass_check, *_) in wanted.items():
+        if checkkey not in matched:
+            result.create.append((checkkey, dataclass_check))
+
+    return result
+
+
+def apply(
+    token: str, checkplan: CheckPlan, workers: int = 8, customerid: str | None = None
+) -> dict[str, dict]:
+    """Apply a plan with concurrent API calls.
+
+    Checks being recreated with a new type are deleted first, so the old
+    and new check never exist at the same time. Creates and updates run
+    next, followed by the remaining deletes.
+
+    Args:
+        token (str): NodePing API token
+        checkplan (CheckPlan): result of `plan`
+        workers (int): number of API calls made at the same time
+        customerid (str): subaccount ID
+
+    Returns:
+        dict: "create" and "update" map keys to API responses, "delete"
+            maps check IDs to API responses
+    """
+
+    def run(call, *args):
+        try:
+            return call(token, *args, customerid=customerid)
+        except (OSError, ValueError) as err:
+            return {"error": str(err)}
+
+    results = {"create": {}, "update": {}, "delete": {}}
+    recreated = {checkkey for checkkey, _ in checkplan.create}
+    replaced = [
+        checkid for checkkey, checkid in checkplan.delete if checkkey in recreated
+    ]
+    pruned = [
+        checkid for checkkey, checkid in checkplan.delete if checkkey not in recreated
+    ]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        deletes = {
+            checkid: pool.submit(run, checks.delete_check, checkid)
+            for checkid in replaced
+        }
+        results["delete"] = {k: future.result() for k, future in deletes.items()}
+
+        creates = {
+            checkkey: pool.submit(run, checks.create_check, check)
+            for checkkey, check in checkplan.create
+        }
+        updates = {
+            checkkey: pool.submit(
+                run, checks.update_check, checkid, checktype, dict(changed)
+            )
+            for checkkey, checkid, checktype, changed in checkplan.update
+        }
+        results["create"] = {k: future.result() for k, future in creates.items()}
+        results["update"] = {k: future.result() for k, future in updates.items()}
+
+        deletes = {
+            checkid: pool.submit(run, checks.delete_check, checkid)
+            for checkid in pruned
+        }
+        results["delete"].update({k: future.result() for k, future in deletes.items()})
+
+    return results
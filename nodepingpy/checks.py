@@ -6,42 +6,84 @@ Allows you go get all checks, get passing, failing, by its ID,
 disabled checks, and last results for a check.
 """
 
-from dataclasses import asdict
+from __future__ import annotations
 
-from .nptypes import checktypes
-from . import _utils
+import sys
+from typing import TYPE_CHECKING
+
+from . import _utils, records
 from ._utils import API_URL
 
+if TYPE_CHECKING:
+    # the check dataclasses are only loaded when a check is created
+    from .nptypes import checktypes
+
 
 ROUTE = "checks"
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = (
+    "get_all",
+    "get_all_uptime",
+    "get_many",
+    "get_passing",
+    "get_failing",
+    "get_uptime",
+    "get_by_id",
+    "get_active",
+    "get_inactive",
+    "get_last_result",
+    "create_check",
+    "update_check",
+    "delete_check",
+    "mute_check",
+    "disable_by",
+    "disable_all",
+)
+
+
+def __getattr__(name: str):
+    # checks.checktypes is still available, but only loaded when used
+    if name == "checktypes":
+        __import__("{}.nptypes.checktypes".format(__package__))
+        return sys.modules["{}.nptypes.checktypes".format(__package__)]
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
 
 def get_all(
-    token: str, customerid: str | None = None
+    token: str, customerid: str | None = None, typed: bool = False
 ) -> dict[str, checktypes.GetCheck]:
     """Get all checks that exist for the account or subaccount.
 
     Args:
         token (str): NodePing API token
         customerid (str): subaccount ID
+        typed (bool): return `records.CheckRecord` objects instead of dicts
 
     Returns:
         dict: All checks on NodePing account or subaccount.
     """
     url = "{}/{}".format(API_URL, ROUTE)
     data = _utils.add_custid({"token": token}, customerid)
+    result = _utils.get(url, data)
 
-    return _utils.get(url, data)
+    return records.decode_all(result, records.CheckRecord) if typed else result
 
 
 def get_all_uptime(
-    token: str, customerid: str | None = None
+    token: str,
+    customerid: str | None = None,
+    lastresult: bool = False,
+    typed: bool = False,
 ) -> dict[str, checktypes.GetCheckUptime]:
     """Get the uptime for all checks on the account or subaccount.
 
     Args:
         token (str): NodePing API token
         customerid (str): subaccount ID
+        lastresult (bool): also include each check's `lastresult`
+        typed (bool): return `records.CheckUptimeRecord` objects instead of dicts
 
     Returns:
         dict: All checks on NodePing account or subaccount.
@@ -49,7 +91,12 @@ def get_all_uptime(
     url = "{}/{}".format(API_URL, ROUTE)
     data = _utils.add_custid({"token": token, "uptime": True}, customerid)
 
-    return _utils.get(url, data)
+    if lastresult:
+        data["lastresult"] = True
+
+    result = _utils.get(url, data)
+
+    return records.decode_all(result, records.CheckUptimeRecord) if typed else result
 
 
 def get_many(
@@ -57,6 +104,7 @@ def get_many(
     checkids: list[str],
     customerid: str | None = None,
     current: str | None = None,
+    typed: bool = False,
 ) -> dict[str, checktypes.GetCheck]:
     """Get information for all specified checks.
 
@@ -65,6 +113,7 @@ def get_many(
         checkids (list): List of NodePing check IDs
         customerid (str): subaccount ID
         current (bool): checks current events
+        typed (bool): return `records.CheckRecord` objects instead of dicts
 
     Additional information about `current` argument:
     https://nodeping.com/docs-api-checks.html
@@ -80,7 +129,9 @@ def get_many(
     if current:
         data["current"] = current
 
-    return _utils.get(url, data)
+    result = _utils.get(url, data)
+
+    return records.decode_all(result, records.CheckRecord) if typed else result
 
 
 def get_passing(
@@ -148,7 +199,7 @@ def get_uptime(
 
 
 def get_by_id(
-    token: str, checkid: str, customerid: str | None = None
+    token: str, checkid: str, customerid: str | None = None, typed: bool = False
 ) -> checktypes.GetCheck:
     """Get a single NodePing check by ID.
 
@@ -156,14 +207,16 @@ def get_by_id(
         token (str): NodePing API token
         checkid (str): Check ID
         customerid (str): subaccount ID
+        typed (bool): return a `records.CheckRecord` instead of a dict
 
     Returns:
         dict: Contents of a single check by check ID
     """
     url = "{}/{}/{}".format(API_URL, ROUTE, checkid)
     data = _utils.add_custid({"token": token}, customerid)
+    result = _utils.get(url, data)
 
-    return _utils.get(url, data)
+    return records.decode(result, records.CheckRecord) if typed else result
 
 
 def get_active(
@@ -203,7 +256,7 @@ def get_inactive(
 
 
 def get_last_result(
-    token: str, checkid: str, customerid: str | None = None
+    token: str, checkid: str, customerid: str | None = None, typed: bool = False
 ) -> checktypes.GetCheckUptime:
     """Get the last result for the specified check.
 
@@ -211,6 +264,7 @@ def get_last_result(
         token (str): NodePing API token
         checkid (str): Check ID
         customerid (str): subaccount ID
+        typed (bool): return a `records.CheckUptimeRecord` instead of a dict
 
     Returns:
         dict: check information with lastresult in the response
@@ -218,8 +272,9 @@ def get_last_result(
     querystring = _utils.generate_querystring({"uptime": "true"})
     url = "{}/{}/{}?{}".format(API_URL, ROUTE, checkid, querystring)
     data = _utils.add_custid({"token": token}, customerid)
+    result = _utils.get(url, data)
 
-    return _utils.get(url, data)
+    return records.decode(result, records.CheckUptimeRecord) if typed else result
 
 
 def create_check(
@@ -229,14 +284,17 @@ def create_check(
 
     Args:
         token (str): NodePing API token
-        args: a dataclass such as AgentCheck, HttpCheck, PingCheck, etc.
+        args: a dataclass such as AgentCheck, HttpCheck, PingCheck, etc.,
+            or a dict with the same fields
         customerid (str): subaccount ID
 
     Returns:
         dict: Contents of successfully created check or error message
     """
+    from .nptypes import checktypes
+
     url = "{}/{}".format(API_URL, ROUTE)
-    data = asdict(args)
+    data = dict(args) if isinstance(args, dict) else checktypes.to_api(args)
     data.update({"token": token, "customerid": customerid})
 
     return _utils.post(url, data)
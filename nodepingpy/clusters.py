@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+"""Evaluate cluster check states locally from their member checks.
+
+A cluster passes while at least `threshold` of the member checks in its
+`data` are passing, or all of them when no threshold is set. Clusters
+can be members of other clusters. All clusters are evaluated in one
+pass, and `update` applies a single member change using a reverse index
+from members to the clusters they belong to.
+
+Example:
+
+    from nodepingpy import checks, clusters, results
+
+    allchecks = checks.get_all(token)
+    evaluator = clusters.ClusterEvaluator(allchecks)
+    evaluator.load(clusters.states_from_current(results.get_current(token), allchecks))
+    evaluator.update("201205050153W2Q4C-0J2HSIRF", False)
+    # {'201205050153W2Q4C-IOPPFQOT': False}
+"""
+
+from collections import deque
+
+
+def _field(check: dict, name: str):
+    value = check.get(name)
+
+    if value is None:
+        value = (check.get("parameters") or {}).get(name)
+
+    return value
+
+
+def _threshold(value, members: int) -> int:
+    try:
+        threshold = int(value)
+    except (TypeError, ValueError):
+        return members
+
+    if threshold <= 0:
+        return members
+
+    return min(threshold, members)
+
+
+def states_from_checks(checks: dict[str, dict]) -> dict[str, bool]:
+    """Passing state of every check from `checks.get_all`, using `state`."""
+    return {
+        checkid: check.get("state") == 1
+        for checkid, check in checks.items()
+        if isinstance(check, dict) and "state" in check
+    }
+
+
+def states_from_current(current: dict, checkids) -> dict[str, bool]:
+    """Passing state of checks from `results.get_current`.
+
+    Current events only list the checks that are down, so every other
+    check in `checkids` is passing.
+
+    Args:
+        current (dict): output of `results.get_current`
+        checkids (iterable): IDs of every check, such as `checks.get_all` output
+
+    Returns:
+        dict: check ID mapped to True when passing
+    """
+    return {checkid: checkid not in current for checkid in checkids}
+
+
+class ClusterEvaluator:
+    """Cluster states computed from member states.
+
+    Args:
+        checks (dict): output of `checks.get_all`, or a dict of cluster ID
+            to a dict with `data` and optional `threshold`
+        default (bool): state of members without a known state
+
+    Attributes:
+        members (dict): cluster ID mapped to a tuple of member check IDs
+        thresholds (dict): cluster ID mapped to the passing members it needs
+        states (dict): check ID mapped to its passing state, clusters included
+    """
+
+    def __init__(self, checks: dict[str, dict], default: bool = True):
+        self.default = default
+        self.members = {}
+        self.thresholds = {}
+        self.states = {}
+        self._parents = {}
+        self._passing = {}
+
+        for checkid, check in checks.items():
+            if not isinstance(check, dict):
+                continue
+            data = _field(check, "data")
+            if check.get("type", "CLUSTER") != "CLUSTER" or not isinstance(data, dict):
+                continue
+
+            members = tuple(data)
+            self.members[checkid] = members
+            self.thresholds[checkid] = _threshold(_field(check, "threshold"), len(members))
+            for member in members:
+                self._parents.setdefault(member, []).append(checkid)
+
+        self._order = self._evaluation_order()
+        self.load({})
+
+    def _evaluation_order(self) -> list[str]:
+        """Clusters ordered so nested clusters come before their parents."""
+        order = []
+        seen = set()
+
+        for root in self.members:
+            if root in seen:
+                continue
+            seen.add(root)
+            stack = [(root, iter(self.members[root]))]
+
+            while stack:
+                cluster, members = stack[-1]
+                for member in members:
+                    if member in self.members and member not in seen:
+                        seen.add(member)
+                        stack.append((member, iter(self.members[member])))
+                        break
+                else:
+                    stack.pop()
+                    order.append(cluster)
+
+        return order
+
+    def load(self, states: dict[str, bool]) -> dict[str, bool]:
+        """Set every member state and evaluate all clusters in one pass.
+
+        Args:
+            states (dict): check ID mapped to True when passing, such as
+                from `states_from_checks` or `states_from_current`
+
+        Returns:
+            dict: cluster ID mapped to True when passing
+        """
+        self.states = {k: bool(v) for k, v in states.items() if k not in self.members}
+        get = self.states.get
+        default = self.default
+        result = {}
+
+        for cluster in self._order:
+            passing = 0
+            for member in self.members[cluster]:
+                if get(member, default):
+                    passing += 1
+            self._passing[cluster] = passing
+            state = passing >= self.thresholds[cluster]
+            self.states[cluster] = state
+            result[cluster] = state
+
+        return result
+
+    def state(self, checkid: str) -> bool:
+        """Current passing state of a cluster or member check."""
+        return self.states.get(checkid, self.default)
+
+    def clusters(self) -> dict[str, bool]:
+        """Passing state of every cluster."""
+        return {cluster: self.states[cluster] for cluster in self._order}
+
+    def update(self, checkid: str, passing: bool) -> dict[str, bool]:
+        """Change the state of one member check.
+
+        Only the clusters containing the check are re-evaluated, and any
+        change is carried on to clusters that contain those clusters.
+
+        Args:
+            checkid (str): ID of the member check
+            passing (bool): its new state
+
+        Returns:
+            dict: cluster ID mapped to its new state, for clusters that changed
+        """
+        if checkid in self.members:
+            raise ValueError("Cluster states are computed: {}".format(checkid))
+
+        passing = bool(passing)
+        if self.states.get(checkid, self.default) == passing:
+            self.states[checkid] = passing
+            return {}
+
+        self.states[checkid] = passing
+        changed = {}
+        queue = deque([(checkid, passing)])
+
+        while queue:
+            member, state = queue.popleft()
+            for cluster in self._parents.get(member, ()):
+                count = self._passing[cluster] + (1 if state else -1)
+                self._passing[cluster] = count
+                new = count >= self.thresholds[cluster]
+                if new != self.states[cluster]:
+                    self.states[cluster] = new
+                    # clusters in a loop are only carried on once per update
+                    if cluster not in changed:
+                        queue.append((cluster, new))
+                    changed[cluster] = new
+
+        return changed
+
+    def update_many(self, states: dict[str, bool]) -> dict[str, bool]:
+        """Apply several member changes.
+
+        Returns:
+            dict: cluster ID mapped to its new state, for clusters that
+                ended up in a different state than before
+        """
+        before = {}
+
+        for checkid, passing in states.items():
+            for cluster, state in self.update(checkid, passing).items():
+                before.setdefault(cluster, not state)
+
+        return {
+            cluster: self.states[cluster]
+            for cluster, state in before.items()
+            if self.states[cluster] != state
+        }
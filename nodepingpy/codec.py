@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+"""JSON encoding and decoding for API requests.
+
+The fastest installed backend is used: orjson, msgspec, or ujson, and
+the standard library `json` module otherwise. Every backend encodes to
+bytes and decodes directly from bytes, so response bodies are never
+copied into an intermediate string. Decoding errors are always raised
+as ValueError.
+
+Decoding a large body allocates millions of objects, which sets off
+repeated full garbage collections that can take longer than the parsing
+itself. JSON cannot contain reference cycles, so setting GC_PAUSE_BYTES
+pauses the cyclic garbage collector while bodies at least that large
+are decoded. It is off by default, since the collector is shared by the
+whole process: pauses from several threads are counted, and collection
+resumes once the last one ends, unless it was already disabled.
+
+The backend is imported the first time JSON is encoded or decoded. It
+can be forced with the `NODEPING_JSON` environment variable, read at
+that point, or changed at runtime with `use`.
+
+Example:
+
+    from nodepingpy import codec
+
+    codec.name()            # "orjson"
+    codec.use("json")
+    codec.loads(codec.dumps({"label": "example"}))
+"""
+
+import gc
+import json
+import threading
+from contextlib import contextmanager
+from os import environ
+from typing import Any, Callable, NamedTuple
+
+
+# Backends in order of preference
+PREFERENCE = ("orjson", "msgspec", "ujson", "json")
+
+# Bodies at least this large are decoded with garbage collection paused,
+# such as 1024 * 1024. None never pauses it.
+GC_PAUSE_BYTES = None
+
+
+class Codec(NamedTuple):
+    """A JSON backend.
+
+    Attributes:
+        name (str): name of the backend
+        dumps (callable): encodes a value to JSON bytes
+        loads (callable): decodes JSON bytes or str, raising ValueError
+    """
+
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes | str], Any]
+
+
+def _stdlib() -> Codec:
+    encoder = json.JSONEncoder(separators=(",", ":"))
+
+    def dumps(obj: Any) -> bytes:
+        return encoder.encode(obj).encode("utf-8")
+
+    # json.loads detects the encoding of bytes itself
+    return Codec("json", dumps, json.loads)
+
+
+def _orjson() -> Codec:
+    import orjson
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=option)
+
+    return Codec("orjson", dumps, orjson.loads)
+
+
+def _msgspec() -> Codec:
+    import msgspec
+
+    encode = msgspec.json.Encoder().encode
+    decode = msgspec.json.Decoder().decode
+
+    def loads(data: bytes | str) -> Any:
+        try:
+            return decode(data)
+        except msgspec.DecodeError as err:
+            raise ValueError(str(err)) from err
+
+    return Codec("msgspec", encode, loads)
+
+
+def _ujson() -> Codec:
+    import ujson
+
+    def dumps(obj: Any) -> bytes:
+        return ujson.dumps(obj, escape_forward_slashes=False).encode("utf-8")
+
+    return Codec("ujson", dumps, ujson.loads)
+
+
+_FACTORIES = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "ujson": _ujson,
+    "json": _stdlib,
+}
+
+
+def available() -> list[str]:
+    """Names of the installed backends, fastest first."""
+    names = []
+
+    for backend in PREFERENCE:
+        try:
+            _FACTORIES[backend]()
+        except ImportError:
+            continue
+        names.append(backend)
+
+    return names
+
+
+def get(backend: str) -> Codec:
+    """Codec for a backend.
+
+    Raises:
+        ValueError: the backend is unknown
+        ImportError: the backend is not installed
+    """
+    if backend not in _FACTORIES:
+        raise ValueError("Unknown JSON backend: {}".format(backend))
+
+    return _FACTORIES[backend]()
+
+
+def _select(backend: str | None) -> Codec:
+    if backend:
+        return get(backend)
+
+    for name in PREFERENCE:
+        try:
+            return _FACTORIES[name]()
+        except ImportError:
+            continue
+
+    return _stdlib()
+
+
+_codec = None
+
+
+def _current() -> Codec:
+    global _codec
+
+    if _codec is None:
+        _codec = _select(environ.get("NODEPING_JSON"))
+
+    return _codec
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a value to JSON bytes."""
+    return (_codec or _current()).dumps(obj)
+
+
+_pause_lock = threading.Lock()
+_pauses = 0
+_resume = False
+
+
+@contextmanager
+def gc_paused():
+    """Pause the cyclic garbage collector while building large acyclic data.
+
+    Pauses overlapping in several threads are counted, and collection is
+    enabled again when the last one ends, only if it was enabled when the
+    first one started.
+    """
+    global _pauses, _resume
+
+    with _pause_lock:
+        if _pauses == 0:
+            _resume = gc.isenabled()
+            gc.disable()
+        _pauses += 1
+
+    try:
+        yield
+    finally:
+        with _pause_lock:
+            _pauses -= 1
+            if _pauses == 0 and _resume:
+                gc.enable()
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode JSON bytes or str.
+
+    Raises:
+        ValueError: the data is not valid JSON
+    """
+    codec = _codec or _current()
+
+    if GC_PAUSE_BYTES is None or len(data) < GC_PAUSE_BYTES:
+        return codec.loads(data)
+
+    with gc_paused():
+        return codec.loads(data)
+
+
+def use(backend: str | None = None) -> Codec:
+    """Switch the JSON backend used by the library.
+
+    Args:
+        backend (str): "orjson", "msgspec", "ujson", or "json". None picks
+            the fastest installed backend.
+
+    Returns:
+        Codec: the backend that was replaced
+    """
+    global _codec
+
+    previous = _current()
+    _codec = _select(backend)
+
+    return previous
+
+
+def name() -> str:
+    """Name of the backend in use."""
+    return _current().name
@@ -4,15 +4,28 @@
 
 
 from .nptypes import contacttypes
-from . import _utils
+from . import _utils, records
 from ._utils import API_URL
 
 
 ROUTE = "contacts"
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = (
+    "get_all",
+    "get_one",
+    "get_by_type",
+    "create",
+    "update",
+    "mute_contact",
+    "mute_contact_method",
+    "delete_contact",
+    "reset_password",
+)
+
 
 def get_all(
-    token: str, customerid: str | None = None
+    token: str, customerid: str | None = None, typed: bool = False
 ) -> dict[str, contacttypes.ManyContacts]:
     """Get all contacts on the account or subaccount.
 
@@ -21,18 +34,20 @@ def get_all(
     Args:
         token (str): NodePing API token
         customerid (str | None): subaccount ID
+        typed (bool): return `records.ContactRecord` objects instead of dicts
 
     Returns:
         dict: All contacts on NodePing account or subaccount.
     """
     data = _utils.add_custid({"token": token}, customerid)
+    result = _utils.get("{}/{}".format(API_URL, ROUTE), data)
 
-    return _utils.get("{}/{}".format(API_URL, ROUTE), data)
+    return records.decode_all(result, records.ContactRecord) if typed else result
 
 
 def get_one(
-    token: str, contactid: str, customerid: str | None = None
-) -> dict[str, contacttypes.Contact]:
+    token: str, contactid: str, customerid: str | None = None, typed: bool = False
+) -> contacttypes.Contact:
     """Get one contact on the account or subaccount.
 
     https://nodeping.com/docs-api-contacts.html#get
@@ -41,16 +56,18 @@ def get_one(
         token (str): NodePing API token
         contactid (str): The `_id` for the contact
         customerid (str | None): subaccount ID
+        typed (bool): return a `records.ContactRecord` instead of a dict
 
     Returns:
-        dict: All contacts on NodePing account or subaccount.
+        dict: Contents of the contact
     """
     url = "{}/{}?{}".format(
         API_URL, ROUTE, _utils.generate_querystring({"id": contactid})
     )
     data = _utils.add_custid({"token": token}, customerid)
+    result = _utils.get(url, data)
 
-    return _utils.get(url, data)
+    return records.decode(result, records.ContactRecord) if typed else result
 
 
 def get_by_type(
@@ -85,7 +102,7 @@ def get_by_type(
 
 def create(
     token: str,
-    customerid: str,
+    customerid: str | None,
     custrole: str,
     name: str = "",
     newaddresses: list | None = None,
@@ -112,8 +129,7 @@ def create(
 
     Args:
         token (str): NodePing API token
-        customerid (str): subaccount ID
-        contacttype (str): sms, email, webhook, etc.
+        customerid (str | None): subaccount ID, None for the parent account
         name (str): The name of your contact
         custrole (str): permissions for this contact. Default: view
         newaddresses (str): list of dictionaries containing address info
@@ -129,7 +145,12 @@ def create(
         "customerid": customerid,
     }
 
-    return _utils.post("{}/{}/{}".format(API_URL, ROUTE, customerid), data)
+    if customerid:
+        url = "{}/{}/{}".format(API_URL, ROUTE, customerid)
+    else:
+        url = "{}/{}".format(API_URL, ROUTE)
+
+    return _utils.post(url, data)
 
 
 def update(token: str, cid: str, args: dict, customerid: str | None = None) -> dict:
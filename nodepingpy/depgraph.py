@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+"""Analyze the dependencies between checks.
+
+A check with a `dep` is suppressed while the check it depends on is
+failing, and a cluster check is affected by its member checks in `data`.
+Both are edges from the upstream check to the downstream check it
+impacts. The graph is stored as adjacency arrays in both directions,
+so queries touch only the checks they return.
+
+Example:
+
+    from nodepingpy import checks, depgraph
+
+    graph = depgraph.build(checks.get_all(token))
+    graph.impact("201205050153W2Q4C-0J2HSIRF")  # checks suppressed by the router
+    graph.root_causes(failing_checkids)
+    graph.cycles()
+"""
+
+from array import array
+from collections import deque
+from typing import Iterable
+
+
+def _field(check: dict, name: str):
+    value = check.get(name)
+
+    if value is None:
+        value = (check.get("parameters") or {}).get(name)
+
+    return value
+
+
+def _upstream_ids(check: dict) -> list[str]:
+    """IDs of the checks a check from `checks.get_all` is impacted by."""
+    upstream = []
+    dep = _field(check, "dep")
+
+    if isinstance(dep, str) and dep:
+        upstream.append(dep)
+
+    if check.get("type") == "CLUSTER":
+        members = _field(check, "data")
+        if isinstance(members, dict):
+            upstream.extend(members)
+
+    return upstream
+
+
+def _csr(count: int, edges: list[tuple[int, int]]) -> tuple[array, array]:
+    """Offsets and targets for the adjacency lists of `count` nodes."""
+    offsets = array("i", bytes(4 * (count + 1)))
+
+    for source, _ in edges:
+        offsets[source + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    targets = array("i", bytes(4 * len(edges)))
+    position = offsets[:-1]
+
+    for source, target in edges:
+        targets[position[source]] = target
+        position[source] += 1
+
+    return offsets, targets
+
+
+class DependencyGraph:
+    """Dependencies between checks.
+
+    Args:
+        checks (dict): output of `checks.get_all`
+
+    Attributes:
+        ids (list): check IDs, in the order of the adjacency arrays
+        missing (dict): check ID mapped to the IDs it references that are
+            not in `checks`, which are left out of the graph
+    """
+
+    def __init__(self, checks: dict[str, dict]):
+        self.ids = [k for k, v in checks.items() if isinstance(v, dict)]
+        self.index = {checkid: i for i, checkid in enumerate(self.ids)}
+        self.missing = {}
+        edges = []
+
+        for i, checkid in enumerate(self.ids):
+            for upstream in _upstream_ids(checks[checkid]):
+                source = self.index.get(upstream)
+                if source is None:
+                    self.missing.setdefault(checkid, []).append(upstream)
+                else:
+                    edges.append((source, i))
+
+        count = len(self.ids)
+        self._down_offsets, self._down = _csr(count, edges)
+        self._up_offsets, self._up = _csr(count, [(t, s) for s, t in edges])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, checkid) -> bool:
+        return checkid in self.index
+
+    def _indexes(self, checkids: str | Iterable[str]) -> list[int]:
+        if isinstance(checkids, str):
+            checkids = (checkids,)
+
+        index = self.index
+        return [index[c] for c in checkids if c in index]
+
+    def _neighbors(self, offsets: array, targets: array, checkid: str) -> list[str]:
+        i = self.index.get(checkid)
+
+        if i is None:
+            return []
+
+        ids = self.ids
+        return [ids[j] for j in targets[offsets[i] : offsets[i + 1]]]
+
+    def _reach(self, offsets: array, targets: array, starts: list[int]) -> list[int]:
+        """Nodes reachable over at least one edge from `starts`, breadth first."""
+        seen = bytearray(len(self.ids))
+        queue = deque(starts)
+        reached = []
+
+        while queue:
+            i = queue.popleft()
+            for j in targets[offsets[i] : offsets[i + 1]]:
+                if not seen[j]:
+                    seen[j] = 1
+                    reached.append(j)
+                    queue.append(j)
+
+        return reached
+
+    def downstream(self, checkid: str) -> list[str]:
+        """Checks that directly depend on a check."""
+        return self._neighbors(self._down_offsets, self._down, checkid)
+
+    def upstream(self, checkid: str) -> list[str]:
+        """Checks that a check directly depends on."""
+        return self._neighbors(self._up_offsets, self._up, checkid)
+
+    def impact(self, checkids: str | Iterable[str]) -> list[str]:
+        """Every check transitively impacted if the given checks fail.
+
+        Args:
+            checkids (str|list): a check ID or several
+
+        Returns:
+            list: impacted check IDs, nearest first
+        """
+        reached = self._reach(self._down_offsets, self._down, self._indexes(checkids))
+        ids = self.ids
+
+        return [ids[j] for j in reached]
+
+    def ancestors(self, checkids: str | Iterable[str]) -> list[str]:
+        """Every check the given checks transitively depend on, nearest first."""
+        reached = self._reach(self._up_offsets, self._up, self._indexes(checkids))
+        ids = self.ids
+
+        return [ids[j] for j in reached]
+
+    def root_causes(self, failing: Iterable[str]) -> list[str]:
+        """Failing checks that are not explained by another failing check.
+
+        A failing check is explained when a failing check is upstream of
+        it. Checks in a cycle that are all failing explain each other,
+        so none of them is a candidate.
+
+        Args:
+            failing (list): IDs of the checks that are currently failing
+
+        Returns:
+            list: candidate root causes, in the order given
+        """
+        failing = list(failing)
+        starts = self._indexes(failing)
+        explained = set(self._reach(self._down_offsets, self._down, starts))
+        index = self.index
+
+        return [c for c in failing if c in index and index[c] not in explained]
+
+    def cycles(self) -> list[list[str]]:
+        """Groups of checks that depend on each other in a loop.
+
+        Returns:
+            list: each cycle as a list of check IDs, including checks that
+                depend on themselves
+        """
+        offsets, targets = self._down_offsets, self._down
+        count = len(self.ids)
+        order = array("i", [-1]) * count
+        low = array("i", [0]) * count
+        on_stack = bytearray(count)
+        stack = []
+        found = []
+        counter = 0
+
+        # iterative Tarjan's strongly connected components
+        for root in range(count):
+            if order[root] != -1:
+                continue
+
+            work = [(root, offsets[root])]
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+
+            while work:
+                node, edge = work[-1]
+
+                if edge < offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    child = targets[edge]
+                    if order[child] == -1:
+                        order[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = 1
+                        work.append((child, offsets[child]))
+                    elif on_stack[child] and order[child] < low[node]:
+                        low[node] = order[child]
+                    continue
+
+                work.pop()
+                if work and low[node] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[node]
+
+                if low[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+
+                    self_loop = node in targets[offsets[node] : offsets[node + 1]]
+                    if len(component) > 1 or self_loop:
+                        found.append([self.ids[i] for i in reversed(component)])
+
+        return found
+
+
+def build(checks: dict[str, dict]) -> DependencyGraph:
+    """Build the dependency graph of the checks from `checks.get_all`."""
+    return DependencyGraph(checks)
@@ -10,6 +10,9 @@ from dataclasses import asdict
 
 ROUTE = "diagnostics"
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = ("get",)
+
 
 def get(token: str, checkid: str, args, customerid: str | None = None) -> dict:
     """Get diagnostic information from a probe or AGENT.
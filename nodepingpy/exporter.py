@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+
+"""Prometheus exporter for check state and uptime.
+
+A background thread refreshes `checks.get_all_uptime` and
+`results.get_current` on an interval and renders the metrics once per
+refresh into a single byte buffer. Scrapes are served from that buffer,
+so they make no API calls and take the same time no matter how often
+Prometheus scrapes. A gzip compressed copy is kept for scrapers that
+accept it. Errors in the background thread, such as an unexpected
+response, are logged and counted in `nodeping_exporter_refresh_errors_total`,
+and the previous metrics keep being served until a refresh succeeds.
+
+Example:
+
+    from nodepingpy import exporter
+
+    exporter.Exporter(token, refresh_interval=60, port=9393).serve_forever()
+
+Metrics, labelled with `checkid`, `label`, and `type`:
+
+    nodeping_check_up                   1 when passing, 0 when failing
+    nodeping_check_enabled              1 when the check is enabled
+    nodeping_check_muted                1 while notifications are muted
+    nodeping_check_uptime_percent       uptime, with a `period` label
+    nodeping_check_last_runtime_seconds runtime of the last result
+    nodeping_check_last_result_timestamp_seconds
+    nodeping_current_events             current events by `type`
+"""
+
+import gzip
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import checks, results
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+_HELP = (
+    ("nodeping_check_up", "gauge", "Whether the check is passing."),
+    ("nodeping_check_enabled", "gauge", "Whether the check is enabled."),
+    ("nodeping_check_muted", "gauge", "Whether notifications for the check are muted."),
+    ("nodeping_check_uptime_percent", "gauge", "Uptime percentage for a period."),
+    ("nodeping_check_last_runtime_seconds", "gauge", "Runtime of the last result."),
+    (
+        "nodeping_check_last_result_timestamp_seconds",
+        "gauge",
+        "Time of the last result.",
+    ),
+    ("nodeping_current_events", "gauge", "Number of current events by type."),
+)
+
+
+def _escape(value) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _number(value) -> str:
+    if value is True:
+        return "1"
+    if value is False:
+        return "0"
+    if isinstance(value, float):
+        return repr(value)
+
+    return str(value)
+
+
+def _muted(mute, now_ms: int) -> bool:
+    if mute is True:
+        return True
+    if isinstance(mute, (int, float)) and not isinstance(mute, bool):
+        return mute > now_ms
+
+    return False
+
+
+class _Labels:
+    """Escaped label sets, reused across refreshes while a check is unchanged."""
+
+    def __init__(self):
+        self._cache = {}
+
+    def get(self, checkid: str, check: dict) -> str:
+        label = check.get("label", "")
+        checktype = check.get("type", "")
+        cached = self._cache.get(checkid)
+
+        if cached is None or cached[0] != label or cached[1] != checktype:
+            text = 'checkid="{}",label="{}",type="{}"'.format(
+                _escape(checkid), _escape(label), _escape(checktype)
+            )
+            cached = (label, checktype, text)
+            self._cache[checkid] = cached
+
+        return cached[2]
+
+    def prune(self, checkids) -> None:
+        for checkid in self._cache.keys() - set(checkids):
+            del self._cache[checkid]
+
+
+def render(
+    allchecks: dict[str, dict], current: dict | None = None, labels=None
+) -> bytes:
+    """Render the check metrics in the Prometheus text format.
+
+    Args:
+        allchecks (dict): output of `checks.get_all_uptime`
+        current (dict): output of `results.get_current`
+        labels: label cache reused between calls
+
+    Returns:
+        bytes: the metrics, ready to serve
+    """
+    labels = labels or _Labels()
+    now_ms = int(time.time() * 1000)
+    series = {name: [] for name, _, _ in _HELP}
+    up = series["nodeping_check_up"]
+    enabled = series["nodeping_check_enabled"]
+    muted = series["nodeping_check_muted"]
+    uptime = series["nodeping_check_uptime_percent"]
+    runtime = series["nodeping_check_last_runtime_seconds"]
+    lasttime = series["nodeping_check_last_result_timestamp_seconds"]
+
+    for checkid, check in allchecks.items():
+        if not isinstance(check, dict):
+            continue
+
+        text = labels.get(checkid, check)
+
+        if "state" in check:
+            up.append("nodeping_check_up{{{}}} {}".format(text, _number(check["state"])))
+        enabled.append(
+            "nodeping_check_enabled{{{}}} {}".format(
+                text, "1" if check.get("enable") == "active" else "0"
+            )
+        )
+        muted.append(
+            "nodeping_check_muted{{{}}} {}".format(
+                text, "1" if _muted(check.get("mute"), now_ms) else "0"
+            )
+        )
+
+        for period, info in (check.get("uptime") or {}).items():
+            if isinstance(info, dict) and info.get("uptime") is not None:
+                uptime.append(
+                    'nodeping_check_uptime_percent{{{},period="{}"}} {}'.format(
+                        text, _escape(period), _number(info["uptime"])
+                    )
+                )
+
+        last = check.get("lastresult")
+        if isinstance(last, dict):
+            if isinstance(last.get("rt"), (int, float)):
+                runtime.append(
+                    "nodeping_check_last_runtime_seconds{{{}}} {}".format(
+                        text, _number(last["rt"] / 1000)
+                    )
+                )
+            if isinstance(last.get("t"), (int, float)):
+                lasttime.append(
+                    "nodeping_check_last_result_timestamp_seconds{{{}}} {}".format(
+                        text, _number(last["t"] / 1000)
+                    )
+                )
+
+    counts = {}
+    for event in (current or {}).values():
+        if isinstance(event, dict):
+            eventtype = event.get("type", "down")
+            counts[eventtype] = counts.get(eventtype, 0) + 1
+    series["nodeping_current_events"] = [
+        'nodeping_current_events{{type="{}"}} {}'.format(_escape(k), v)
+        for k, v in sorted(counts.items())
+    ]
+
+    labels.prune(allchecks)
+    lines = []
+
+    for name, kind, description in _HELP:
+        if series[name]:
+            lines.append("# HELP {} {}".format(name, description))
+            lines.append("# TYPE {} {}".format(name, kind))
+            lines.extend(series[name])
+
+    lines.append("")
+
+    return "\n".join(lines).encode("utf-8")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class Exporter:
+    """Serve NodePing metrics to Prometheus.
+
+    Args:
+        token (str): NodePing API token
+        refresh_interval (float): seconds between refreshes from the API
+        customerid (str): subaccount ID
+        host (str): address to listen on
+        port (int): port to listen on, 0 picks a free port
+        path (str): path the metrics are served on
+
+    Attributes:
+        body (bytes): the metrics served to the next scrape
+        body_gzip (bytes): `body` compressed with gzip
+        last_error (dict): error from the last failed refresh, or None
+    """
+
+    def __init__(
+        self,
+        token: str,
+        refresh_interval: float = 60.0,
+        customerid: str | None = None,
+        host: str = "127.0.0.1",
+        port: int = 9393,
+        path: str = "/metrics",
+    ):
+        self.token = token
+        self.customerid = customerid
+        self.refresh_interval = refresh_interval
+        self.path = path
+        self.last_error = None
+        self._labels = _Labels()
+        self._checks_body = b""
+        self._refreshed = 0.0
+        self._duration = 0.0
+        self._errors = 0
+        self.body = self._exporter_metrics()
+        self.body_gzip = gzip.compress(self.body, compresslevel=1)
+        self._bodies = (self.body, self.body_gzip)
+        self._pool = ThreadPoolExecutor(max_workers=2)
+        self._stop = threading.Event()
+        self._threads = []
+        self._server = _Server((host, port), self._request_handler())
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}{}".format(host, port, self.path)
+
+    def _exporter_metrics(self) -> bytes:
+        lines = [
+            "# HELP nodeping_exporter_up Whether the last refresh succeeded.",
+            "# TYPE nodeping_exporter_up gauge",
+            "nodeping_exporter_up {}".format(0 if self.last_error or not self._refreshed else 1),
+            "# HELP nodeping_exporter_refresh_timestamp_seconds Time of the last successful refresh.",
+            "# TYPE nodeping_exporter_refresh_timestamp_seconds gauge",
+            "nodeping_exporter_refresh_timestamp_seconds {}".format(self._refreshed),
+            "# HELP nodeping_exporter_refresh_duration_seconds Duration of the last refresh.",
+            "# TYPE nodeping_exporter_refresh_duration_seconds gauge",
+            "nodeping_exporter_refresh_duration_seconds {}".format(round(self._duration, 6)),
+            "# HELP nodeping_exporter_refresh_errors_total Failed refreshes.",
+            "# TYPE nodeping_exporter_refresh_errors_total counter",
+            "nodeping_exporter_refresh_errors_total {}".format(self._errors),
+            "",
+        ]
+
+        return "\n".join(lines).encode("utf-8")
+
+    def refresh(self) -> bool:
+        """Fetch from the API and render new metrics.
+
+        The previous check metrics keep being served when a refresh fails.
+
+        Returns:
+            bool: whether the refresh succeeded
+        """
+        start = time.perf_counter()
+        uptime = self._pool.submit(
+            checks.get_all_uptime, self.token, self.customerid, lastresult=True
+        )
+        current = self._pool.submit(
+            results.get_current, self.token, customerid=self.customerid
+        )
+
+        try:
+            allchecks = uptime.result()
+            events = current.result()
+        except (OSError, ValueError) as err:
+            allchecks = events = {"error": str(err)}
+
+        failed = next(
+            (r for r in (allchecks, events) if not isinstance(r, dict) or "error" in r),
+            None,
+        )
+
+        if failed is None:
+            self._checks_body = render(allchecks, events, self._labels)
+            self._refreshed = round(time.time(), 3)
+            self.last_error = None
+        else:
+            self._errors += 1
+            self.last_error = failed
+
+        self._duration = time.perf_counter() - start
+        self._publish()
+
+        return failed is None
+
+    def _publish(self) -> None:
+        self.body = self._checks_body + self._exporter_metrics()
+        self.body_gzip = gzip.compress(self.body, compresslevel=1)
+        # a single reference swap, so scrapes never see a partial body
+        self._bodies = (self.body, self.body_gzip)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as err:
+                logger.exception("Refreshing NodePing metrics failed")
+                self._errors += 1
+                self.last_error = {"error": "{}: {}".format(type(err).__name__, err)}
+                self._publish()
+            self._stop.wait(self.refresh_interval)
+
+    def _request_handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != exporter.path:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body, compressed = exporter._bodies
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = compressed
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "Exporter":
+        """Refresh and serve from background threads."""
+        if not self._threads:
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name="nodeping-exporter", daemon=True),
+                threading.Thread(
+                    target=self._server.serve_forever,
+                    name="nodeping-exporter-http",
+                    daemon=True,
+                ),
+            ]
+            for thread in self._threads:
+                thread.start()
+
+        return self
+
+    def serve_forever(self) -> None:
+        """Refresh in the background and serve from the current thread."""
+        self.start()
+
+        try:
+            self._stop.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop refreshing and serving."""
+        self._stop.set()
+
+        if self._threads:
+            self._server.shutdown()
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
+
+        self._server.server_close()
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+"""Run module functions across many subaccounts concurrently.
+
+Any function in this package that takes the API token as its first
+argument and a `customerid` keyword argument can be fanned out across
+subaccounts, such as `checks.get_all` or `contacts.get_all`.
+
+Example:
+
+    from nodepingpy import checks, fanout
+
+    runner = fanout.FanOut(token, workers=16, rate=5)
+    results = runner.map(checks.get_all)
+    allchecks = fanout.merge(results)
+
+    for customerid, result in runner.stream(checks.get_failing):
+        print(customerid, len(result))
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterator
+
+from . import accounts
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how often calls are made.
+
+    Args:
+        rate (float): calls allowed per second
+        burst (int): calls that may be made back to back before waiting
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+def subaccounts(
+    token: str,
+    predicate: Callable[[str, dict], bool] | None = None,
+    include_parent: bool = False,
+) -> list[str]:
+    """List subaccount IDs from `accounts.info`.
+
+    Args:
+        token (str): NodePing API token
+        predicate (callable): optional filter called with (customerid, account info)
+        include_parent (bool): also include the parent account
+
+    Returns:
+        list: subaccount IDs
+    """
+    info = accounts.info(token)
+
+    if "error" in info:
+        return []
+
+    return [
+        customerid
+        for customerid, account in info.items()
+        if isinstance(account, dict)
+        and (include_parent or "parent" not in account)
+        and (predicate is None or predicate(customerid, account))
+    ]
+
+
+class FanOut:
+    """Run a function once per subaccount with bounded concurrency.
+
+    NodePing applies its rate limit to the API token, so every call made
+    by a FanOut shares a single limiter whatever subaccount it is for.
+    Pass the same `limiter` to several FanOut objects to share it between
+    them as well.
+
+    Args:
+        token (str): NodePing API token
+        customerids (list): subaccount IDs to run against, defaults to all subaccounts
+        predicate (callable): filter for subaccounts, called with (customerid, account info)
+        workers (int): number of subaccounts queried at the same time
+        rate (float): maximum calls per second made with the token, None for no limit
+        burst (int): calls that may be made back to back before waiting
+        limiter (RateLimiter): limiter to use instead of one built from `rate`
+    """
+
+    def __init__(
+        self,
+        token: str,
+        customerids: list[str] | None = None,
+        predicate: Callable[[str, dict], bool] | None = None,
+        workers: int = 8,
+        rate: float | None = None,
+        burst: int = 1,
+        limiter: RateLimiter | None = None,
+    ):
+        self.token = token
+        self.workers = max(1, workers)
+        self.rate = rate
+        self.burst = burst
+        if limiter is None and rate is not None:
+            limiter = RateLimiter(rate, burst)
+        self.limiter = limiter
+        self._customerids = list(customerids) if customerids is not None else None
+        self._predicate = predicate
+
+    @property
+    def customerids(self) -> list[str]:
+        """Subaccount IDs, fetched from `accounts.info` on first use."""
+        if self._customerids is None:
+            self._customerids = subaccounts(self.token, self._predicate)
+
+        return self._customerids
+
+    def _call(self, func: Callable, customerid: str, args, kwargs) -> Any:
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+        try:
+            return func(self.token, *args, customerid=customerid, **kwargs)
+        except (OSError, ValueError) as err:
+            return {"error": str(err)}
+
+    def stream(self, func: Callable, *args, **kwargs) -> Iterator[tuple[str, Any]]:
+        """Yield (customerid, result) pairs as each subaccount finishes.
+
+        Args:
+            func (callable): function such as `checks.get_all`
+            *args: arguments passed after the token
+            **kwargs: keyword arguments passed to the function
+
+        Yields:
+            tuple: subaccount ID and the function's result for it
+        """
+        customerids = self.customerids
+
+        if not customerids:
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.workers, len(customerids))
+        ) as pool:
+            futures = {
+                pool.submit(self._call, func, customerid, args, kwargs): customerid
+                for customerid in customerids
+            }
+
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def map(self, func: Callable, *args, **kwargs) -> dict[str, Any]:
+        """Run a function for every subaccount and collect the results.
+
+        Args:
+            func (callable): function such as `checks.get_all`
+            *args: arguments passed after the token
+            **kwargs: keyword arguments passed to the function
+
+        Returns:
+            dict: subaccount ID mapped to the function's result for it
+        """
+        results = dict(self.stream(func, *args, **kwargs))
+
+        return {
+            customerid: results[customerid]
+            for customerid in self.customerids
+            if customerid in results
+        }
+
+
+def merge(results: dict[str, Any], key: str = "customerid") -> dict[str, dict]:
+    """Merge per-subaccount results keyed by record ID into one dict.
+
+    Each record is copied and tagged with the subaccount it came from.
+    Results that contain an "error" are skipped.
+
+    Args:
+        results (dict): result of `FanOut.map` for a function returning
+            records keyed by ID, such as `checks.get_all`
+        key (str): name of the key the subaccount ID is stored under
+
+    Returns:
+        dict: record ID mapped to the tagged record
+    """
+    merged = {}
+
+    for customerid, records in results.items():
+        if not isinstance(records, dict) or "error" in records:
+            continue
+
+        for recordid, record in records.items():
+            if isinstance(record, dict):
+                record = dict(record)
+                record[key] = customerid
+            merged[recordid] = record
+
+    return merged
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""Evaluate PUSH and HTTPPARSE check `fields` locally.
+
+A `fields` dict maps an arbitrary key to a `name` (a dotted path into the
+payload) and optional `min`/`max` thresholds. Compiling it precomputes the
+path for each field, so payloads can be evaluated in a single pass, or in
+batches, without sending them to NodePing.
+
+Example:
+
+    from nodepingpy import fields
+
+    evaluator = fields.compile_fields({
+        "cpuload": {"name": "cpu.load", "min": 0, "max": 5},
+        "processmem": {"name": "processmem", "min": 1000, "max": 5000},
+    })
+    evaluator.evaluate({"cpu": {"load": 7}, "processmem": 2000})
+    # {'cpuload': 'above max'}
+    evaluator.passes_many(payloads)
+"""
+
+from typing import NamedTuple
+
+
+MISSING = "missing"
+NOT_NUMBER = "not a number"
+BELOW_MIN = "below min"
+ABOVE_MAX = "above max"
+
+_ABSENT = object()
+
+
+class FieldRule(NamedTuple):
+    """A compiled field.
+
+    Args:
+        key (str): key of the field in the `fields` dict
+        name (str): dotted path of the value in the payload
+        path (tuple): `name` split into keys
+        min (float): lowest passing value, None for no minimum
+        max (float): highest passing value, None for no maximum
+    """
+
+    key: str
+    name: str
+    path: tuple
+    min: float | None
+    max: float | None
+
+
+def _bound(value) -> float | None:
+    if value is None or value == "":
+        return None
+
+    return float(value)
+
+
+def _get(payload, path: tuple):
+    """Get a value by path from nested dicts, or _ABSENT."""
+    try:
+        for key in path:
+            payload = payload[key]
+    except (KeyError, TypeError, IndexError):
+        return _ABSENT
+
+    return payload
+
+
+def _check(value, low, high) -> str | None:
+    if value is _ABSENT or value is None:
+        return MISSING
+    if value.__class__ is bool or not isinstance(value, (int, float)):
+        return NOT_NUMBER
+    if low is not None and value < low:
+        return BELOW_MIN
+    if high is not None and value > high:
+        return ABOVE_MAX
+
+    return None
+
+
+class CompiledFields:
+    """A `fields` dict compiled for repeated evaluation.
+
+    Args:
+        fields (dict): PUSH or HTTPPARSE check `fields`
+    """
+
+    def __init__(self, fields: dict):
+        rules = []
+
+        for key, settings in (fields or {}).items():
+            if not isinstance(settings, dict):
+                settings = {}
+
+            name = settings.get("name") or key
+            rules.append(
+                FieldRule(
+                    key,
+                    name,
+                    tuple(name.split(".")),
+                    _bound(settings.get("min")),
+                    _bound(settings.get("max")),
+                )
+            )
+
+        self.rules = tuple(rules)
+
+    def evaluate(self, payload: dict) -> dict[str, str]:
+        """Evaluate every field against a payload.
+
+        Args:
+            payload (dict): the data pushed, or parsed from the HTTPPARSE response
+
+        Returns:
+            dict: field key mapped to the reason it failed, empty if all passed
+        """
+        failures = {}
+
+        for key, _, path, low, high in self.rules:
+            reason = _check(_get(payload, path), low, high)
+            if reason is not None:
+                failures[key] = reason
+
+        return failures
+
+    def passes(self, payload: dict) -> bool:
+        """Whether every field in the payload is present and within range."""
+        for _, _, path, low, high in self.rules:
+            if _check(_get(payload, path), low, high) is not None:
+                return False
+
+        return True
+
+    def values(self, payloads: list[dict], key: str) -> list:
+        """Extract one field from many payloads, None where it is missing."""
+        for rule in self.rules:
+            if rule.key == key:
+                values = [_get(payload, rule.path) for payload in payloads]
+                return [None if value is _ABSENT else value for value in values]
+
+        raise KeyError(key)
+
+    def evaluate_many(self, payloads: list[dict]) -> list[dict[str, str]]:
+        """Evaluate many payloads at once.
+
+        Each field is evaluated as a column across all payloads, which
+        keeps the per-payload work to a couple of list operations.
+
+        Args:
+            payloads (list): payloads to evaluate
+
+        Returns:
+            list: failures for each payload in the same order, as from `evaluate`
+        """
+        results = [{} for _ in payloads]
+
+        for key, _, path, low, high in self.rules:
+            if len(path) == 1:
+                name = path[0]
+                column = [
+                    payload.get(name, _ABSENT) if payload.__class__ is dict
+                    else _get(payload, path)
+                    for payload in payloads
+                ]
+            else:
+                column = [_get(payload, path) for payload in payloads]
+
+            for i, value in enumerate(column):
+                # fast path for in range numbers
+                if (
+                    value.__class__ in (int, float)
+                    and (low is None or value >= low)
+                    and (high is None or value <= high)
+                ):
+                    continue
+                reason = _check(value, low, high)
+                if reason is not None:
+                    results[i][key] = reason
+
+        return results
+
+    def passes_many(self, payloads: list[dict]) -> list[bool]:
+        """Whether each payload passes every field.
+
+        Args:
+            payloads (list): payloads to evaluate
+
+        Returns:
+            list: True/False for each payload in the same order
+        """
+        return [not failures for failures in self.evaluate_many(payloads)]
+
+
+def compile_fields(fields: dict) -> CompiledFields:
+    """Compile a PUSH or HTTPPARSE `fields` dict.
+
+    Args:
+        fields (dict): `fields` from a check, keyed by an arbitrary string,
+            each with a `name`, `min`, and `max`
+
+    Returns:
+        CompiledFields: evaluator for the fields
+    """
+    return CompiledFields(fields)
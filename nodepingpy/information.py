@@ -10,6 +10,10 @@ from . import _utils
 from ._utils import API_URL
 
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = ("get_all_probes", "get_probe", "get_all_locations", "get_location")
+
+
 def get_all_probes(token: str) -> dict:
     """Get information on all NodePing probes
 
@@ -7,13 +7,40 @@ Get, create, update, and delete maintenance schedules for your account.
 https://nodeping.com/docs-api-maintenance.html
 """
 
-from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
 from .nptypes import maintenancetypes
 from . import _utils
 from ._utils import API_URL
 
 ROUTE = "maintenance"
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = (
+    "get_all",
+    "get",
+    "create",
+    "update",
+    "delete",
+    "create_bulk",
+    "delete_bulk",
+)
+
+
+@dataclass
+class BulkMaintenance:
+    """Maintenances created by `create_bulk`.
+
+    Args:
+        ids (list): IDs of the maintenances that were created
+        checklists (dict): maintenance ID mapped to the check IDs it covers
+        errors (list): (checklist, response) for each maintenance that failed
+    """
+
+    ids: list = field(default_factory=list)
+    checklists: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+
 
 def get_all(token: str, customerid: str | None = None) -> dict:
     """Get information about all maintenances.
@@ -118,3 +145,102 @@ def delete(token: str, maintenanceid: str, customerid: str | None = None) -> dic
     data = _utils.add_custid({"token": token}, customerid)
 
     return _utils.delete(url, data)
+
+
+def _partition(checklist: list, size: int) -> list[list]:
+    """Split a checklist into lists of at most `size` check IDs."""
+    return [checklist[i : i + size] for i in range(0, len(checklist), size)]
+
+
+def create_bulk(
+    token: str,
+    args: maintenancetypes.AdHocCreate,
+    chunksize: int = 250,
+    workers: int = 8,
+    customerid: str | None = None,
+) -> BulkMaintenance:
+    """Create ad-hoc maintenances for a very large checklist.
+
+    The checklist in `args` is split into maintenances of at most
+    `chunksize` checks, which are created concurrently. Each maintenance
+    name gets a "(1/N)" style suffix.
+
+    Args:
+        token (str): NodePing API token
+        args (AdHocCreate): ad-hoc maintenance covering all of the checks
+        chunksize (int): maximum number of checks per maintenance
+        workers (int): number of maintenances to create at the same time
+        customerid (str): subaccount ID
+
+    Returns:
+        BulkMaintenance: created maintenance IDs and any failures
+    """
+    chunks = _partition(list(args.checklist), max(1, chunksize))
+    total = len(chunks)
+    entries = [
+        replace(
+            args,
+            checklist=chunk,
+            name="{} ({}/{})".format(args.name, i, total) if total > 1 else args.name,
+        )
+        for i, chunk in enumerate(chunks, 1)
+    ]
+    result = BulkMaintenance()
+
+    if not entries:
+        return result
+
+    def create_entry(entry):
+        try:
+            return create(token, entry, customerid)
+        except (OSError, ValueError) as err:
+            return {"error": str(err)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, total))) as pool:
+        responses = pool.map(create_entry, entries)
+
+        for entry, response in zip(entries, responses):
+            maintenanceid = response.get("_id") if isinstance(response, dict) else None
+
+            if maintenanceid:
+                result.ids.append(maintenanceid)
+                result.checklists[maintenanceid] = entry.checklist
+            else:
+                result.errors.append((entry.checklist, response))
+
+    return result
+
+
+def delete_bulk(
+    token: str,
+    maintenanceids: list[str] | BulkMaintenance,
+    workers: int = 8,
+    customerid: str | None = None,
+) -> dict[str, dict]:
+    """Delete many maintenances concurrently.
+
+    Args:
+        token (str): NodePing API token
+        maintenanceids (list|BulkMaintenance): maintenance IDs, or the result of `create_bulk`
+        workers (int): number of maintenances to delete at the same time
+        customerid (str): subaccount ID
+
+    Returns:
+        dict: maintenance ID mapped to the API response for its deletion
+    """
+    if isinstance(maintenanceids, BulkMaintenance):
+        maintenanceids = maintenanceids.ids
+
+    maintenanceids = list(maintenanceids)
+
+    if not maintenanceids:
+        return {}
+
+    def delete_entry(maintenanceid):
+        try:
+            return delete(token, maintenanceid, customerid)
+        except (OSError, ValueError) as err:
+            return {"error": str(err)}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(maintenanceids)))) as pool:
+        return dict(zip(maintenanceids, pool.map(delete_entry, maintenanceids)))
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+
+"""Find which checks are in maintenance at a point or range in time.
+
+Scheduled maintenances from `maintenance.get_all` are expanded from their
+`cron` lines into time windows over a horizon, and stored in interval
+indexes, both for all windows and per check ID.
+
+Example:
+
+    from time import time
+    from nodepingpy import maintenance, maintenancecalendar
+
+    now = int(time() * 1000)
+    calendar = maintenancecalendar.MaintenanceCalendar(
+        maintenance.get_all(token), now, now + 7 * 86400000, offset=-7
+    )
+    calendar.checks_at(now)
+    calendar.in_maintenance("201205050153W2Q4C-0J2HSIRF", now)
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import NamedTuple
+
+
+_DAY_MS = 86400000
+_MINUTE_MS = 60000
+
+_MONTH_NAMES = {
+    name: number
+    for number, name in enumerate(
+        (
+            "jan", "feb", "mar", "apr", "may", "jun",
+            "jul", "aug", "sep", "oct", "nov", "dec",
+        ),
+        1,
+    )
+}
+_DAY_NAMES = {
+    name: number
+    for number, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))
+}
+_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+
+class CronSchedule(NamedTuple):
+    """A parsed 5 field cron line.
+
+    Args:
+        minutes (tuple): sorted minutes (0-59)
+        hours (tuple): sorted hours (0-23)
+        days (frozenset): days of the month (1-31)
+        months (frozenset): months (1-12)
+        weekdays (frozenset): days of the week (0-6, 0 is Sunday)
+        any_day (bool): day of the month field was `*`
+        any_weekday (bool): day of the week field was `*`
+    """
+
+    minutes: tuple
+    hours: tuple
+    days: frozenset
+    months: frozenset
+    weekdays: frozenset
+    any_day: bool
+    any_weekday: bool
+
+    def matches_date(self, day: date) -> bool:
+        """Whether the cron line runs on the specified date."""
+        if day.month not in self.months:
+            return False
+
+        dom = day.day in self.days
+        dow = (day.isoweekday() % 7) in self.weekdays
+
+        # cron runs when either day field matches if both are restricted
+        if self.any_day or self.any_weekday:
+            return dom and dow
+
+        return dom or dow
+
+
+class MaintenanceWindow(NamedTuple):
+    """A single occurrence of a maintenance.
+
+    Args:
+        start (int): millisecond timestamp the maintenance starts
+        end (int): millisecond timestamp the maintenance ends
+        maintenanceid (str): the maintenance ID
+        name (str): name of the maintenance
+        checklist (tuple): check IDs in maintenance during the window
+    """
+
+    start: int
+    end: int
+    maintenanceid: str
+    name: str
+    checklist: tuple
+
+
+def _parse_field(
+    value: str, low: int, high: int, names: dict[str, int] | None = None
+) -> set[int]:
+    """Parse a single cron field into the set of values it matches."""
+    result = set()
+
+    for part in value.lower().split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+
+        if step < 1:
+            raise ValueError("Invalid cron step: {}".format(value))
+
+        if part == "*":
+            first, last = low, high
+        else:
+            first, _, last = part.partition("-")
+            first = names[first] if names and first in names else int(first)
+            if last:
+                last = names[last] if names and last in names else int(last)
+            elif step > 1:
+                last = high
+            else:
+                last = first
+
+        if first < low or last > high or first > last:
+            raise ValueError("Invalid cron field: {}".format(value))
+
+        result.update(range(first, last + 1, step))
+
+    return result
+
+
+def parse_cron(cron: str) -> CronSchedule:
+    """Parse a 5 field cron line (minute hour day month weekday).
+
+    Supports `*`, lists, ranges, steps, month and weekday names, and the
+    `@daily` style macros.
+
+    Args:
+        cron (str): cron line such as "30 8 15 * *"
+
+    Returns:
+        CronSchedule: the parsed cron line
+
+    Raises:
+        ValueError: the cron line is not valid
+    """
+    cron = _MACROS.get(cron.strip().lower(), cron)
+    fields = cron.split()
+
+    if len(fields) != 5:
+        raise ValueError("Invalid cron line: {}".format(cron))
+
+    minute, hour, day, month, weekday = fields
+    weekdays = _parse_field(weekday, 0, 7, _DAY_NAMES)
+
+    if 7 in weekdays:
+        weekdays.discard(7)
+        weekdays.add(0)
+
+    return CronSchedule(
+        tuple(sorted(_parse_field(minute, 0, 59))),
+        tuple(sorted(_parse_field(hour, 0, 23))),
+        frozenset(_parse_field(day, 1, 31)),
+        frozenset(_parse_field(month, 1, 12, _MONTH_NAMES)),
+        frozenset(weekdays),
+        day == "*",
+        weekday == "*",
+    )
+
+
+def expand_cron(
+    cron: str | CronSchedule,
+    duration: int,
+    start: int,
+    end: int,
+    offset: float = 0,
+) -> list[tuple[int, int]]:
+    """Expand a cron line into the windows overlapping a time range.
+
+    Args:
+        cron (str|CronSchedule): cron line or parsed cron line
+        duration (int): length of each window in minutes
+        start (int): millisecond timestamp for the start of the range
+        end (int): millisecond timestamp for the end of the range
+        offset (float): timezone offset in hours the cron line is evaluated in
+
+    Returns:
+        list: sorted (start, end) millisecond timestamps for each window
+    """
+    if isinstance(cron, str):
+        cron = parse_cron(cron)
+
+    offset_ms = int(offset * 3600000)
+    length = int(duration) * _MINUTE_MS
+    # windows that started before the range may still overlap it
+    first_day = (start + offset_ms - length) // _DAY_MS
+    last_day = (end + offset_ms) // _DAY_MS
+    epoch = date(1970, 1, 1)
+    offsets = [
+        hour * 3600000 + minute * _MINUTE_MS
+        for hour in cron.hours
+        for minute in cron.minutes
+    ]
+    windows = []
+
+    for daynum in range(first_day, last_day + 1):
+        if not cron.matches_date(epoch + timedelta(days=daynum)):
+            continue
+
+        daystart = daynum * _DAY_MS - offset_ms
+
+        for delta in offsets:
+            window_start = daystart + delta
+            window_end = window_start + length
+
+            if window_end > start and window_start < end:
+                windows.append((window_start, window_end))
+
+    return windows
+
+
+class _IntervalIndex:
+    """Maintenance windows sorted by start with a running maximum end time.
+
+    A point query bisects on the start times and walks backwards until
+    the running maximum end shows no earlier window can contain it.
+    """
+
+    __slots__ = ("starts", "ends", "maxends", "items")
+
+    def __init__(self, windows: list[MaintenanceWindow]):
+        self.items = windows
+        self.starts = [window.start for window in windows]
+        self.ends = [window.end for window in windows]
+        self.maxends = list(accumulate(self.ends, max))
+
+    def overlapping(self, start: int, end: int) -> list:
+        """Items whose interval overlaps [start, end)."""
+        found = []
+        i = bisect_left(self.starts, end) - 1
+        ends = self.ends
+        maxends = self.maxends
+
+        while i >= 0 and maxends[i] > start:
+            if ends[i] > start:
+                found.append(self.items[i])
+            i -= 1
+
+        found.reverse()
+
+        return found
+
+    def at(self, time: int) -> list:
+        """Items whose interval contains the timestamp."""
+        found = []
+        i = bisect_right(self.starts, time) - 1
+        ends = self.ends
+        maxends = self.maxends
+
+        while i >= 0 and maxends[i] > time:
+            if ends[i] > time:
+                found.append(self.items[i])
+            i -= 1
+
+        found.reverse()
+
+        return found
+
+
+class MaintenanceCalendar:
+    """Maintenance windows over a time horizon indexed by check ID.
+
+    Args:
+        maintenances (dict): maintenances from `maintenance.get_all`
+        start (int): millisecond timestamp for the start of the horizon
+        end (int): millisecond timestamp for the end of the horizon
+        offset (float): timezone offset in hours the cron lines are evaluated in
+        include_disabled (bool): also include maintenances that are not enabled
+    """
+
+    def __init__(
+        self,
+        maintenances: dict[str, dict],
+        start: int,
+        end: int,
+        offset: float = 0,
+        include_disabled: bool = False,
+    ):
+        self.start = start
+        self.end = end
+        self.windows = []
+        self.errors = {}
+        parsed = {}
+
+        for maintenanceid, entry in maintenances.items():
+            if not isinstance(entry, dict):
+                continue
+            if not include_disabled and entry.get("enabled") is False:
+                continue
+
+            name = entry.get("name", "")
+            checklist = tuple(entry.get("checklist") or ())
+            duration = int(entry.get("duration") or 0)
+            cron = entry.get("cron")
+
+            try:
+                if cron:
+                    if cron not in parsed:
+                        parsed[cron] = parse_cron(cron)
+                    spans = expand_cron(parsed[cron], duration, start, end, offset)
+                elif entry.get("start") is not None:
+                    # ad-hoc maintenances run once from their start time
+                    window_start = int(entry["start"])
+                    spans = [(window_start, window_start + duration * _MINUTE_MS)]
+                else:
+                    continue
+            except (KeyError, TypeError, ValueError) as err:
+                self.errors[maintenanceid] = str(err)
+                continue
+
+            for window_start, window_end in spans:
+                if window_end > start and window_start < end:
+                    self.windows.append(
+                        MaintenanceWindow(
+                            window_start, window_end, maintenanceid, name, checklist
+                        )
+                    )
+
+        self.windows.sort(key=lambda window: window.start)
+        self._index = _IntervalIndex(self.windows)
+
+        # windows are already sorted, so each check's list is sorted as well
+        by_check = {}
+
+        for window in self.windows:
+            for checkid in window.checklist:
+                if checkid in by_check:
+                    by_check[checkid].append(window)
+                else:
+                    by_check[checkid] = [window]
+
+        self._by_check = {
+            checkid: _IntervalIndex(windows) for checkid, windows in by_check.items()
+        }
+
+    def windows_at(self, time: int) -> list[MaintenanceWindow]:
+        """All maintenance windows active at a millisecond timestamp."""
+        return self._index.at(time)
+
+    def windows_between(self, start: int, end: int) -> list[MaintenanceWindow]:
+        """All maintenance windows overlapping the range [start, end)."""
+        return self._index.overlapping(start, end)
+
+    def checks_at(self, time: int) -> set[str]:
+        """Check IDs in maintenance at a millisecond timestamp."""
+        return {
+            checkid for window in self._index.at(time) for checkid in window.checklist
+        }
+
+    def checks_between(self, start: int, end: int) -> set[str]:
+        """Check IDs in maintenance at any time in the range [start, end)."""
+        return {
+            checkid
+            for window in self._index.overlapping(start, end)
+            for checkid in window.checklist
+        }
+
+    def in_maintenance(self, checkid: str, time: int) -> bool:
+        """Whether a check is in maintenance at a millisecond timestamp."""
+        index = self._by_check.get(checkid)
+
+        return index is not None and bool(index.at(time))
+
+    def windows_for(
+        self, checkid: str, start: int | None = None, end: int | None = None
+    ) -> list[MaintenanceWindow]:
+        """Maintenance windows for a check, optionally limited to [start, end)."""
+        index = self._by_check.get(checkid)
+
+        if index is None:
+            return []
+        if start is None and end is None:
+            return list(index.items)
+
+        return index.overlapping(
+            self.start if start is None else start, self.end if end is None else end
+        )
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+"""Latency, size, and retry metrics for API requests.
+
+Metrics are collected through the transport hooks in `_utils` and kept
+per route and method, such as ("GET", "checks") or ("PUT", "checks/{id}").
+Each thread records into its own table without locking, and the tables
+are only merged when `snapshot` is called, so collection can stay
+enabled in production. When a thread ends, its table is folded into a
+shared table of retired threads, so short-lived worker threads do not
+accumulate.
+
+Example:
+
+    from nodepingpy import checks, metrics
+
+    metrics.enable()
+    checks.get_all(token)
+    metrics.snapshot()[("GET", "checks")]["p99"]
+"""
+
+import threading
+import weakref
+from bisect import bisect_left
+
+from . import _utils
+
+
+# Upper bounds of the latency buckets in seconds, the last bucket is unbounded
+BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class _RouteStats:
+    __slots__ = (
+        "requests",
+        "errors",
+        "retries",
+        "statuses",
+        "buckets",
+        "latency",
+        "bytes_out",
+        "bytes_in",
+        "encode",
+        "decode",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.statuses = {}
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.latency = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.encode = 0.0
+        self.decode = 0.0
+
+    def add(self, other: "_RouteStats") -> None:
+        self.requests += other.requests
+        self.errors += other.errors
+        self.retries += other.retries
+        self.latency += other.latency
+        self.bytes_out += other.bytes_out
+        self.bytes_in += other.bytes_in
+        self.encode += other.encode
+        self.decode += other.decode
+        for status, count in list(other.statuses.items()):
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        for i, count in enumerate(other.buckets):
+            self.buckets[i] += count
+
+
+class _Owner:
+    """Kept in the thread local storage of a thread, which is cleared when
+    the thread ends. Its finalizer then retires the thread's table."""
+
+    __slots__ = ("table", "__weakref__")
+
+    def __init__(self, table: dict):
+        self.table = table
+
+
+_local = threading.local()
+# id of the table mapped to the table, for threads that are still running
+_tables = {}
+# merged tables of the threads that have ended
+_retired = {}
+_tables_lock = threading.RLock()
+
+
+def _retire(table: dict) -> None:
+    with _tables_lock:
+        if _tables.pop(id(table), None) is None:
+            return
+        for key, stats in table.items():
+            merged = _retired.get(key)
+            if merged is None:
+                merged = _retired[key] = _RouteStats()
+            merged.add(stats)
+
+
+def _table() -> dict:
+    owner = getattr(_local, "owner", None)
+
+    if owner is None:
+        table = {}
+        owner = _local.owner = _Owner(table)
+        with _tables_lock:
+            _tables[id(table)] = table
+        weakref.finalize(owner, _retire, table)
+
+    return owner.table
+
+
+def _stats(info) -> _RouteStats:
+    table = _table()
+    key = (info.method, info.route)
+    stats = table.get(key)
+
+    if stats is None:
+        stats = table[key] = _RouteStats()
+
+    return stats
+
+
+def _on_response(info) -> None:
+    stats = _stats(info)
+    stats.requests += 1
+    stats.buckets[bisect_left(BUCKETS, info.elapsed)] += 1
+    stats.latency += info.elapsed
+    stats.bytes_out += info.request_bytes
+    stats.bytes_in += info.response_bytes
+    stats.statuses[info.status] = stats.statuses.get(info.status, 0) + 1
+
+    if info.attempt > 1:
+        stats.retries += 1
+    # encoding happens once per call, decoding once after the final attempt
+    if info.attempt == 1:
+        stats.encode += info.encode_time
+    stats.decode += info.decode_time
+
+
+def _on_error(info) -> None:
+    stats = _stats(info)
+    stats.errors += 1
+    stats.bytes_out += info.request_bytes
+
+    if info.attempt > 1:
+        stats.retries += 1
+    if info.attempt == 1:
+        stats.encode += info.encode_time
+
+
+def enable() -> None:
+    """Start collecting metrics for every API request."""
+    _utils.add_hook("post_response", _on_response)
+    _utils.add_hook("error", _on_error)
+
+
+def disable() -> None:
+    """Stop collecting metrics. Collected metrics are kept."""
+    _utils.remove_hook("post_response", _on_response)
+    _utils.remove_hook("error", _on_error)
+
+
+def enabled() -> bool:
+    """Whether metrics are being collected."""
+    return _on_response in _utils.HOOKS["post_response"]
+
+
+def reset() -> None:
+    """Clear all collected metrics."""
+    with _tables_lock:
+        for table in _tables.values():
+            table.clear()
+        _retired.clear()
+
+
+def _percentile(buckets: list[int], total: int, q: float) -> float | None:
+    """Upper bound of the bucket holding the q-th percentile."""
+    if not total:
+        return None
+
+    rank = q * total
+    seen = 0
+
+    for i, count in enumerate(buckets):
+        seen += count
+        if seen >= rank:
+            return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+
+    return float("inf")
+
+
+def snapshot() -> dict[tuple[str, str], dict]:
+    """Merge the metrics from every thread.
+
+    Returns:
+        dict: (method, route) mapped to a dict with "requests", "errors",
+            "retries", "statuses", "buckets" (counts per BUCKETS bound plus
+            one for slower requests), "latency" (total seconds), "mean",
+            "p50"/"p90"/"p99" (bucket upper bounds in seconds), "bytes_out",
+            "bytes_in", "encode" and "decode" (total seconds)
+    """
+    totals = {}
+
+    # holding the lock keeps a table from being retired while it is read
+    with _tables_lock:
+        for table in [_retired, *_tables.values()]:
+            for key, stats in list(table.items()):
+                merged = totals.get(key)
+                if merged is None:
+                    merged = totals[key] = _RouteStats()
+                merged.add(stats)
+
+    merged = {}
+
+    for key, stats in totals.items():
+        entry = merged[key] = {
+            name: getattr(stats, name) for name in _RouteStats.__slots__
+        }
+        total = entry["requests"]
+        entry["mean"] = entry["latency"] / total if total else None
+        for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            entry[name] = _percentile(entry["buckets"], total, q)
+
+    return merged
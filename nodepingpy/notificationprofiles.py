@@ -11,6 +11,9 @@ from ._utils import API_URL
 
 ROUTE = "notificationprofiles"
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = ("get_all", "get", "create", "update", "delete")
+
 
 def get_all(token: str, customerid: str | None = None) -> dict:
     """Get all notification profiles on the account.
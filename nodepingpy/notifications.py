@@ -12,6 +12,9 @@ from ._utils import API_URL
 
 ROUTE = "notifications"
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = ("get",)
+
 
 @dataclass
 class Notification:
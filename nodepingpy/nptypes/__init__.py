@@ -1,3 +1,13 @@
+"""NodePing request and response types.
+
+The submodules are imported the first time they are used, and the check
+dataclasses can be imported from here directly:
+
+    from nodepingpy.nptypes import PingCheck, HttpCheck
+"""
+
+import sys
+
 __all__ = [
     "checktypes",
     "contacttypes",
@@ -6,3 +16,25 @@ __all__ = [
     "notificationtypes",
     "resulttypes"
 ]
+
+
+def _load(name: str):
+    # __import__ rather than importlib, so -X importtime shows the module
+    __import__("{}.{}".format(__name__, name))
+    return sys.modules["{}.{}".format(__name__, name)]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return _load(name)
+
+    if name[:1].isupper():
+        checktypes = _load("checktypes")
+        if hasattr(checktypes, name):
+            return getattr(checktypes, name)
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
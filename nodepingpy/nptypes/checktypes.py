@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 
-"""NodePing check types."""
+"""NodePing check types.
 
-from dataclasses import dataclass, field
+The check dataclasses use slots, so assigning an attribute that is not
+one of their fields raises AttributeError.
+"""
+
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
 from typing import TypedDict
 
 
@@ -21,7 +25,7 @@ DEFAULTS = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentCheck:
     """NodePing AGENT check.
 
@@ -65,7 +69,7 @@ class AgentCheck:
         self.type = "AGENT"
 
 
-@dataclass
+@dataclass(slots=True)
 class AudioCheck:
     """NodePing AUDIO check.
 
@@ -114,7 +118,7 @@ class AudioCheck:
         self.type = "AUDIO"
 
 
-@dataclass
+@dataclass(slots=True)
 class ClusterCheck:
     """NodePing Cluster check.
 
@@ -170,7 +174,7 @@ class ClusterCheck:
         self.type = "CLUSTER"
 
 
-@dataclass
+@dataclass(slots=True)
 class DnsCheck:
     """NodePing DNS check.
 
@@ -229,7 +233,7 @@ class DnsCheck:
         self.type = "DNS"
 
 
-@dataclass
+@dataclass(slots=True)
 class DohDotCheck:
     """NodePing DOHDOT check.
 
@@ -294,7 +298,7 @@ class DohDotCheck:
         self.type = "DOHDOT"
 
 
-@dataclass
+@dataclass(slots=True)
 class FtpCheck:
     """NodePing FTP check.
 
@@ -347,7 +351,7 @@ class FtpCheck:
         self.type = "FTP"
 
 
-@dataclass
+@dataclass(slots=True)
 class HttpCheck:
     """NodePing HTTP check.
 
@@ -394,7 +398,7 @@ class HttpCheck:
         self.type = "HTTP"
 
 
-@dataclass
+@dataclass(slots=True)
 class HttpAdvCheck:
     """NodePing HTTPADV check.
 
@@ -459,7 +463,7 @@ class HttpAdvCheck:
         self.type = "HTTPADV"
 
 
-@dataclass
+@dataclass(slots=True)
 class HttpContentCheck:
     """NodePing HTTPCONTENT check.
 
@@ -510,7 +514,7 @@ class HttpContentCheck:
         self.type = "HTTPCONTENT"
 
 
-@dataclass
+@dataclass(slots=True)
 class HttpParseCheck:
     """NodePing HTTPPARSE check.
 
@@ -573,7 +577,7 @@ class HttpParseCheck:
         self.type = "HTTPPARSE"
 
 
-@dataclass
+@dataclass(slots=True)
 class Imap4Check:
     """NodePing IMAP4 check.
 
@@ -628,7 +632,7 @@ class Imap4Check:
         self.type = "IMAP4"
 
 
-@dataclass
+@dataclass(slots=True)
 class MongodbCheck:
     """NodePing MONGODB check.
 
@@ -692,7 +696,7 @@ class MongodbCheck:
         self.type = "MONGODB"
 
 
-@dataclass
+@dataclass(slots=True)
 class MtrCheck:
     """NodePing MTR check.
 
@@ -737,7 +741,7 @@ class MtrCheck:
         self.type = "MTR"
 
 
-@dataclass
+@dataclass(slots=True)
 class MySqlCheck:
     """NodePing MYSQL check.
 
@@ -810,7 +814,7 @@ class MySqlCheck:
         self.type = "MYSQL"
 
 
-@dataclass
+@dataclass(slots=True)
 class NtpCheck:
     """NodePing NTP check.
 
@@ -857,7 +861,7 @@ class NtpCheck:
         self.type = "NTP"
 
 
-@dataclass
+@dataclass(slots=True)
 class PingCheck:
     """NodePing PING check.
 
@@ -902,7 +906,7 @@ class PingCheck:
         self.type = "PING"
 
 
-@dataclass
+@dataclass(slots=True)
 class Pop3Check:
     """NodePing POP3 check.
 
@@ -957,7 +961,7 @@ class Pop3Check:
         self.type = "POP3"
 
 
-@dataclass
+@dataclass(slots=True)
 class PortCheck:
     """NodePing PORT check.
 
@@ -1004,7 +1008,7 @@ class PortCheck:
         self.type = "PORT"
 
 
-@dataclass
+@dataclass(slots=True)
 class PostgreSqlCheck:
     """NodePing PGSQL check.
 
@@ -1067,7 +1071,7 @@ class PostgreSqlCheck:
         self.type = "PGSQL"
 
 
-@dataclass
+@dataclass(slots=True)
 class PushCheck:
     """NodePing PUSH check.
 
@@ -1127,7 +1131,7 @@ class PushCheck:
         self.type = "PUSH"
 
 
-@dataclass
+@dataclass(slots=True)
 class RblCheck:
     """NodePing RBL check.
 
@@ -1174,7 +1178,7 @@ class RblCheck:
         self.type = "RBL"
 
 
-@dataclass
+@dataclass(slots=True)
 class RedisCheck:
     """NodePing REDIS check.
 
@@ -1223,7 +1227,7 @@ class RedisCheck:
         self.type = "REDIS"
 
 
-@dataclass
+@dataclass(slots=True)
 class RdpCheck:
     """NodePing RDP check.
 
@@ -1264,7 +1268,7 @@ class RdpCheck:
         self.type = "RDP"
 
 
-@dataclass
+@dataclass(slots=True)
 class SipCheck:
     """NodePing SIP check.
 
@@ -1311,7 +1315,7 @@ class SipCheck:
         self.type = "SIP"
 
 
-@dataclass
+@dataclass(slots=True)
 class SmtpCheck:
     """NodePing SMTP check.
 
@@ -1370,7 +1374,7 @@ class SmtpCheck:
         self.type = "SMTP"
 
 
-@dataclass
+@dataclass(slots=True)
 class SnmpCheck:
     """NodePing SNMP check.
 
@@ -1425,7 +1429,7 @@ class SnmpCheck:
         self.type = "SNMP"
 
 
-@dataclass
+@dataclass(slots=True)
 class Spec10DnsCheck:
     """NodePing SPEC10DNS check.
 
@@ -1477,7 +1481,7 @@ class Spec10DnsCheck:
         self.type = "SPEC10DNS"
 
 
-@dataclass
+@dataclass(slots=True)
 class Spec10RddsCheck:
     """NodePing SPEC10RDDS check.
 
@@ -1529,7 +1533,7 @@ class Spec10RddsCheck:
         self.type = "SPEC10RDDS"
 
 
-@dataclass
+@dataclass(slots=True)
 class SshCheck:
     """NodePing SSH check.
 
@@ -1584,7 +1588,7 @@ class SshCheck:
         self.type = "SSH"
 
 
-@dataclass
+@dataclass(slots=True)
 class SslCheck:
     """NodePing SSL check.
 
@@ -1631,7 +1635,7 @@ class SslCheck:
         self.type = "SSL"
 
 
-@dataclass
+@dataclass(slots=True)
 class WebsocketCheck:
     """NodePing WEBSOCKET check.
 
@@ -1680,7 +1684,7 @@ class WebsocketCheck:
         self.type = "WEBSOCKET"
 
 
-@dataclass
+@dataclass(slots=True)
 class WhoisCheck:
     """NodePing WHOIS check.
 
@@ -1787,3 +1791,190 @@ class ModifiedCheck(TypedDict):
     tags: list
     type: str
     uuid: str
+
+
+_serializers = {}
+
+
+def _compile_serializer(cls: type):
+    """Build a function that reads each field of `cls` once, in order."""
+    lines = ["def serialize(check):", "    data = {}"]
+
+    for item in fields(cls):
+        lines.append("    value = check.{}".format(item.name))
+        # the same values `_utils.strip_none_values` drops
+        lines.append("    if value or value.__class__ is bool:")
+        lines.append("        data[{!r}] = value".format(item.name))
+
+    lines.append("    return data")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+
+    return namespace["serialize"]
+
+
+def to_api(check) -> dict:
+    """Fields of a check dataclass as they are sent to the API.
+
+    Produces the same dict as stripping the empty values from
+    `dataclasses.asdict`, in one pass and without copying nested lists
+    and dicts.
+
+    Args:
+        check: a dataclass such as PingCheck, HttpCheck, etc.
+
+    Returns:
+        dict: the fields that have values
+    """
+    serialize = _serializers.get(check.__class__)
+
+    if serialize is None:
+        serialize = _serializers[check.__class__] = _compile_serializer(check.__class__)
+
+    return serialize(check)
+
+
+# Keys of a check from the API that are not moved into `parameters`
+_TOP_LEVEL = frozenset(GetCheck.__annotations__)
+_ABSENT = object()
+
+
+def _compile_constructor(cls: type):
+    """Build a function creating `cls` from a check returned by the API."""
+    namespace = {"cls": cls, "ABSENT": _ABSENT}
+    lines = [
+        "def from_api(check):",
+        "    get = check.get",
+        "    params = get('parameters') or {}",
+        "    pget = params.get",
+    ]
+    args = []
+
+    for item in fields(cls):
+        name = item.name
+        if name == "type" or not item.init:
+            continue
+
+        if name == "enabled":
+            # the API reports `enable` as "active" or "inactive"
+            lines.append("    enable = get('enable', ABSENT)")
+            lines.append(
+                "    enabled = get('enabled', DEFAULT_enabled) if enable is ABSENT"
+                " else enable == 'active'"
+            )
+            namespace["DEFAULT_enabled"] = item.default
+            args.append("enabled=enabled")
+            continue
+
+        if name in _TOP_LEVEL:
+            lookup = "get({!r}, ABSENT)".format(name)
+        else:
+            # flattened dicts, such as `to_api` output, have parameters at the top
+            lookup = "pget({0!r}, ABSENT) if {0!r} in params else get({0!r}, ABSENT)".format(
+                name
+            )
+
+        if item.default is not MISSING:
+            namespace["DEFAULT_" + name] = item.default
+            fallback = "DEFAULT_" + name
+        elif item.default_factory is not MISSING:
+            namespace["FACTORY_" + name] = item.default_factory
+            fallback = "FACTORY_{}()".format(name)
+        else:
+            fallback = "None"
+
+        lines.append("    value = {}".format(lookup))
+        lines.append("    {} = {} if value is ABSENT else value".format(name, fallback))
+        args.append("{0}={0}".format(name))
+
+        if name == "runlocations":
+            lines.append("    if runlocations.__class__ is str:")
+            lines.append("        runlocations = [runlocations]")
+        elif name == "dep" and item.default is not MISSING:
+            # the API reports a check without a dependency as `dep: false`
+            lines.append("    if not dep:")
+            lines.append("        dep = DEFAULT_dep")
+
+    lines.append("    return cls({})".format(", ".join(args)))
+    exec("\n".join(lines), namespace)
+
+    return namespace["from_api"]
+
+
+def _build_registry() -> dict[str, type]:
+    registry = {}
+
+    for cls in list(globals().values()):
+        if isinstance(cls, type) and is_dataclass(cls) and cls.__module__ == __name__:
+            for item in fields(cls):
+                if item.name == "type":
+                    registry[item.default] = cls
+
+    return registry
+
+
+# Check dataclasses by their `type`, such as "HTTPADV" or "SPEC10RDDS"
+REGISTRY = _build_registry()
+_constructors = {}
+
+
+def check_class(checktype: str) -> type:
+    """The dataclass for a check type, such as HttpAdvCheck for "HTTPADV".
+
+    Raises:
+        ValueError: the check type is unknown
+    """
+    try:
+        return REGISTRY[checktype.upper()]
+    except KeyError:
+        raise ValueError("Unknown check type: {}".format(checktype)) from None
+
+
+def from_api(check: dict):
+    """Create the check type dataclass for a check from `checks.get_all`.
+
+    Fields are read from the check and its `parameters` in one pass, and
+    `enable` is converted into `enabled`. Flat dicts such as the output of
+    `to_api` work too. Lists and dicts are not copied.
+
+    Args:
+        check (dict): a check as returned by the API
+
+    Returns:
+        a dataclass such as PingCheck, HttpCheck, etc.
+
+    Raises:
+        ValueError: the check is not a dict or has an unknown type
+    """
+    if not isinstance(check, dict):
+        raise ValueError("Check must be a dict, not {}".format(type(check).__name__))
+
+    cls = check_class(check.get("type") or "")
+    constructor = _constructors.get(cls)
+
+    if constructor is None:
+        constructor = _constructors[cls] = _compile_constructor(cls)
+
+    return constructor(check)
+
+
+def from_api_all(checks: dict[str, dict]) -> dict:
+    """Convert the checks from `checks.get_all` into dataclasses by check ID.
+
+    Error responses are returned unchanged.
+
+    Raises:
+        ValueError: a check is not a dict or has an unknown type
+    """
+    if "error" in checks:
+        return checks
+
+    result = {}
+
+    for checkid, check in checks.items():
+        try:
+            result[checkid] = from_api(check)
+        except ValueError as err:
+            raise ValueError("Check {}: {}".format(checkid, err)) from None
+
+    return result
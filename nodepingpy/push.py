@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+
+"""Submit results for PUSH checks.
+
+https://nodeping.com/push_check.html
+
+Samples are validated against the check's `fields`, coalesced per check,
+and submitted concurrently over pooled keep-alive connections, either by
+calling `flush` or from a background thread. Submissions that still fail
+after retrying are written to an optional, size-bounded spool file and
+sent again on the next flush. The spool is moved aside while its samples
+are resent and only removed afterwards, so samples may be sent twice
+after a crash but are not lost. Errors in the background thread, such as
+an unwritable spool, are logged and counted in `stats["errors"]`, and
+the thread keeps running.
+
+Example:
+
+    from nodepingpy import checks, push
+
+    client = push.PushClient(flush_interval=10, spool="/var/tmp/nodeping.spool")
+    client.register_checks(checks.get_all(token))
+    client.start()
+    client.add("201205050153W2Q4C-0J2HSIRF", {"cpuload": 0.4, "mem": {"free": 512}})
+    ...
+    client.close()
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlencode, urlsplit
+
+from .fields import MISSING, NOT_NUMBER, CompiledFields, compile_fields
+
+
+PUSH_URL = "https://push.nodeping.com/v1"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PushTarget:
+    """A PUSH check that samples can be submitted for.
+
+    Args:
+        checkid (str): ID of the PUSH check
+        checktoken (str): the check's `checktoken`
+        fields (dict): the check's `fields`, used to validate samples
+    """
+
+    checkid: str
+    checktoken: str
+    fields: dict = field(default_factory=dict)
+
+
+def _errors(evaluator: CompiledFields, data) -> list[str]:
+    """Validation errors for a sample, ignoring values that are out of range."""
+    if not isinstance(data, dict):
+        return ["Sample must be a dict"]
+
+    failures = evaluator.evaluate(data)
+
+    if not failures:
+        return []
+
+    names = {rule.key: rule.name for rule in evaluator.rules}
+    errors = []
+
+    for key, reason in failures.items():
+        if reason == MISSING:
+            errors.append("Missing field: {}".format(names[key]))
+        elif reason == NOT_NUMBER:
+            errors.append("Field is not a number: {}".format(names[key]))
+
+    return errors
+
+
+def validate(fields: dict, data: dict) -> list[str]:
+    """Check that a sample has a numeric value for every field.
+
+    Values outside of a field's min/max are not errors, since they are
+    what makes the check fail.
+
+    Args:
+        fields (dict): PUSH check `fields`
+        data (dict): sample to submit
+
+    Returns:
+        list: error messages, empty when the sample is valid
+    """
+    return _errors(compile_fields(fields), data)
+
+
+class PushClient:
+    """Batching client for submitting PUSH check results.
+
+    Args:
+        targets (list): PushTarget entries for the checks to submit results for
+        workers (int): number of connections used to submit results concurrently
+        flush_interval (float): seconds between flushes of the background thread
+        retries (int): extra attempts for a submission after a failure
+        timeout (float): socket timeout in seconds
+        spool (str): path of a file to keep failed submissions in, None to drop them
+        spool_max_bytes (int): maximum size of the spool file
+        url (str): push endpoint
+    """
+
+    def __init__(
+        self,
+        targets: list[PushTarget] | None = None,
+        workers: int = 8,
+        flush_interval: float = 15.0,
+        retries: int = 2,
+        timeout: float = 10.0,
+        spool: str | None = None,
+        spool_max_bytes: int = 10 * 1024 * 1024,
+        url: str = PUSH_URL,
+    ):
+        self.targets = {}
+        self._evaluators = {}
+        self.workers = max(1, workers)
+        self.flush_interval = flush_interval
+        self.retries = max(0, retries)
+        self.timeout = timeout
+        self.spool = spool
+        self.spool_max_bytes = spool_max_bytes
+        self.stats = {
+            "sent": 0,
+            "rejected": 0,
+            "failed": 0,
+            "spooled": 0,
+            "dropped": 0,
+            "invalid": 0,
+            "errors": 0,
+        }
+        self.last_error = None
+
+        parts = urlsplit(url)
+        self._scheme = parts.scheme
+        self._host = parts.netloc
+        self._path = parts.path or "/"
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._stop = threading.Event()
+        self._thread = None
+
+        for target in targets or ():
+            self.register(target.checkid, target.checktoken, target.fields)
+
+    def register(self, checkid: str, checktoken: str, fields: dict | None = None) -> None:
+        """Add or replace a PUSH check that samples can be submitted for."""
+        self.targets[checkid] = PushTarget(checkid, checktoken, fields or {})
+        self._evaluators[checkid] = compile_fields(fields or {})
+
+    def register_checks(self, checks: dict[str, dict]) -> int:
+        """Register every PUSH check in the output of `checks.get_all`.
+
+        Returns:
+            int: number of PUSH checks registered
+        """
+        registered = 0
+
+        for checkid, check in checks.items():
+            if not isinstance(check, dict) or check.get("type") != "PUSH":
+                continue
+
+            parameters = check.get("parameters", {})
+            checktoken = parameters.get("checktoken")
+
+            if checktoken:
+                self.register(checkid, checktoken, parameters.get("fields"))
+                registered += 1
+
+        return registered
+
+    def add(self, checkid: str, data: dict) -> list[str]:
+        """Queue a sample for a PUSH check.
+
+        Only the latest queued sample for each check is submitted on the
+        next flush.
+
+        Args:
+            checkid (str): ID of the PUSH check
+            data (dict): metrics matching the check's `fields`
+
+        Returns:
+            list: validation errors, empty if the sample was queued
+        """
+        evaluator = self._evaluators.get(checkid)
+
+        if evaluator is None:
+            errors = ["Unknown PUSH check: {}".format(checkid)]
+        else:
+            errors = _errors(evaluator, data)
+
+        with self._lock:
+            if errors:
+                self.stats["invalid"] += 1
+            else:
+                self._pending[checkid] = data
+
+        return errors
+
+    def add_many(self, samples: dict[str, dict]) -> dict[str, list[str]]:
+        """Queue samples for many checks.
+
+        Args:
+            samples (dict): check ID mapped to its sample
+
+        Returns:
+            dict: check ID mapped to validation errors, for invalid samples only
+        """
+        invalid = {}
+
+        for checkid, data in samples.items():
+            errors = self.add(checkid, data)
+            if errors:
+                invalid[checkid] = errors
+
+        return invalid
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+
+        if conn is None:
+            if self._scheme == "https":
+                conn = HTTPSConnection(self._host, timeout=self.timeout)
+            else:
+                conn = HTTPConnection(self._host, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+
+        return conn
+
+    def _send(self, checkid: str, data: dict) -> str:
+        """Submit one sample. Returns "sent", "rejected", or "failed"."""
+        target = self.targets.get(checkid)
+
+        if target is None:
+            return "rejected"
+
+        path = "{}?{}".format(
+            self._path, urlencode({"id": checkid, "checktoken": target.checktoken})
+        )
+        body = json.dumps({"data": data}).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+
+        for attempt in range(self.retries + 1):
+            conn = self._connection()
+
+            try:
+                conn.request("POST", path, body, headers)
+                response = conn.getresponse()
+                response.read()
+            except (HTTPException, OSError):
+                # drop the broken connection, the next attempt reconnects
+                conn.close()
+            else:
+                # only server errors and rate limiting are worth retrying
+                if response.status < 400:
+                    return "sent"
+                if response.status < 500 and response.status != 429:
+                    return "rejected"
+
+            if attempt < self.retries:
+                time.sleep(min(0.1 * 2**attempt, 2.0))
+
+        return "failed"
+
+    def _read_spool(self) -> tuple[dict[str, dict], str | None]:
+        """Move the spool file aside and read its samples.
+
+        The moved file is removed by `flush` once the samples were resent.
+        One left behind by an interrupted flush is read again first.
+
+        Returns:
+            tuple: the samples, and the path of the moved file or None
+        """
+        if not self.spool:
+            return {}, None
+
+        sending = self.spool + ".sending"
+
+        if not os.path.exists(sending):
+            try:
+                os.replace(self.spool, sending)
+            except FileNotFoundError:
+                return {}, None
+
+        samples = {}
+
+        with open(sending, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                    samples[entry["id"]] = entry["data"]
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+        return samples, sending
+
+    def _write_spool(self, failed: dict[str, dict]) -> None:
+        if not self.spool:
+            with self._lock:
+                self.stats["dropped"] += len(failed)
+            return
+
+        try:
+            size = os.path.getsize(self.spool)
+        except OSError:
+            size = 0
+
+        spooled = dropped = 0
+
+        with open(self.spool, "a", encoding="utf-8") as fh:
+            for checkid, data in failed.items():
+                line = json.dumps({"id": checkid, "data": data}) + "\n"
+
+                if size + len(line) > self.spool_max_bytes:
+                    dropped += 1
+                    continue
+
+                fh.write(line)
+                size += len(line)
+                spooled += 1
+
+        with self._lock:
+            self.stats["spooled"] += spooled
+            self.stats["dropped"] += dropped
+
+    def _submit(self, checkid: str, data: dict) -> str:
+        """`_send`, treating unexpected errors as a failed submission."""
+        try:
+            return self._send(checkid, data)
+        except Exception:
+            logger.exception("Submitting a PUSH sample for %s failed", checkid)
+            return "failed"
+
+    def flush(self) -> dict[str, int]:
+        """Submit all queued and spooled samples.
+
+        Samples rejected by NodePing, such as for an invalid checktoken,
+        are not retried. Samples that failed for other reasons are spooled.
+        If the spool cannot be written, they are queued again in memory
+        and the OSError is raised.
+
+        Returns:
+            dict: number of samples "sent", "rejected", and "failed" in this flush
+        """
+        with self._flush_lock:
+            spooled, sending = self._read_spool()
+
+            with self._lock:
+                pending, self._pending = self._pending, {}
+
+            # newer samples replace spooled ones for the same check
+            spooled.update(pending)
+            pending = spooled
+
+            counts = {"sent": 0, "rejected": 0, "failed": 0}
+            checkids = list(pending)
+            results = self._pool.map(
+                lambda checkid: self._submit(checkid, pending[checkid]), checkids
+            )
+            failed = {}
+
+            for checkid, result in zip(checkids, results):
+                counts[result] += 1
+                if result == "failed":
+                    failed[checkid] = pending[checkid]
+
+            with self._lock:
+                for key, value in counts.items():
+                    self.stats[key] += value
+
+            try:
+                if failed:
+                    self._write_spool(failed)
+            except OSError:
+                with self._lock:
+                    for checkid, data in failed.items():
+                        self._pending.setdefault(checkid, data)
+                raise
+            finally:
+                # every spooled sample was sent, spooled again, or requeued
+                if sending:
+                    os.remove(sending)
+
+            return counts
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as err:
+                logger.exception("Flushing PUSH samples failed")
+                with self._lock:
+                    self.stats["errors"] += 1
+                    self.last_error = err
+
+    def start(self) -> "PushClient":
+        """Start flushing queued samples from a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="nodeping-push", daemon=True
+            )
+            self._thread.start()
+
+        return self
+
+    def close(self) -> None:
+        """Stop the background thread, flush queued samples, and close connections."""
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+        self._pool.shutdown()
+
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+
+"""Reconcile contacts, contact groups, schedules, and notification profiles.
+
+Current state is fetched once for every module, diffed against the
+declared state using per-field hashes, and the resulting operations are
+applied in dependency order: schedules and contacts first, then contact
+groups, then notification profiles, with deletes last in reverse order.
+
+Declared state is a dict keyed by module name, with each entry keyed by
+its name:
+
+    desired = {
+        "schedules": {
+            "WorkDay": {"monday": {"time1": "6:00", "time2": "18:00"}, ...},
+        },
+        "contacts": {
+            "Bob Alice": {
+                "custrole": "edit",
+                "addresses": [{"address": "bob@example.com", "type": "email"}],
+            },
+        },
+        "contactgroups": {
+            "sysadmins": {"members": [("Bob Alice", "bob@example.com")]},
+        },
+        "notificationprofiles": {
+            "oncall": {
+                "notifications": [{"sysadmins": {"delay": 0, "schedule": "WorkDay"}}],
+            },
+        },
+    }
+
+Contact methods are referenced with a (contact name, address) tuple,
+and contact groups by their name. Existing IDs can also be used as is.
+
+Example:
+
+    from nodepingpy import reconcile
+
+    current = reconcile.fetch(token)
+    plan = reconcile.plan(desired, current, prune=True)
+    reconcile.apply(token, plan)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from . import _utils
+from . import contactgroups, contacts, notificationprofiles, schedules
+
+
+MODULES = ("schedules", "contacts", "contactgroups", "notificationprofiles")
+
+# creates and updates run in this order, deletes in the reverse order
+_PHASES = (("schedules", "contacts"), ("contactgroups",), ("notificationprofiles",))
+
+
+@dataclass
+class Operation:
+    """A single change to make.
+
+    Args:
+        module (str): "schedules", "contacts", "contactgroups", or "notificationprofiles"
+        action (str): "create", "update", or "delete"
+        name (str): name of the schedule, contact, group, or profile
+        id (str): ID of the existing entry, None when creating
+        data (dict): declared state, or the changes for contacts
+        changed (list): names of the fields that changed
+    """
+
+    module: str
+    action: str
+    name: str
+    id: str | None = None
+    data: dict = field(default_factory=dict)
+    changed: list = field(default_factory=list)
+
+
+@dataclass
+class ReconcilePlan:
+    """Operations needed to reach the declared state.
+
+    Args:
+        operations (list): Operation entries in the order they are applied
+        refs (dict): known references, used to resolve names to IDs
+    """
+
+    operations: list = field(default_factory=list)
+    refs: dict = field(default_factory=dict)
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        """Number of operations per module and action."""
+        counts = {}
+
+        for op in self.operations:
+            actions = counts.setdefault(op.module, {})
+            actions[op.action] = actions.get(op.action, 0) + 1
+
+        return counts
+
+
+def fetch(
+    token: str, customerid: str | None = None, modules: tuple = MODULES
+) -> dict[str, dict]:
+    """Fetch the current state of every module concurrently.
+
+    Args:
+        token (str): NodePing API token
+        customerid (str): subaccount ID
+        modules (tuple): names of the modules to fetch
+
+    Returns:
+        dict: module name mapped to the result of its `get_all`
+    """
+    getters = {
+        "schedules": schedules.get_all,
+        "contacts": contacts.get_all,
+        "contactgroups": contactgroups.get_all,
+        "notificationprofiles": notificationprofiles.get_all,
+    }
+
+    with ThreadPoolExecutor(max_workers=len(modules) or 1) as pool:
+        futures = {
+            module: pool.submit(getters[module], token, customerid=customerid)
+            for module in modules
+        }
+
+        return {module: future.result() for module, future in futures.items()}
+
+
+def _records(current: dict | None) -> dict:
+    """Drop anything that is not a record, such as an error response."""
+    if not isinstance(current, dict) or "error" in current:
+        return {}
+
+    return {k: v for k, v in current.items() if isinstance(v, dict)}
+
+
+def _by_name(records: dict) -> dict[str, tuple[str, dict]]:
+    """Index records by name, keeping the first of any duplicates."""
+    index = {}
+
+    for recordid, record in records.items():
+        index.setdefault(record.get("name"), (recordid, record))
+
+    return index
+
+
+def _resolve(ref: Any, refs: dict) -> str | None:
+    """Resolve a reference to a contact method or contact group ID."""
+    if isinstance(ref, tuple):
+        return refs["addresses"].get(ref)
+
+    return refs["groups"].get(ref, ref)
+
+
+def _resolve_members(members: list, refs: dict) -> list | None:
+    resolved = [_resolve(member, refs) for member in members]
+
+    return None if None in resolved else sorted(resolved)
+
+
+def _resolve_notifications(notifications: list, refs: dict) -> list | None:
+    resolved = []
+
+    for entry in notifications or ():
+        for ref, settings in entry.items():
+            key = _resolve(ref, refs)
+            if key is None:
+                return None
+            settings = settings or {}
+            resolved.append(
+                {
+                    key: {
+                        "delay": int(settings.get("delay") or 0),
+                        "schedule": settings.get("schedule") or "All",
+                    }
+                }
+            )
+
+    return sorted(resolved, key=lambda entry: next(iter(entry)))
+
+
+def _plan_schedules(desired: dict, current: dict, prune: bool) -> list[Operation]:
+    ops = []
+
+    for name, days in desired.items():
+        days = days.get("data", days)
+
+        if name not in current:
+            ops.append(Operation("schedules", "create", name, None, days))
+        elif _utils.record_hash(days) != _utils.record_hash(current[name]):
+            changed = [
+                day
+                for day in set(days) | set(current[name])
+                if _utils.record_hash(days.get(day))
+                != _utils.record_hash(current[name].get(day))
+            ]
+            ops.append(Operation("schedules", "update", name, name, days, sorted(changed)))
+
+    if prune:
+        ops.extend(
+            Operation("schedules", "delete", name, name)
+            for name in current
+            if name not in desired
+        )
+
+    return ops
+
+
+def _plan_contacts(desired: dict, current: dict, prune: bool) -> list[Operation]:
+    ops = []
+    existing = _by_name(current)
+
+    for name, declared in desired.items():
+        addresses = declared.get("addresses", [])
+
+        if name not in existing:
+            ops.append(Operation("contacts", "create", name, None, declared))
+            continue
+
+        contactid, contact = existing[name]
+        current_addresses = contact.get("addresses") or {}
+        by_address = {
+            entry.get("address"): (addressid, entry)
+            for addressid, entry in current_addresses.items()
+        }
+        changed = []
+        kept = {}
+        new = []
+
+        for address in addresses:
+            match = by_address.get(address.get("address"))
+
+            if match is None:
+                new.append(address)
+                continue
+
+            addressid, entry = match
+            merged = dict(entry)
+            merged.update(address)
+            kept[addressid] = merged
+
+            if any(
+                _utils.record_hash(value) != _utils.record_hash(entry.get(key))
+                for key, value in address.items()
+            ):
+                changed.append(addressid)
+
+        removed = [addressid for addressid in current_addresses if addressid not in kept]
+        update = {}
+
+        if "custrole" in declared and declared["custrole"] != contact.get("custrole"):
+            update["custrole"] = declared["custrole"]
+        if changed or removed or new:
+            update["addresses"] = kept
+        if new:
+            update["newaddresses"] = new
+
+        if update:
+            fields = sorted(update)
+            update["name"] = name
+            ops.append(Operation("contacts", "update", name, contactid, update, fields))
+
+    if prune:
+        ops.extend(
+            Operation("contacts", "delete", name, contactid)
+            for name, (contactid, _) in existing.items()
+            if name not in desired
+        )
+
+    return ops
+
+
+def _plan_named(
+    module: str,
+    key: str,
+    resolve,
+    desired: dict,
+    current: dict,
+    refs: dict,
+    prune: bool,
+) -> list[Operation]:
+    """Plan contact groups or notification profiles, which reference IDs."""
+    ops = []
+    existing = _by_name(current)
+
+    for name, declared in desired.items():
+        if not isinstance(declared, dict):
+            declared = {key: declared}
+
+        if name not in existing:
+            ops.append(Operation(module, "create", name, None, declared))
+            continue
+
+        recordid, record = existing[name]
+        wanted = resolve(declared.get(key, []), refs)
+        have = resolve(record.get(key, []), {"addresses": {}, "groups": {}})
+
+        # unresolved references point at entries that are not created yet
+        if wanted is None or _utils.record_hash(wanted) != _utils.record_hash(have):
+            ops.append(Operation(module, "update", name, recordid, declared, [key]))
+
+    if prune:
+        ops.extend(
+            Operation(module, "delete", name, recordid)
+            for name, (recordid, _) in existing.items()
+            if name not in desired
+        )
+
+    return ops
+
+
+def _build_refs(current: dict) -> dict:
+    refs = {"addresses": {}, "groups": {}}
+
+    for contact in _records(current.get("contacts")).values():
+        for addressid, entry in (contact.get("addresses") or {}).items():
+            refs["addresses"][(contact.get("name"), entry.get("address"))] = addressid
+
+    for groupid, group in _records(current.get("contactgroups")).items():
+        refs["groups"].setdefault(group.get("name"), groupid)
+
+    return refs
+
+
+def plan(desired: dict, current: dict, prune: bool = False) -> ReconcilePlan:
+    """Compute the operations needed to reach the declared state.
+
+    Only modules present in `desired` are managed.
+
+    Args:
+        desired (dict): declared state keyed by module name
+        current (dict): current state, as returned by `fetch`
+        prune (bool): delete entries of managed modules that are not declared
+
+    Returns:
+        ReconcilePlan: operations in the order they will be applied
+    """
+    refs = _build_refs(current)
+    planned = {
+        "schedules": lambda: _plan_schedules(
+            desired["schedules"], _records(current.get("schedules")), prune
+        ),
+        "contacts": lambda: _plan_contacts(
+            desired["contacts"], _records(current.get("contacts")), prune
+        ),
+        "contactgroups": lambda: _plan_named(
+            "contactgroups",
+            "members",
+            _resolve_members,
+            desired["contactgroups"],
+            _records(current.get("contactgroups")),
+            refs,
+            prune,
+        ),
+        "notificationprofiles": lambda: _plan_named(
+            "notificationprofiles",
+            "notifications",
+            _resolve_notifications,
+            desired["notificationprofiles"],
+            _records(current.get("notificationprofiles")),
+            refs,
+            prune,
+        ),
+    }
+    ops = [op for module in MODULES if module in desired for op in planned[module]()]
+    ops.sort(key=_phase)
+
+    return ReconcilePlan(ops, refs)
+
+
+def _phase(op: Operation) -> int:
+    """Index of the phase an operation runs in."""
+    for index, modules in enumerate(_PHASES):
+        if op.module in modules:
+            if op.action == "delete":
+                return 2 * len(_PHASES) - index
+            return index
+
+    return len(_PHASES)
+
+
+def _execute(token: str, op: Operation, refs: dict, customerid: str | None) -> dict:
+    """Run a single operation, resolving references with the IDs known so far."""
+    data = op.data
+
+    if op.action == "delete":
+        delete = {
+            "schedules": schedules.delete,
+            "contacts": contacts.delete_contact,
+            "contactgroups": contactgroups.delete,
+            "notificationprofiles": notificationprofiles.delete,
+        }[op.module]
+        return delete(token, op.id, customerid=customerid)
+
+    if op.module == "schedules":
+        call = schedules.create if op.action == "create" else schedules.update
+        return call(token, op.name, {"data": data}, customerid=customerid)
+
+    if op.module == "contacts":
+        if op.action == "create":
+            return contacts.create(
+                token,
+                customerid,
+                data.get("custrole", "view"),
+                op.name,
+                list(data.get("addresses", [])),
+            )
+        return contacts.update(token, op.id, dict(data), customerid=customerid)
+
+    if op.module == "contactgroups":
+        members = _resolve_members(data.get("members", []), refs)
+        if members is None:
+            return {"error": "Unresolved contact group members"}
+        if op.action == "create":
+            return contactgroups.create(token, op.name, members, customerid=customerid)
+        return contactgroups.update(
+            token, op.id, {"name": op.name, "members": members}, customerid=customerid
+        )
+
+    notifications = _resolve_notifications(data.get("notifications", []), refs)
+    if notifications is None:
+        return {"error": "Unresolved notification profile references"}
+    if op.action == "create":
+        return notificationprofiles.create(
+            token, op.name, notifications, customerid=customerid
+        )
+    return notificationprofiles.update(
+        token, op.id, op.name, notifications, customerid=customerid
+    )
+
+
+def _learn(op: Operation, response: dict, refs: dict) -> None:
+    """Record IDs from a response so later phases can reference them."""
+    if not isinstance(response, dict) or "error" in response:
+        return
+
+    if op.module == "contacts":
+        for addressid, entry in (response.get("addresses") or {}).items():
+            if isinstance(entry, dict):
+                refs["addresses"][(op.name, entry.get("address"))] = addressid
+    elif op.module == "contactgroups" and response.get("_id"):
+        refs["groups"][op.name] = response["_id"]
+
+
+def apply(
+    token: str,
+    reconcileplan: ReconcilePlan,
+    workers: int = 8,
+    customerid: str | None = None,
+) -> list[tuple[Operation, dict]]:
+    """Apply a plan, one dependency phase at a time.
+
+    Operations within a phase run concurrently. IDs of created contact
+    methods and contact groups are used to resolve references in the
+    phases after them.
+
+    Args:
+        token (str): NodePing API token
+        reconcileplan (ReconcilePlan): result of `plan`
+        workers (int): number of API calls made at the same time
+        customerid (str): subaccount ID
+
+    Returns:
+        list: (operation, API response) for every operation
+    """
+    refs = {
+        "addresses": dict(reconcileplan.refs.get("addresses", {})),
+        "groups": dict(reconcileplan.refs.get("groups", {})),
+    }
+    phases = []
+
+    for op in reconcileplan.operations:
+        phase = _phase(op)
+        if not phases or phases[-1][0] != phase:
+            phases.append((phase, []))
+        phases[-1][1].append(op)
+
+    def run(op):
+        try:
+            return _execute(token, op, refs, customerid)
+        except (OSError, ValueError) as err:
+            return {"error": str(err)}
+
+    results = []
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for _, ops in phases:
+            for op, response in zip(ops, pool.map(run, ops)):
+                _learn(op, response, refs)
+                results.append((op, response))
+
+    return results
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+
+"""Compact objects for API responses.
+
+Responses are described by the TypedDicts in `nptypes`, but returned as
+plain dicts, which hold a hash table per record. The classes here are
+generated from those TypedDicts with `__slots__`, so each record keeps
+only its values, and fields are read as attributes. Keys the TypedDict
+does not declare are kept in `extra`, so nothing in the response is
+lost. Fields missing from the response are None.
+
+Records can still be read like the dicts they replace with `record["label"]`
+or `record.get("label")`, and `to_dict` converts them back.
+
+The record classes are generated the first time they are used, so
+importing this module does not load the `nptypes` definitions.
+
+Example:
+
+    from nodepingpy import checks
+
+    allchecks = checks.get_all(token, typed=True)
+    for checkid, check in allchecks.items():
+        print(check.label, check.parameters["target"])
+"""
+
+import sys
+import threading
+import typing
+
+from . import codec
+
+
+_RESERVED = frozenset(("extra", "get", "keys", "items", "to_dict", "from_dict"))
+
+# Responses with at least this many records are converted with garbage
+# collection paused, see `codec.gc_paused`. None never pauses it.
+GC_PAUSE_RECORDS = None
+
+
+class Record:
+    """Base class of the generated record classes."""
+
+    __slots__ = ("extra",)
+
+    _fields: tuple = ()
+    _field_set: frozenset = frozenset()
+
+    def __getitem__(self, key: str):
+        if key in self._field_set:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._field_set:
+            return getattr(self, key) is not None
+
+        return bool(self.extra) and key in self.extra
+
+    def get(self, key: str, default=None):
+        """Value of a field or extra key, like `dict.get`."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> list[str]:
+        """Names of the fields and extra keys that have values."""
+        return list(self.to_dict())
+
+    def items(self) -> list[tuple]:
+        """(name, value) pairs of the fields and extra keys that have values."""
+        return list(self.to_dict().items())
+
+    def to_dict(self) -> dict:
+        """The record as the dict it was decoded from."""
+        data = {}
+
+        for name in self._fields:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+
+        if self.extra:
+            data.update(self.extra)
+
+        return data
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join("{}={!r}".format(k, v) for k, v in self.to_dict().items())
+
+        return "{}({})".format(type(self).__name__, fields)
+
+
+def record_class(
+    typeddict: type, name: str | None = None, shared: tuple[str, ...] = ()
+) -> type:
+    """Generate a slotted Record class from a TypedDict.
+
+    The class has a `from_dict` class method, compiled for the TypedDict's
+    keys so a record is built in a single pass over them.
+
+    Args:
+        typeddict (type): a TypedDict class, including inherited keys
+        name (str): name of the class, defaults to the TypedDict's name + "Record"
+        shared (tuple): string fields with few distinct values, such as
+            "type", which are interned so every record shares one copy
+
+    Returns:
+        type: the generated Record subclass
+    """
+    fields = tuple(typing.get_type_hints(typeddict))
+    clashes = _RESERVED.intersection(fields)
+
+    if clashes:
+        raise ValueError(
+            "{} has keys that clash with Record: {}".format(
+                typeddict.__name__, ", ".join(sorted(clashes))
+            )
+        )
+
+    name = name or "{}Record".format(typeddict.__name__)
+    cls = type(
+        name,
+        (Record,),
+        {
+            "__slots__": fields,
+            "__doc__": "Record for `{}.{}`.".format(
+                typeddict.__module__.rsplit(".", 1)[-1], typeddict.__name__
+            ),
+            "__module__": __name__,
+            "_fields": fields,
+            "_field_set": frozenset(fields),
+        },
+    )
+
+    lines = [
+        "def from_dict(cls, data):",
+        "    self = new(cls)",
+        "    get = data.get",
+    ]
+    for field in fields:
+        if field in shared:
+            lines.append("    value = get({!r})".format(field))
+            lines.append(
+                "    self.{} = intern(value) if value.__class__ is str else value".format(
+                    field
+                )
+            )
+        else:
+            lines.append("    self.{0} = get({0!r})".format(field))
+    lines.extend(
+        [
+            "    if data.keys() <= field_set:",
+            "        self.extra = None",
+            "    else:",
+            "        self.extra = {k: v for k, v in data.items() if k not in field_set}",
+            "    return self",
+        ]
+    )
+    namespace = {
+        "new": object.__new__,
+        "intern": sys.intern,
+        "field_set": cls._field_set,
+    }
+    exec("\n".join(lines), namespace)
+    from_dict = namespace["from_dict"]
+    from_dict.__doc__ = "Build a record from a response dict."
+    cls.from_dict = classmethod(from_dict)
+
+    return cls
+
+
+_CHECK_SHARED = ("customer_id", "enable", "queue", "status", "type")
+
+# Record classes generated on first use: name -> (nptypes module, TypedDict, shared)
+RECORDS = {
+    "CheckRecord": ("checktypes", "GetCheck", _CHECK_SHARED),
+    "CheckUptimeRecord": ("checktypes", "GetCheckUptime", _CHECK_SHARED),
+    "ModifiedCheckRecord": ("checktypes", "ModifiedCheck", _CHECK_SHARED),
+    "ContactRecord": ("contacttypes", "Contact", ("customer_id", "custrole", "type")),
+}
+_records_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> type:
+    if name not in RECORDS:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    with _records_lock:
+        cls = globals().get(name)
+        if cls is None:
+            module, typeddict, shared = RECORDS[name]
+            fullname = "{}.nptypes.{}".format(__package__, module)
+            __import__(fullname)
+            types = sys.modules[fullname]
+            cls = globals()[name] = record_class(getattr(types, typeddict), name, shared)
+
+    return cls
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(RECORDS))
+
+
+def decode(data: dict, cls: type):
+    """Convert one response dict to a record of `cls`.
+
+    Error responses are returned unchanged.
+    """
+    if not isinstance(data, dict) or "error" in data:
+        return data
+
+    return cls.from_dict(data)
+
+
+def decode_all(data: dict, cls: type) -> dict:
+    """Convert a response mapping IDs to dicts into IDs mapped to records.
+
+    Error responses are returned unchanged.
+    """
+    if not isinstance(data, dict) or "error" in data:
+        return data
+
+    from_dict = cls.from_dict
+
+    if GC_PAUSE_RECORDS is None or len(data) < GC_PAUSE_RECORDS:
+        return {key: from_dict(value) for key, value in data.items()}
+
+    with codec.gc_paused():
+        return {key: from_dict(value) for key, value in data.items()}
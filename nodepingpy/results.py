@@ -6,6 +6,10 @@ from .nptypes import resulttypes
 from ._utils import API_URL
 
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = ("get", "get_current", "get_summary")
+
+
 def get(token: str, id: str, args, customerid: str | None = None) -> dict:
     """ 
     https://nodeping.com/docs-api-results.html#get
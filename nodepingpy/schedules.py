@@ -2,13 +2,40 @@
 
 """
 Get, create, update, and delete schedules for notifications.
+
+Schedules can also be compiled locally into a per-week minute table
+to answer whether a schedule is active at a given time without
+querying the API.
 """
 
+from copy import deepcopy
+from dataclasses import dataclass
+
 from . import _utils
 from ._utils import API_URL
 
 ROUTE = "schedules"
 
+# Functions that make API calls, wrapped in spans by `tracing`
+API_FUNCTIONS = ("get_all", "get", "create", "update", "delete")
+
+DAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+MINUTES_PER_DAY = 1440
+MINUTES_PER_WEEK = MINUTES_PER_DAY * 7
+
+# The unix epoch started on a Thursday, 3 days after a Monday
+_EPOCH_MINUTE_OF_WEEK = 3 * MINUTES_PER_DAY
+
+_compiled: dict[str, "CompiledSchedule"] = {}
+
 
 def get_all(token, customerid: str | None = None) -> dict:
     """ """
@@ -105,3 +132,181 @@ def delete(token: str, schedule: str, customerid: str | None = None) -> dict:
     data = _utils.add_custid({"token": token}, customerid)
 
     return _utils.delete("{}/{}/{}".format(API_URL, ROUTE, schedule), data)
+
+
+@dataclass(frozen=True)
+class CompiledSchedule:
+    """A notification schedule compiled into a per-week minute table.
+
+    Args:
+        name (str): name of the schedule
+        minutes (bytes): one byte per minute of the week starting Monday 00:00,
+            1 if notifications are sent during that minute, 0 if not
+        source (dict): a copy of the per-day schedule the table was compiled from
+    """
+
+    name: str
+    minutes: bytes
+    source: dict
+
+    def is_active(self, timestamp: int, offset: float = 0) -> bool:
+        """Whether the schedule is active at a millisecond timestamp."""
+        return self.minutes[_minute_of_week(timestamp, offset)] == 1
+
+
+def _parse_time(value: str) -> int:
+    """Convert a 24-hour "H:MM" string into minutes since midnight."""
+    hours, _, minutes = value.partition(":")
+
+    return min(int(hours) * 60 + int(minutes or 0), MINUTES_PER_DAY)
+
+
+def week_shift(offset: float = 0) -> int:
+    """Minutes to add to minutes since the epoch to get the minute of the week.
+
+    `(timestamp // 60000 + week_shift(offset)) % MINUTES_PER_WEEK` indexes
+    `CompiledSchedule.minutes` for a millisecond timestamp.
+
+    Args:
+        offset (float): account timezone offset in hours, such as -7.0
+
+    Returns:
+        int: minutes to shift by
+    """
+    return int(offset * 60) + _EPOCH_MINUTE_OF_WEEK
+
+
+def _minute_of_week(timestamp: int, offset: float = 0) -> int:
+    """Minute of the week (Monday 00:00 is 0) for a millisecond timestamp."""
+    return (timestamp // 60000 + week_shift(offset)) % MINUTES_PER_WEEK
+
+
+def _compile_day(day: dict | None) -> bytes:
+    """Compile the settings for one day into a 1440 byte table."""
+    if not day or day.get("disabled"):
+        return bytes(MINUTES_PER_DAY)
+    if day.get("allday"):
+        return b"\x01" * MINUTES_PER_DAY
+    if "time1" not in day or "time2" not in day:
+        return bytes(MINUTES_PER_DAY)
+
+    start = _parse_time(day["time1"])
+    end = _parse_time(day["time2"])
+    table = bytearray(MINUTES_PER_DAY)
+
+    if start <= end:
+        table[start:end] = b"\x01" * (end - start)
+    else:
+        # the time span wraps past midnight within the same day
+        table[start:] = b"\x01" * (MINUTES_PER_DAY - start)
+        table[:end] = b"\x01" * end
+
+    if day.get("exclude"):
+        table = table.translate(bytes([1, 0]) + bytes(254))
+
+    return bytes(table)
+
+
+def compile_schedule(
+    name: str, schedule: dict, cache: bool = True
+) -> CompiledSchedule:
+    """Compile a schedule into a per-week minute table.
+
+    Compiled schedules are cached by name, and the cached schedule
+    is returned as long as the schedule contents have not changed.
+    The cache keeps its own copy of the contents, so changing the
+    schedule dict afterwards recompiles it on the next call.
+
+    Args:
+        name (str): The name of the schedule
+        schedule (dict): per-day settings, as returned by `get`, or wrapped
+            in a `data` key as passed to `create`
+        cache (bool): look up and store the compiled schedule in the cache
+
+    Returns:
+        CompiledSchedule: compiled schedule
+    """
+    days = schedule.get("data", schedule)
+    cached = _compiled.get(name) if cache else None
+
+    if cached is not None and cached.source == days:
+        return cached
+
+    minutes = b"".join(_compile_day(days.get(day)) for day in DAYS)
+    compiled = CompiledSchedule(name, minutes, deepcopy(days))
+
+    if cache:
+        _compiled[name] = compiled
+
+    return compiled
+
+
+def compile_all(
+    schedules: dict[str, dict], cache: bool = True
+) -> dict[str, CompiledSchedule]:
+    """Compile every schedule returned by `get_all`.
+
+    Args:
+        schedules (dict): schedule names mapped to their per-day settings
+        cache (bool): look up and store the compiled schedules in the cache
+
+    Returns:
+        dict: schedule names mapped to their compiled schedule
+    """
+    return {
+        name: compile_schedule(name, schedule, cache)
+        for name, schedule in schedules.items()
+    }
+
+
+def get_compiled(name: str) -> CompiledSchedule | None:
+    """Get a previously compiled schedule by name, or None."""
+    return _compiled.get(name)
+
+
+def clear_compiled() -> None:
+    """Remove all cached compiled schedules."""
+    _compiled.clear()
+
+
+def is_active(
+    schedule: CompiledSchedule | str, timestamp: int, offset: float = 0
+) -> bool:
+    """Whether notifications would be sent at the specified time.
+
+    Args:
+        schedule (CompiledSchedule|str): compiled schedule or name of a cached one
+        timestamp (int): millisecond epoch timestamp (UTC)
+        offset (float): account timezone offset in hours, such as -7.0
+
+    Returns:
+        bool: True if the schedule is active at the timestamp
+    """
+    if isinstance(schedule, str):
+        schedule = _compiled[schedule]
+
+    return schedule.minutes[_minute_of_week(timestamp, offset)] == 1
+
+
+def is_active_many(
+    schedule: CompiledSchedule | str, timestamps, offset: float = 0
+) -> list[bool]:
+    """Evaluate a schedule for many timestamps at once.
+
+    Args:
+        schedule (CompiledSchedule|str): compiled schedule or name of a cached one
+        timestamps (iterable): millisecond epoch timestamps (UTC)
+        offset (float): account timezone offset in hours, such as -7.0
+
+    Returns:
+        list: True/False for each timestamp, in the same order
+    """
+    if isinstance(schedule, str):
+        schedule = _compiled[schedule]
+
+    minutes = schedule.minutes
+    shift = week_shift(offset)
+
+    return [
+        minutes[(ts // 60000 + shift) % MINUTES_PER_WEEK] == 1 for ts in timestamps
+    ]
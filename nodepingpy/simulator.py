@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+
+"""Simulate which contacts would have been notified for check events.
+
+Replays down events, such as those fetched with `results.get` and
+`resulttypes.Events`, against the notification settings of checks,
+notification profiles, contact groups, and schedules, and computes the
+notification timeline offline.
+
+Example:
+
+    from nodepingpy import checks, contactgroups, notificationprofiles
+    from nodepingpy import results, schedules, simulator
+    from nodepingpy.nptypes.resulttypes import Events
+
+    allchecks = checks.get_all(token)
+    events = {
+        checkid: results.get(token, checkid, Events(start="2024-03-01"))
+        for checkid in allchecks
+    }
+    timeline = simulator.simulate(
+        events,
+        allchecks,
+        schedules=schedules.get_all(token),
+        contactgroups=contactgroups.get_all(token),
+        profiles=notificationprofiles.get_all(token),
+        offset=-7,
+    )
+"""
+
+from bisect import bisect_right
+from operator import itemgetter
+from typing import NamedTuple
+
+from . import schedules as _schedules
+
+
+class SimulatedNotification(NamedTuple):
+    """A notification that would have been sent.
+
+    Args:
+        time (int): millisecond timestamp the notification would be sent
+        checkid (str): check ID the event belongs to
+        contact (str): contact method (address) ID that would be notified
+        kind (str): "down" for the failure notification, "up" for the recovery
+        schedule (str): name of the schedule that allowed the notification
+    """
+
+    time: int
+    checkid: str
+    contact: str
+    kind: str
+    schedule: str
+
+
+class _Target(NamedTuple):
+    contact: str
+    delay: int
+    schedule: str
+    minutes: bytes | None
+
+
+def _notification_entries(notifications: list | dict | None):
+    """Yield (id, settings) pairs from a check or profile notifications list."""
+    if not notifications:
+        return
+    if isinstance(notifications, dict):
+        notifications = [notifications]
+
+    for entry in notifications:
+        for key, settings in entry.items():
+            yield key, settings or {}
+
+
+def _resolve_targets(
+    notifications: list | dict | None,
+    groups: dict[str, list[str]],
+    profiles: dict[str, list],
+    compiled: dict[str, _schedules.CompiledSchedule],
+) -> tuple[_Target, ...]:
+    """Expand notification profiles and contact groups into contact targets."""
+    targets = {}
+
+    def add(key, settings, depth=0):
+        if key in profiles and depth == 0:
+            for pkey, psettings in _notification_entries(profiles[key]):
+                add(pkey, psettings, depth + 1)
+            return
+
+        delay = int(settings.get("delay") or 0) * 60000
+        schedule = settings.get("schedule") or "All"
+        schedule_obj = compiled.get(schedule)
+        minutes = schedule_obj.minutes if schedule_obj else None
+
+        for contact in groups.get(key, (key,)):
+            previous = targets.get(contact)
+            # keep the earliest notification for contacts listed more than once
+            if previous is None or delay < previous.delay:
+                targets[contact] = _Target(contact, delay, schedule, minutes)
+
+    for key, settings in _notification_entries(notifications):
+        add(key, settings)
+
+    return tuple(targets.values())
+
+
+def _down_intervals(events: list | dict) -> list[tuple[int, int | None]]:
+    """Get sorted (start, end) pairs for the down events of a check."""
+    if isinstance(events, dict):
+        events = events.values()
+
+    intervals = []
+
+    for event in events:
+        try:
+            if event.get("type", "down") != "down":
+                continue
+            start = int(event["start"])
+            end = event.get("end")
+            intervals.append((start, None if end is None else int(end)))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+
+    intervals.sort(key=lambda interval: interval[0])
+
+    return intervals
+
+
+def simulate(
+    events: dict[str, list],
+    checks: dict[str, dict],
+    schedules: dict[str, dict] | None = None,
+    contactgroups: dict[str, dict] | None = None,
+    profiles: dict[str, dict] | None = None,
+    offset: float = 0,
+    until: int | None = None,
+    dependencies: bool = True,
+) -> list[SimulatedNotification]:
+    """Compute the notifications that would be sent for historical events.
+
+    A down notification is sent to a contact once the event has lasted
+    for the contact's `delay` (in minutes) and the contact's schedule is
+    active at that time. A recovery notification is sent at the end of
+    the event to every contact that got the down notification, if their
+    schedule is active. Schedules that are not found, such as the built-in
+    "All" schedule, are treated as always active.
+
+    Args:
+        events (dict): check IDs mapped to their events from `results.get`
+        checks (dict): checks from `checks.get_all`
+        schedules (dict): schedules from `schedules.get_all`
+        contactgroups (dict): contact groups from `contactgroups.get_all`
+        profiles (dict): notification profiles from `notificationprofiles.get_all`
+        offset (float): account timezone offset in hours, such as -7.0
+        until (int): millisecond timestamp used as the end of ongoing events
+        dependencies (bool): suppress notifications while the check's `dep` check is down
+
+    Returns:
+        list: SimulatedNotification tuples sorted by time
+    """
+    compiled = _schedules.compile_all(schedules or {}, cache=False)
+    groups = {
+        groupid: group.get("members", [])
+        for groupid, group in (contactgroups or {}).items()
+    }
+    profile_notifications = {
+        profileid: profile.get("notifications", [])
+        for profileid, profile in (profiles or {}).items()
+    }
+
+    down = {checkid: _down_intervals(evts) for checkid, evts in events.items()}
+    dep_index = {
+        checkid: (
+            [start for start, _ in intervals],
+            [end for _, end in intervals],
+        )
+        for checkid, intervals in down.items()
+        if intervals
+    }
+
+    def dep_down(dep: str, time: int) -> bool:
+        index = dep_index.get(dep)
+        if index is None:
+            return False
+        starts, ends = index
+        i = bisect_right(starts, time) - 1
+        # down events of a single check do not overlap
+        return i >= 0 and (ends[i] is None or ends[i] > time)
+
+    shift = _schedules.week_shift(offset)
+    week = _schedules.MINUTES_PER_WEEK
+    resolved = {}
+    timeline = []
+    append = timeline.append
+    notification = SimulatedNotification
+
+    for checkid, intervals in down.items():
+        if not intervals:
+            continue
+
+        check = checks.get(checkid, {})
+        notifications = check.get("notifications")
+        cache_key = repr(notifications)
+        targets = resolved.get(cache_key)
+
+        if targets is None:
+            targets = _resolve_targets(
+                notifications, groups, profile_notifications, compiled
+            )
+            resolved[cache_key] = targets
+
+        if not targets:
+            continue
+
+        dep = check.get("dep") if dependencies else None
+
+        for start, end in intervals:
+            if end is None:
+                end = until
+            dep_checked = None
+
+            for contact, delay, schedule, minutes in targets:
+                sendtime = start + delay
+
+                if end is not None and sendtime >= end:
+                    continue
+                if until is not None and sendtime > until:
+                    continue
+                if (
+                    minutes is not None
+                    and not minutes[(sendtime // 60000 + shift) % week]
+                ):
+                    continue
+                if dep:
+                    # targets with the same delay share the dependency lookup
+                    if dep_checked is None or dep_checked[0] != sendtime:
+                        dep_checked = (sendtime, dep_down(dep, sendtime))
+                    if dep_checked[1]:
+                        continue
+
+                append(notification(sendtime, checkid, contact, "down", schedule))
+
+                if end is None or (until is not None and end >= until):
+                    continue
+                if minutes is None or minutes[(end // 60000 + shift) % week]:
+                    append(notification(end, checkid, contact, "up", schedule))
+
+    timeline.sort(key=itemgetter(0))
+
+    return timeline
+
+
+def by_contact(
+    timeline: list[SimulatedNotification],
+) -> dict[str, list[SimulatedNotification]]:
+    """Group a simulated timeline by the contact that would be notified.
+
+    Args:
+        timeline (list): result of `simulate`
+
+    Returns:
+        dict: contact method IDs mapped to their notifications, sorted by time
+    """
+    contacts = {}
+
+    for notification in timeline:
+        contacts.setdefault(notification.contact, []).append(notification)
+
+    return contacts
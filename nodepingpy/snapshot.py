@@ -0,0 +1,563 @@
+# -*- coding: utf-8 -*-
+
+"""Export an entire account to a compressed snapshot and restore it.
+
+A snapshot holds the output of `get_all` for checks, contacts, contact
+groups, schedules, maintenance, and notification profiles, fetched
+concurrently and stored as gzip compressed JSON with a format version.
+
+Restoring creates everything again in another account or subaccount,
+in dependency order and with concurrent API calls, remapping the IDs
+that entries reference, such as contact methods in `notifications`,
+contact group members, check `dep`, cluster `data`, and maintenance
+`checklist`.
+
+Two outputs of a `get_all` function can be compared with `diff`, and two
+snapshots with `diff_snapshots`, to find the records that were added,
+removed, or changed, down to the individual fields.
+
+Example:
+
+    from nodepingpy import snapshot
+
+    snapshot.export(token, "account.json.gz")
+    snap = snapshot.load("account.json.gz")
+    idmap = snapshot.restore(token, snap, customerid="201205050153W2Q4C")
+    changes = snapshot.diff_snapshots(snapshot.load("yesterday.json.gz"), snap)
+"""
+
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+from typing import Iterator, NamedTuple
+
+from . import _utils, codec
+from . import checkplan, checks, contactgroups, contacts, maintenance
+from . import notificationprofiles, schedules
+from .nptypes import maintenancetypes
+
+
+FORMAT = "nodepingpy-snapshot"
+VERSION = 1
+
+# Modules in a snapshot, each fetched with its `get_all`. The function is
+# looked up when the snapshot is taken, so calls are traced once
+# `tracing.enable` has wrapped it.
+MODULES = {
+    "checks": checks,
+    "contacts": contacts,
+    "contactgroups": contactgroups,
+    "schedules": schedules,
+    "maintenance": maintenance,
+    "notificationprofiles": notificationprofiles,
+}
+
+# Fields that change on their own and are left out of diffs by default
+VOLATILE = frozenset(
+    ("modified", "state", "firstdown", "queue", "uptime", "change", "status")
+)
+
+# Fields of a contact method that are set by NodePing rather than by you
+_ADDRESS_READ_ONLY = ("status",)
+
+
+def take(token: str, customerid: str | None = None, workers: int = 6) -> dict:
+    """Fetch every module concurrently into a snapshot dict.
+
+    Args:
+        token (str): NodePing API token
+        customerid (str): subaccount ID
+        workers (int): number of modules fetched at the same time
+
+    Returns:
+        dict: snapshot with "format", "version", "created", "customerid", and "data"
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            name: pool.submit(module.get_all, token, customerid=customerid)
+            for name, module in MODULES.items()
+        }
+        data = {name: future.result() for name, future in futures.items()}
+
+    return {
+        "format": FORMAT,
+        "version": VERSION,
+        "created": int(time() * 1000),
+        "customerid": customerid,
+        "data": data,
+    }
+
+
+def dump(snap: dict, path: str, compresslevel: int = 6) -> None:
+    """Write a snapshot to a gzip compressed JSON file."""
+    encoded = codec.dumps(snap)
+
+    with gzip.open(path, "wb", compresslevel=compresslevel) as fh:
+        fh.write(encoded)
+
+
+def load(path: str) -> dict:
+    """Read a snapshot written by `dump` or `export`.
+
+    Raises:
+        ValueError: the file is not a snapshot, or is a newer version
+    """
+    with gzip.open(path, "rb") as fh:
+        snap = codec.loads(fh.read())
+
+    if not isinstance(snap, dict) or snap.get("format") != FORMAT:
+        raise ValueError("Not a nodepingpy snapshot: {}".format(path))
+    if snap.get("version", 0) > VERSION:
+        raise ValueError("Unsupported snapshot version: {}".format(snap["version"]))
+
+    return snap
+
+
+def export(
+    token: str,
+    path: str,
+    customerid: str | None = None,
+    workers: int = 6,
+    compresslevel: int = 6,
+) -> dict:
+    """Take a snapshot of an account and write it to a file.
+
+    Args:
+        token (str): NodePing API token
+        path (str): file to write the gzip compressed snapshot to
+        customerid (str): subaccount ID
+        workers (int): number of modules fetched at the same time
+        compresslevel (int): gzip compression level, 1 is fastest
+
+    Returns:
+        dict: the snapshot that was written
+    """
+    snap = take(token, customerid, workers)
+    dump(snap, path, compresslevel)
+
+    return snap
+
+
+def _records(snap: dict, module: str) -> dict:
+    data = snap.get("data", {}).get(module)
+
+    if not isinstance(data, dict) or "error" in data:
+        return {}
+
+    return {k: v for k, v in data.items() if isinstance(v, dict)}
+
+
+def _new_id(response) -> str | None:
+    if isinstance(response, dict) and "error" not in response:
+        return response.get("_id") or response.get("id")
+
+    return None
+
+
+def _remap_notifications(notifications, idmap: dict) -> list:
+    remapped = []
+
+    for entry in notifications or ():
+        remapped.append({idmap.get(key, key): settings for key, settings in entry.items()})
+
+    return remapped
+
+
+def _run_all(pool, func, items: dict) -> dict:
+    """Run func(key, value) for every item concurrently, catching network errors."""
+
+    def run(key, value):
+        try:
+            return func(key, value)
+        except (OSError, ValueError) as err:
+            return {"error": str(err)}
+
+    futures = {key: pool.submit(run, key, value) for key, value in items.items()}
+
+    return {key: future.result() for key, future in futures.items()}
+
+
+def restore(
+    token: str,
+    snap: dict,
+    customerid: str | None = None,
+    workers: int = 16,
+) -> dict:
+    """Create everything in a snapshot in an account or subaccount.
+
+    Entries are created in dependency order: schedules and contacts,
+    contact groups, notification profiles, checks (clusters after their
+    members), and finally scheduled maintenance. Each step runs its API
+    calls concurrently. Check dependencies are set once every check exists.
+    Ad-hoc maintenance is not restored.
+
+    Args:
+        token (str): NodePing API token
+        snap (dict): snapshot from `take` or `load`
+        customerid (str): subaccount ID to restore into
+        workers (int): number of API calls made at the same time
+
+    Returns:
+        dict: old IDs mapped to new IDs for each module, plus "errors" with
+            (module, old ID, response) for every failed call
+    """
+    idmap = {
+        "contacts": {},
+        "addresses": {},
+        "contactgroups": {},
+        "notificationprofiles": {},
+        "checks": {},
+        "maintenance": {},
+        "errors": [],
+    }
+    errors = idmap["errors"]
+    # check notifications may reference contact methods, groups, or profiles
+    references = {}
+
+    def record(module, responses, mapping):
+        for oldid, response in responses.items():
+            newid = _new_id(response)
+            if newid:
+                mapping[oldid] = newid
+            else:
+                errors.append((module, oldid, response))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        schedule_data = _records(snap, "schedules")
+        responses = _run_all(
+            pool,
+            lambda name, days: schedules.create(
+                token, name, {"data": days.get("data", days)}, customerid=customerid
+            ),
+            schedule_data,
+        )
+        errors.extend(
+            ("schedules", name, response)
+            for name, response in responses.items()
+            if not isinstance(response, dict) or "error" in response
+        )
+
+        contact_data = _records(snap, "contacts")
+
+        def create_contact(_, contact):
+            addresses = [
+                {k: v for k, v in address.items() if k not in _ADDRESS_READ_ONLY}
+                for address in (contact.get("addresses") or {}).values()
+            ]
+            return contacts.create(
+                token,
+                customerid,
+                contact.get("custrole", "view"),
+                contact.get("name", ""),
+                addresses,
+            )
+
+        responses = _run_all(pool, create_contact, contact_data)
+        record("contacts", responses, idmap["contacts"])
+
+        for oldid, response in responses.items():
+            if oldid not in idmap["contacts"]:
+                continue
+            new_addresses = {
+                (entry.get("type"), entry.get("address")): addressid
+                for addressid, entry in (response.get("addresses") or {}).items()
+                if isinstance(entry, dict)
+            }
+            for old_addressid, entry in (
+                contact_data[oldid].get("addresses") or {}
+            ).items():
+                newid = new_addresses.get((entry.get("type"), entry.get("address")))
+                if newid:
+                    idmap["addresses"][old_addressid] = newid
+
+        references.update(idmap["addresses"])
+
+        responses = _run_all(
+            pool,
+            lambda _, group: contactgroups.create(
+                token,
+                group.get("name", ""),
+                [references.get(m, m) for m in group.get("members", [])],
+                customerid=customerid,
+            ),
+            _records(snap, "contactgroups"),
+        )
+        record("contactgroups", responses, idmap["contactgroups"])
+        references.update(idmap["contactgroups"])
+
+        responses = _run_all(
+            pool,
+            lambda _, profile: notificationprofiles.create(
+                token,
+                profile.get("name", ""),
+                _remap_notifications(profile.get("notifications"), references),
+                customerid=customerid,
+            ),
+            _records(snap, "notificationprofiles"),
+        )
+        record("notificationprofiles", responses, idmap["notificationprofiles"])
+        references.update(idmap["notificationprofiles"])
+
+        check_data = _records(snap, "checks")
+
+        def create_check(_, check):
+            data = checkplan.normalize_existing(check)
+            data.pop("dep", None)
+            data["notifications"] = _remap_notifications(
+                data.get("notifications"), references
+            )
+            if data.get("type") == "CLUSTER" and isinstance(data.get("data"), dict):
+                data["data"] = {
+                    idmap["checks"].get(k, k): v for k, v in data["data"].items()
+                }
+            return checks.create_check(token, data, customerid=customerid)
+
+        # clusters reference their member checks, so they are created last
+        members = {k: v for k, v in check_data.items() if v.get("type") != "CLUSTER"}
+        clusters = {k: v for k, v in check_data.items() if v.get("type") == "CLUSTER"}
+
+        for group in (members, clusters):
+            record("checks", _run_all(pool, create_check, group), idmap["checks"])
+
+        dependencies = {
+            idmap["checks"][oldid]: (check.get("type"), idmap["checks"].get(check["dep"]))
+            for oldid, check in check_data.items()
+            if check.get("dep") and oldid in idmap["checks"]
+        }
+        responses = _run_all(
+            pool,
+            lambda newid, value: checks.update_check(
+                token, newid, value[0], {"dep": value[1]}, customerid=customerid
+            ),
+            {k: v for k, v in dependencies.items() if v[1]},
+        )
+        errors.extend(
+            ("checks", newid, response)
+            for newid, response in responses.items()
+            if not isinstance(response, dict) or "error" in response
+        )
+
+        scheduled = {
+            k: v for k, v in _records(snap, "maintenance").items() if v.get("cron")
+        }
+        responses = _run_all(
+            pool,
+            lambda _, entry: maintenance.create(
+                token,
+                maintenancetypes.ScheduledCreate(
+                    entry.get("duration", 0),
+                    [idmap["checks"].get(c, c) for c in entry.get("checklist", [])],
+                    entry.get("enabled", True),
+                    entry.get("name", ""),
+                    entry["cron"],
+                ),
+                customerid=customerid,
+            ),
+            scheduled,
+        )
+        record("maintenance", responses, idmap["maintenance"])
+
+    return idmap
+
+
+class RecordChange(NamedTuple):
+    """A record that differs between two snapshots.
+
+    Args:
+        id (str): key of the record, such as the check ID
+        action (str): "added", "removed", or "changed"
+        fields (dict): for changed records, the dotted path of every
+            changed field mapped to (old value, new value). A field that
+            only exists on one side has None on the other.
+    """
+
+    id: str
+    action: str
+    fields: dict
+
+
+def _without(record: dict, ignore: frozenset) -> dict:
+    if ignore and not ignore.isdisjoint(record):
+        return {k: v for k, v in record.items() if k not in ignore}
+
+    return record
+
+
+def record_index(records: dict, ignore=VOLATILE) -> dict[str, str]:
+    """Content hash of every record, for comparing against later snapshots.
+
+    `diff` skips records with equal hashes instead of comparing the
+    records themselves. Keeping the index of the previous output avoids
+    hashing it again.
+
+    Args:
+        records (dict): output of a `get_all` function
+        ignore (set): top level fields left out of the hash
+
+    Returns:
+        dict: record key mapped to its hash
+    """
+    ignore = frozenset(ignore or ())
+
+    return {
+        key: _utils.record_hash(_without(record, ignore))
+        for key, record in records.items()
+        if isinstance(record, dict)
+    }
+
+
+def _walk(old, new, prefix: str, changes: dict, ignore=frozenset()) -> None:
+    for key, value in old.items():
+        if key in ignore:
+            continue
+
+        path = prefix + str(key)
+        if key not in new:
+            changes[path] = (value, None)
+            continue
+
+        other = new[key]
+        if value == other:
+            continue
+        if isinstance(value, dict) and isinstance(other, dict):
+            _walk(value, other, path + ".", changes)
+        else:
+            changes[path] = (value, other)
+
+    for key, value in new.items():
+        if key not in old and key not in ignore:
+            changes[prefix + str(key)] = (None, value)
+
+
+def field_diff(old: dict, new: dict, ignore=VOLATILE) -> dict:
+    """Changed fields between two versions of a record.
+
+    Nested dicts such as `parameters` are compared key by key, other
+    values such as lists are compared as a whole.
+
+    Args:
+        old (dict): previous version of the record
+        new (dict): current version of the record
+        ignore (set): top level fields to leave out
+
+    Returns:
+        dict: dotted field path mapped to (old value, new value)
+    """
+    ignore = frozenset(ignore or ())
+    changes = {}
+    _walk(old, new, "", changes, ignore)
+
+    return changes
+
+
+def iter_diff(
+    old: dict,
+    new: dict,
+    ignore=VOLATILE,
+    old_index: dict | None = None,
+    new_index: dict | None = None,
+) -> Iterator[RecordChange]:
+    """Yield the records that differ between two `get_all` outputs.
+
+    Records are matched by key in a single pass over each side, and only
+    records that differ are diffed field by field. When indexes from
+    `record_index` are given, records with the same hash are skipped
+    without being compared.
+
+    Args:
+        old (dict): previous output of a `get_all` function
+        new (dict): current output of the same function
+        ignore (set): top level fields to leave out, such as check state
+        old_index (dict): `record_index` of `old`
+        new_index (dict): `record_index` of `new`
+
+    Yields:
+        RecordChange: removed and changed records in the order of `old`,
+            then added records in the order of `new`
+    """
+    ignore = frozenset(ignore or ())
+    hashed = old_index is not None and new_index is not None
+
+    for key, record in old.items():
+        if not isinstance(record, dict):
+            continue
+
+        other = new.get(key)
+        if not isinstance(other, dict):
+            yield RecordChange(key, "removed", {})
+            continue
+        if hashed:
+            digest = old_index.get(key)
+            if digest is not None and digest == new_index.get(key):
+                continue
+        elif record == other:
+            continue
+
+        changes = {}
+        _walk(record, other, "", changes, ignore)
+        if changes:
+            yield RecordChange(key, "changed", changes)
+
+    for key, record in new.items():
+        if isinstance(record, dict) and not isinstance(old.get(key), dict):
+            yield RecordChange(key, "added", {})
+
+
+def diff(
+    old: dict,
+    new: dict,
+    ignore=VOLATILE,
+    old_index: dict | None = None,
+    new_index: dict | None = None,
+) -> list[RecordChange]:
+    """Compare two outputs of the same `get_all` function.
+
+    Both sides are indexed with `record_index`, so records whose fields
+    other than `ignore` are unchanged are skipped by hash, and only the
+    rest are compared field by field. Pass the index kept from an earlier
+    call to avoid hashing the old records again.
+
+    Args:
+        old (dict): previous `get_all` output
+        new (dict): current `get_all` output
+        ignore (set): top level fields to leave out, such as check state
+        old_index (dict): `record_index` of `old`, built when not given
+        new_index (dict): `record_index` of `new`, built when not given
+
+    Returns:
+        list: RecordChange for every added, removed, and changed record
+
+    Raises:
+        ValueError: a snapshot was given, compare those with `diff_snapshots`
+    """
+    if old.get("format") == FORMAT or new.get("format") == FORMAT:
+        raise ValueError("Compare snapshots with snapshot.diff_snapshots")
+
+    if old_index is None:
+        old_index = record_index(old, ignore)
+    if new_index is None:
+        new_index = record_index(new, ignore)
+
+    return list(iter_diff(old, new, ignore, old_index, new_index))
+
+
+def diff_snapshots(
+    old: dict, new: dict, ignore=VOLATILE
+) -> dict[str, list[RecordChange]]:
+    """Compare two snapshots from `take` or `load` module by module.
+
+    Args:
+        old (dict): previous snapshot
+        new (dict): current snapshot
+        ignore (set): top level fields to leave out, such as check state
+
+    Returns:
+        dict: each module mapped to its list of RecordChange, see `diff`
+    """
+    modules = list(old.get("data", {}))
+    modules += [m for m in new.get("data", {}) if m not in modules]
+
+    return {
+        module: diff(_records(old, module), _records(new, module), ignore)
+        for module in modules
+    }
@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+
+"""OpenTelemetry compatible tracing of API calls.
+
+Tracing is off until `enable` is called, and nothing is wrapped or
+hooked until then, so it costs nothing when unused. Once enabled, every
+function listed in the `API_FUNCTIONS` of the API modules runs in a span,
+and each HTTP attempt made by the transport is a child span with the
+route, method, status, payload sizes, and attempt number. Local helpers
+such as `schedules.is_active` are left alone. Spans are sent to an
+exporter: a JSON lines file, an OTLP/HTTP collector, or any callable.
+
+Spans follow the current context within a thread. Work submitted to a
+thread pool starts new traces unless it is run inside `span`.
+
+Example:
+
+    from nodepingpy import checks, tracing
+
+    tracing.enable(tracing.FileExporter("spans.jsonl"))
+    with tracing.span("nightly sync"):
+        checks.get_all(token)
+    tracing.disable()
+
+    tracing.enable(tracing.OTLPExporter("http://localhost:4318/v1/traces"))
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+from urllib.request import Request, urlopen
+
+from . import _utils
+
+
+# Modules with API calls that are wrapped in spans
+MODULES = (
+    "accounts",
+    "checks",
+    "contactgroups",
+    "contacts",
+    "diagnostics",
+    "information",
+    "maintenance",
+    "notificationprofiles",
+    "notifications",
+    "results",
+    "schedules",
+)
+
+_current = contextvars.ContextVar("nodepingpy_span", default=None)
+
+
+class Span:
+    """A timed operation in a trace.
+
+    Attributes:
+        name (str): what the span measures, such as "checks.get_all" or "GET checks"
+        trace_id (str): 32 hex digit ID shared by every span in the trace
+        span_id (str): 16 hex digit ID of this span
+        parent_id (str): span ID of the parent span, None for a root span
+        kind (str): "internal" for functions, "client" for HTTP requests
+        start (int): start time in nanoseconds since the epoch
+        end (int): end time in nanoseconds since the epoch
+        attributes (dict): details such as the route and status
+        error (str): error message when the operation failed
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "kind",
+        "start",
+        "end",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, name: str, parent: "Span | None" = None, kind: str = "internal"):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes = {}
+        self.error = None
+
+    @property
+    def duration(self) -> float:
+        """Length of the span in seconds."""
+        return (self.end - self.start) / 1e9
+
+    def to_dict(self) -> dict:
+        """The span as a plain dict."""
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class FileExporter:
+    """Append spans to a file as JSON lines.
+
+    Args:
+        path (str): file to append to
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def __call__(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+
+        with self._lock:
+            self._fh.write(line)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+
+    return {"stringValue": str(value)}
+
+
+_OTLP_KIND = {"internal": 1, "server": 2, "client": 3}
+
+
+def _otlp_span(span: Span) -> dict:
+    entry = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": _OTLP_KIND.get(span.kind, 1),
+        "startTimeUnixNano": str(span.start),
+        "endTimeUnixNano": str(span.end),
+        "attributes": [
+            {"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()
+        ],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+
+    if span.parent_id:
+        entry["parentSpanId"] = span.parent_id
+
+    return entry
+
+
+class OTLPExporter:
+    """Send spans to an OpenTelemetry collector with OTLP/HTTP JSON.
+
+    Spans are batched and sent from a background thread.
+
+    Args:
+        endpoint (str): the collector's traces URL
+        service_name (str): `service.name` resource attribute
+        batch_size (int): send as soon as this many spans are waiting
+        interval (float): longest seconds a span waits before being sent
+        headers (dict): extra HTTP headers, such as for authentication
+    """
+
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:4318/v1/traces",
+        service_name: str = "nodepingpy",
+        batch_size: int = 512,
+        interval: float = 5.0,
+        headers: dict | None = None,
+    ):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.headers = dict(headers or {})
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="nodeping-otlp", daemon=True
+        )
+        self._thread.start()
+
+    def __call__(self, span: Span) -> None:
+        with self._lock:
+            self._pending.append(span)
+            full = len(self._pending) >= self.batch_size
+
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Send every waiting span."""
+        with self._lock:
+            spans, self._pending = self._pending, []
+
+        if not spans:
+            return
+
+        body = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [
+                                {
+                                    "key": "service.name",
+                                    "value": {"stringValue": self.service_name},
+                                }
+                            ]
+                        },
+                        "scopeSpans": [
+                            {
+                                "scope": {"name": "nodepingpy"},
+                                "spans": [_otlp_span(s) for s in spans],
+                            }
+                        ],
+                    }
+                ]
+            }
+        ).encode("utf-8")
+
+        req = Request(self.endpoint, body, method="POST")
+        req.add_header("Content-Type", "application/json")
+        for name, value in self.headers.items():
+            req.add_header(name, value)
+
+        try:
+            urlopen(req, timeout=10).read()
+        except (OSError, ValueError):
+            self.dropped += len(spans)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def shutdown(self) -> None:
+        """Send waiting spans and stop the background thread."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+
+_exporter = None
+_originals = {}
+_http_spans = threading.local()
+
+
+def _finish(span: Span) -> None:
+    span.end = time.time_ns()
+    exporter = _exporter
+
+    if exporter is not None:
+        try:
+            exporter(span)
+        except Exception:
+            pass
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Run a block in a span, as a child of the current span.
+
+    Works while tracing is disabled too, without exporting anything.
+    """
+    parent = _current.get()
+    current = Span(name, parent)
+    current.attributes.update(attributes)
+    token = _current.set(current)
+
+    try:
+        yield current
+    except BaseException as err:
+        current.error = "{}: {}".format(type(err).__name__, err)
+        raise
+    finally:
+        _current.reset(token)
+        _finish(current)
+
+
+def current_span() -> Span | None:
+    """The span the current code is running in, if any."""
+    return _current.get()
+
+
+def _wrap(name: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def traced(*args, **kwargs):
+        with span(name):
+            return func(*args, **kwargs)
+
+    traced.__wrapped_by_tracing__ = True
+    return traced
+
+
+def _api_functions(module) -> dict[str, Callable]:
+    """The functions listed in a module's `API_FUNCTIONS`.
+
+    Raises:
+        AttributeError: the module has no API_FUNCTIONS, or lists a
+            function it does not have
+    """
+    return {name: getattr(module, name) for name in module.API_FUNCTIONS}
+
+
+def _pre_request(info) -> None:
+    current = Span("{} {}".format(info.method, info.route), _current.get(), "client")
+    current.attributes.update(
+        {
+            "http.request.method": info.method,
+            "http.route": info.route,
+            "url.full": info.url,
+            "nodeping.attempt": info.attempt,
+            "http.request.body.size": info.request_bytes,
+            "nodeping.encode_seconds": info.encode_time,
+        }
+    )
+    spans = getattr(_http_spans, "spans", None)
+    if spans is None:
+        spans = _http_spans.spans = {}
+    spans[id(info)] = current
+
+
+def _end_request(info) -> None:
+    spans = getattr(_http_spans, "spans", None)
+    current = spans.pop(id(info), None) if spans else None
+
+    if current is None:
+        return
+
+    if info.status is not None:
+        current.attributes["http.response.status_code"] = info.status
+        current.attributes["http.response.body.size"] = info.response_bytes
+        current.attributes["nodeping.decode_seconds"] = info.decode_time
+        if info.status >= 400:
+            current.error = "HTTP {}".format(info.status)
+    if info.error is not None:
+        current.error = "{}: {}".format(type(info.error).__name__, info.error)
+
+    _finish(current)
+
+
+def enable(exporter: Callable[[Span], None], modules=MODULES) -> None:
+    """Start tracing API calls.
+
+    The functions that make API calls are replaced on their modules, so
+    only calls looked up through the module at call time get a function
+    span, such as `checks.get_all(token)`. References taken before
+    tracing was enabled, such as from `from nodepingpy.checks import
+    get_all` or a function stored in a dict, keep calling the original
+    function. Their HTTP requests are still traced as spans of their own.
+
+    The wrapped functions are those listed in each module's
+    `API_FUNCTIONS`, so a new function that makes API calls has to be
+    added there.
+
+    Args:
+        exporter (callable): called with every finished Span, such as a
+            FileExporter or OTLPExporter
+        modules (tuple): names of the nodepingpy modules to wrap
+    """
+    global _exporter
+
+    if _exporter is not None:
+        disable()
+
+    # look every function up first, so nothing is wrapped if one is missing
+    wrapping = []
+    for modname in modules:
+        module = __import__("nodepingpy.{}".format(modname), fromlist=[modname])
+        wrapping.append((modname, module, _api_functions(module)))
+
+    _exporter = exporter
+
+    for modname, module, functions in wrapping:
+        for name, func in functions.items():
+            _originals[(module, name)] = func
+            setattr(module, name, _wrap("{}.{}".format(modname, name), func))
+
+    _utils.add_hook("pre_request", _pre_request)
+    _utils.add_hook("post_response", _end_request)
+    _utils.add_hook("error", _end_request)
+
+
+def disable() -> None:
+    """Stop tracing, restore the original functions, and shut down the exporter."""
+    global _exporter
+
+    _utils.remove_hook("pre_request", _pre_request)
+    _utils.remove_hook("post_response", _end_request)
+    _utils.remove_hook("error", _end_request)
+
+    for (module, name), func in _originals.items():
+        setattr(module, name, func)
+    _originals.clear()
+
+    exporter, _exporter = _exporter, None
+    shutdown = getattr(exporter, "shutdown", None)
+
+    if shutdown is not None:
+        shutdown()
+
+
+def enabled() -> bool:
+    """Whether tracing is enabled."""
+    return _exporter is not None
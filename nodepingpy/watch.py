@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+
+"""Watch `results.get_current` for changes in check state.
+
+Each poll is compared against the previous one by event key, in a
+single pass over the current events, and only the added, removed, and
+changed events are examined further. Changes are emitted as WatchEvent
+entries to callbacks, a generator, or an async iterator. The poll
+interval shortens while events are changing and backs off while they
+are not, or after a failed poll. Errors raised by callbacks or while
+polling are logged and do not stop the watcher.
+
+Example:
+
+    from nodepingpy import watch
+
+    watcher = watch.Watcher(token, min_interval=15, max_interval=120)
+    watcher.on(lambda event: print(event.kind, event.checkid), kinds=("down", "up"))
+    watcher.start()
+
+    async for event in watch.Watcher(token):
+        ...
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Iterator, NamedTuple
+
+from . import results
+
+
+NEW = "new"
+DOWN = "down"
+UP = "up"
+RESOLVED = "resolved"
+CHANGED = "changed"
+
+logger = logging.getLogger(__name__)
+
+
+class WatchEvent(NamedTuple):
+    """A change between two polls of the current events.
+
+    Args:
+        kind (str): "down" for a new down event, "new" for any other new
+            event, "up" when a down event ends, "resolved" when any other
+            event ends, and "changed" when an event is updated
+        key (str): key of the event in `results.get_current`
+        checkid (str): ID of the check the event is for
+        event (dict): the current event, or the last seen one when it ended
+        previous (dict): the event in the previous poll, None when it is new
+        time (int): millisecond timestamp of the poll
+    """
+
+    kind: str
+    key: str
+    checkid: str
+    event: dict
+    previous: dict | None
+    time: int
+
+
+def _checkid(key: str, event: dict) -> str:
+    for name in ("checkid", "check"):
+        value = event.get(name)
+        if isinstance(value, str) and value:
+            return value
+
+    return key
+
+
+def _is_down(event: dict) -> bool:
+    return event.get("type", "down") == "down"
+
+
+def diff(previous: dict, current: dict, now: int | None = None) -> list[WatchEvent]:
+    """Changes between two outputs of `results.get_current`.
+
+    Args:
+        previous (dict): output of the earlier poll
+        current (dict): output of the later poll
+        now (int): millisecond timestamp for the events, defaults to now
+
+    Returns:
+        list: WatchEvent for every added, removed, and changed event
+    """
+    if previous == current:
+        return []
+    if now is None:
+        now = int(time.time() * 1000)
+
+    changes = []
+    removed = previous.keys() - current.keys()
+    get = previous.get
+    # a single comprehension finds the few events that differ
+    differ = [key for key, event in current.items() if get(key) != event]
+
+    for key in differ:
+        event = current[key]
+        if not isinstance(event, dict):
+            continue
+
+        old = get(key)
+        if old is None:
+            kind = DOWN if _is_down(event) else NEW
+        elif _is_down(event) != _is_down(old):
+            kind = DOWN if _is_down(event) else UP
+        else:
+            kind = CHANGED
+
+        changes.append(WatchEvent(kind, key, _checkid(key, event), event, old, now))
+
+    for key in removed:
+        old = previous[key]
+        if isinstance(old, dict):
+            kind = UP if _is_down(old) else RESOLVED
+            changes.append(WatchEvent(kind, key, _checkid(key, old), old, old, now))
+
+    return changes
+
+
+class Watcher:
+    """Poll the current events and emit changes.
+
+    Args:
+        token (str): NodePing API token
+        interval (float): starting seconds between polls
+        min_interval (float): seconds between polls while events are changing
+        max_interval (float): longest seconds between polls while nothing changes
+        backoff (float): factor the interval grows by after a poll without changes
+        emit_initial (bool): emit the events found by the first poll as new
+        customerid (str): subaccount ID
+        fetch (callable): called with no arguments instead of `results.get_current`
+
+    Attributes:
+        current (dict): events from the last successful poll
+        interval (float): seconds until the next poll
+        last_error (dict): error from the last failed poll, or None
+    """
+
+    def __init__(
+        self,
+        token: str,
+        interval: float = 60.0,
+        min_interval: float = 15.0,
+        max_interval: float = 300.0,
+        backoff: float = 1.5,
+        emit_initial: bool = False,
+        customerid: str | None = None,
+        fetch: Callable[[], dict] | None = None,
+    ):
+        self.token = token
+        self.customerid = customerid
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        self.backoff = max(1.0, backoff)
+        self.current = {}
+        self.last_error = None
+        self._fetch = fetch
+        self._initialized = emit_initial
+        self._callbacks = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def on(
+        self, callback: Callable[[WatchEvent], None], kinds: tuple | None = None
+    ) -> None:
+        """Call `callback` with every event, or only events of the given kinds."""
+        self._callbacks.append((callback, frozenset(kinds) if kinds else None))
+
+    def _get(self) -> dict:
+        if self._fetch is not None:
+            return self._fetch()
+
+        return results.get_current(self.token, customerid=self.customerid)
+
+    def poll(self) -> list[WatchEvent]:
+        """Poll once, adjust the interval, and dispatch changes to callbacks.
+
+        Returns:
+            list: the changes found by this poll
+        """
+        try:
+            current = self._get()
+        except Exception as err:
+            logger.exception("Polling the current events failed")
+            current = {"error": str(err)}
+
+        if not isinstance(current, dict) or "error" in current:
+            self.last_error = current
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+            return []
+
+        self.last_error = None
+
+        if self._initialized:
+            changes = diff(self.current, current)
+        else:
+            changes = []
+            self._initialized = True
+
+        self.current = current
+
+        if changes:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+
+        for event in changes:
+            for callback, kinds in self._callbacks:
+                if kinds is None or event.kind in kinds:
+                    try:
+                        callback(event)
+                    except Exception:
+                        logger.exception("Watch callback %r failed", callback)
+
+        return changes
+
+    def events(self) -> Iterator[WatchEvent]:
+        """Poll until `stop` is called, yielding every change."""
+        self._stop.clear()
+
+        while not self._stop.is_set():
+            yield from self.poll()
+            self._stop.wait(self.interval)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Watch poll failed")
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+            self._stop.wait(self.interval)
+
+    def start(self) -> "Watcher":
+        """Poll from a background thread, dispatching changes to callbacks."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="nodeping-watch", daemon=True
+            )
+            self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def __aiter__(self):
+        self._stop.clear()
+
+        while not self._stop.is_set():
+            for event in await asyncio.to_thread(self.poll):
+                yield event
+            await asyncio.to_thread(self._stop.wait, self.interval)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+
+"""Receive NodePing webhook notifications.
+
+https://nodeping.com/webhooks.html
+
+A webhook contact method posts the `data` template of the address, such
+as in the `contacts.create` example, with placeholders like `{event}`,
+`{_id}`, and `{label}` filled in. The receiver parses JSON or form
+encoded bodies into WebhookEvent entries, answers right away, and runs
+handlers on a worker pool. Retried deliveries are dropped for a while
+when the payload has a field that is unique to each notification, such
+as `{checktime}` in the template below. Payloads without it are never
+dropped, since a check going down, up, and down again would otherwise
+send the same body twice.
+
+Example:
+
+    from nodepingpy import webhooks
+
+    receiver = webhooks.WebhookReceiver(port=8080, secret="s3cret")
+    receiver.on(lambda event: print(event.event, event.label), events=("down", "up"))
+    receiver.serve_forever()
+
+The webhook address for the receiver above would be created with:
+
+    {'action': 'post',
+     'address': 'https://hooks.example.com:8080/?secret=s3cret',
+     'data': {'event': '{event}', 'id': '{_id}', 'label': '{label}',
+              'checktime': '{checktime}', 'runtime': '{runtime}',
+              'target': '{target}'},
+     'headers': {'Content-Type': 'application/json'},
+     'type': 'webhook'}
+"""
+
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, parse_qsl, urlsplit
+
+from . import codec
+
+
+# Keys a webhook `data` template may use for each WebhookEvent field
+_ALIASES = {
+    "checkid": ("checkid", "_id", "id", "check"),
+    "event": ("event",),
+    "label": ("label",),
+    "type": ("type", "checktype"),
+    "target": ("target",),
+    "message": ("message", "msg"),
+}
+
+
+def _number(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class WebhookEvent:
+    """A notification delivered to a webhook.
+
+    Args:
+        checkid (str): ID of the check, from `{_id}`
+        event (str): the notification event, such as "down" or "up"
+        label (str): label of the check
+        type (str): check type
+        target (str): target of the check
+        message (str): result message
+        runtime (float): runtime of the check in milliseconds, if sent
+        checktime (float): millisecond timestamp of the check, if sent
+        data (dict): the full payload as received
+        received (float): time the event was received, in seconds
+    """
+
+    checkid: str = ""
+    event: str = ""
+    label: str = ""
+    type: str = ""
+    target: str = ""
+    message: str = ""
+    runtime: float | None = None
+    checktime: float | None = None
+    data: dict = field(default_factory=dict)
+    received: float = 0.0
+
+
+def parse(body: bytes, content_type: str = "application/json") -> WebhookEvent:
+    """Parse a webhook body into a WebhookEvent.
+
+    Args:
+        body (bytes): request body
+        content_type (str): Content-Type header of the request
+
+    Returns:
+        WebhookEvent: the parsed event
+
+    Raises:
+        ValueError: the body is not a JSON object or form data
+    """
+    if "x-www-form-urlencoded" in content_type:
+        data = dict(parse_qsl(body.decode("utf-8"), keep_blank_values=True))
+    else:
+        data = codec.loads(body)
+
+    if not isinstance(data, dict):
+        raise ValueError("Webhook body is not an object")
+
+    values = {}
+    for name, keys in _ALIASES.items():
+        for key in keys:
+            value = data.get(key)
+            if value not in (None, ""):
+                values[name] = str(value)
+                break
+
+    return WebhookEvent(
+        runtime=_number(data.get("runtime")),
+        checktime=_number(data.get("checktime")),
+        data=data,
+        received=time.time(),
+        **values,
+    )
+
+
+class _Seen:
+    """Delivery keys seen recently, forgotten after `ttl` seconds."""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key) -> bool:
+        """Remember a key. Returns False if it was already seen."""
+        now = time.monotonic()
+
+        with self._lock:
+            entries = self._entries
+            while entries:
+                oldest, expires = next(iter(entries.items()))
+                if expires > now and len(entries) < self.maxsize:
+                    break
+                del entries[oldest]
+
+            if key in entries:
+                return False
+
+            entries[key] = now + self.ttl
+            return True
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class WebhookReceiver:
+    """HTTP server for NodePing webhook contact methods.
+
+    Args:
+        host (str): address to listen on
+        port (int): port to listen on, 0 picks a free port
+        path (str): only accept posts to this path, None for any path
+        workers (int): number of threads running handlers
+        dedupe_key (str): payload field unique to each notification, such
+            as "checktime". Deliveries with the same check ID, event, and
+            value of this field are dropped. Payloads without the field
+            are never dropped, and None turns deduplication off.
+        dedupe_ttl (float): seconds to drop repeated deliveries
+        dedupe_size (int): most deliveries remembered for deduplication
+        secret (str): when set, required as the `secret` query parameter
+            or the `X-Webhook-Secret` header
+        max_body (int): largest body accepted in bytes, larger ones are
+            answered with 413
+
+    Attributes:
+        stats (dict): number of events "received", "duplicate", "invalid",
+            "unauthorized", "too_large", "handled", and "failed" by a handler
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        path: str | None = None,
+        workers: int = 8,
+        dedupe_key: str | None = "checktime",
+        dedupe_ttl: float = 300.0,
+        dedupe_size: int = 100000,
+        secret: str | None = None,
+        max_body: int = 64 * 1024,
+    ):
+        self.path = path
+        self.secret = secret
+        self.dedupe_key = dedupe_key
+        self.max_body = max_body
+        self.stats = {
+            "received": 0,
+            "duplicate": 0,
+            "invalid": 0,
+            "unauthorized": 0,
+            "too_large": 0,
+            "handled": 0,
+            "failed": 0,
+        }
+        self._handlers = []
+        self._seen = _Seen(dedupe_ttl, dedupe_size)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._server = _Server((host, port), self._request_handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}{}".format(host, port, self.path or "/")
+
+    def on(
+        self, handler: Callable[[WebhookEvent], None], events: tuple | None = None
+    ) -> None:
+        """Call `handler` for every event, or only for the given `event` values."""
+        self._handlers.append((handler, frozenset(events) if events else None))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _authorized(self, query: str, headers) -> bool:
+        if self.secret is None:
+            return True
+
+        supplied = headers.get("X-Webhook-Secret")
+        if supplied is None:
+            supplied = parse_qs(query).get("secret", [""])[0]
+
+        return hmac.compare_digest(supplied.encode(), self.secret.encode())
+
+    def _dispatch(self, event: WebhookEvent) -> None:
+        for handler, events in self._handlers:
+            if events is not None and event.event not in events:
+                continue
+            try:
+                handler(event)
+            except Exception:
+                self._count("failed")
+            else:
+                self._count("handled")
+
+    def receive(self, body: bytes, content_type: str = "application/json") -> int:
+        """Parse, deduplicate, and queue one delivery.
+
+        Returns:
+            int: HTTP status to answer with
+        """
+        if len(body) > self.max_body:
+            self._count("too_large")
+            return 413
+
+        try:
+            event = parse(body, content_type)
+        except (UnicodeDecodeError, ValueError):
+            self._count("invalid")
+            return 400
+
+        if self.dedupe_key is not None:
+            unique = event.data.get(self.dedupe_key)
+            if unique not in (None, "") and not self._seen.add(
+                (event.checkid, event.event, str(unique))
+            ):
+                self._count("duplicate")
+                return 200
+
+        self._count("received")
+        self._pool.submit(self._dispatch, event)
+
+        return 200
+
+    def _request_handler(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                parts = urlsplit(self.path)
+
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                except ValueError:
+                    length = -1
+
+                if length < 0:
+                    self._reject(400)
+                    return
+                if length > receiver.max_body:
+                    receiver._count("too_large")
+                    self._reject(413)
+                    return
+
+                body = self.rfile.read(length)
+
+                if receiver.path is not None and parts.path != receiver.path:
+                    status = 404
+                elif not receiver._authorized(parts.query, self.headers):
+                    receiver._count("unauthorized")
+                    status = 403
+                else:
+                    status = receiver.receive(
+                        body, self.headers.get("Content-Type", "application/json")
+                    )
+
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_PUT = do_POST
+
+            def _reject(self, status: int) -> None:
+                # the body is left unread, so the connection cannot be reused
+                self.close_connection = True
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "WebhookReceiver":
+        """Serve from a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="nodeping-webhooks", daemon=True
+            )
+            self._thread.start()
+
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve from the current thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop serving, finish queued handlers, and close the socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+
+        self._server.server_close()
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()